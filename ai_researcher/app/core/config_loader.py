@@ -0,0 +1,49 @@
+# app/core/config_loader.py
+
+import os
+from functools import lru_cache
+from typing import Any, Dict
+
+import yaml
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CONFIG_PATH = os.getenv("AI_RESEARCHER_CONFIG", "./config.yaml")
+
+
+@lru_cache(maxsize=1)
+def load_config(path: str = CONFIG_PATH) -> Dict[str, Any]:
+    """
+    Loads config.yaml once and caches it for the lifetime of the process.
+    A missing or empty file yields an empty config so every caller can fall back to defaults.
+    """
+    if not os.path.exists(path):
+        logger.warning(f"Config file not found at '{path}', using defaults.")
+        return {}
+
+    with open(path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+
+    logger.info(f"Loaded configuration from '{path}'.")
+    return config
+
+
+def merge_config(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns `base` updated with `overrides`; nested sections are merged key by key.
+    """
+    merged = dict(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            value = merge_config(merged[key], value)
+        merged[key] = value
+    return merged
+
+
+def get_section(name: str) -> Dict[str, Any]:
+    """
+    Returns a top-level section of the config (e.g. 'vector_db'), or an empty dict.
+    """
+    section = load_config().get(name)
+    return section if isinstance(section, dict) else {}
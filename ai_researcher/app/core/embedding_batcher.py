@@ -0,0 +1,95 @@
+# app/core/embedding_batcher.py
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from app.utils.logger import get_logger
+from app.utils.metrics import BATCH_SIZE_BUCKETS, LATENCY_MS_BUCKETS, Histogram
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_WAIT_MS = 5.0
+DEFAULT_MAX_BATCH_SIZE = 32
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-query embedding requests into one model call.
+
+    Callers submit a text and block on a Future. A worker thread takes the first
+    pending text, keeps collecting for up to `max_wait_ms` (or until
+    `max_batch_size` texts are queued), encodes them together and hands every
+    caller its own row.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    ):
+        self.encode = encode
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        self.queue_delay_ms = Histogram(LATENCY_MS_BUCKETS)
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+
+        self._queue: "queue.Queue[Tuple[str, Future, float]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Blocking helper: returns the (dim,) embedding for one text.
+        """
+        return self.submit(text).result()
+
+    def stats(self) -> Dict:
+        return {
+            "max_wait_ms": self.max_wait * 1000,
+            "max_batch_size": self.max_batch_size,
+            "queue_delay_ms": self.queue_delay_ms.snapshot(),
+            "batch_size": self.batch_size.snapshot(),
+        }
+
+    def _collect(self) -> List[Tuple[str, Future, float]]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            for _, _, submitted in batch:
+                self.queue_delay_ms.observe((started - submitted) * 1000)
+            self.batch_size.observe(len(batch))
+
+            try:
+                embeddings = self.encode([text for text, _, _ in batch])
+            except Exception as e:
+                logger.error(f"Batched embedding failed for {len(batch)} queries: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for row, (_, future, _) in zip(embeddings, batch):
+                future.set_result(row)
@@ -0,0 +1,198 @@
+# app/core/embedding_cache.py
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+EMBEDDING_CACHE_DIR = "./app/data/embedding_cache"
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_MEMORY_ENTRIES = 10_000
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache with two tiers:
+
+    - memory: an LRU OrderedDict of the most recently used vectors
+    - disk:   a fixed-size float32 NumPy memmap of `max_entries` slots, with a small
+              SQLite table mapping sha256(model_name, text) → slot
+
+    When the disk tier is full the least recently used slot is overwritten, so the
+    cache never grows past `max_entries * dim * 4` bytes.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        dim: int,
+        cache_dir: str = EMBEDDING_CACHE_DIR,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+    ):
+        self.model_name = model_name
+        self.dim = dim
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+
+        self.cache_dir = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", model_name))
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        vectors_path = os.path.join(self.cache_dir, "vectors.f32")
+        row_bytes = dim * np.dtype(np.float32).itemsize
+        if os.path.exists(vectors_path):
+            existing_rows = os.path.getsize(vectors_path) // row_bytes
+            if existing_rows < max_entries:
+                os.truncate(vectors_path, max_entries * row_bytes)
+            else:
+                # Never shrink in place: slots beyond a lowered limit may still be referenced.
+                self.max_entries = existing_rows
+            mode = "r+"
+        else:
+            mode = "w+"
+        self._vectors = np.memmap(vectors_path, dtype=np.float32, mode=mode, shape=(self.max_entries, dim))
+
+        self.conn = sqlite3.connect(os.path.join(self.cache_dir, "keys.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                slot INTEGER NOT NULL UNIQUE,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+            """
+        )
+        self.conn.commit()
+        self._size = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        logger.info(f"Embedding cache ready at '{self.cache_dir}' with {self._size} entries.")
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Returns one vector per text, or None for cache misses.
+        """
+        keys = [self.key(t) for t in texts]
+        found: List[Optional[np.ndarray]] = [None] * len(keys)
+        disk_lookups: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[i] = vector
+                    self.hits_memory += 1
+                else:
+                    disk_lookups.setdefault(key, []).append(i)
+
+            if disk_lookups:
+                slots = self._lookup_slots(list(disk_lookups))
+                for key, slot in slots.items():
+                    vector = np.array(self._vectors[slot])
+                    self._remember(key, vector)
+                    for i in disk_lookups[key]:
+                        found[i] = vector
+                        self.hits_disk += 1
+                if slots:
+                    now = time.time()
+                    with self.conn:
+                        self.conn.executemany(
+                            "UPDATE entries SET last_used = ? WHERE key = ?", [(now, k) for k in slots]
+                        )
+
+            self.misses += sum(1 for v in found if v is None)
+        return found
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        keys = [self.key(t) for t in texts]
+        with self._lock:
+            now = time.time()
+            seen = set(self._lookup_slots(keys))
+            new = []
+            for key, vector in zip(keys, vectors):
+                if key not in seen:
+                    seen.add(key)
+                    new.append((key, vector))
+            # A batch larger than the cache could only evict its own first rows; keep the last `max_entries`.
+            rows = []
+            for key, vector in new[-self.max_entries:]:
+                slot = self._allocate_slot()
+                self._vectors[slot] = vector
+                rows.append((key, slot, now))
+                self._remember(key, vector)
+
+            if rows:
+                self._vectors.flush()
+                with self.conn:
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)", rows
+                    )
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits_memory + self.hits_disk + self.misses
+            return {
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "memory_entries": len(self._memory),
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_rate": round((self.hits_memory + self.hits_disk) / lookups, 4) if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self._vectors.flush()
+            self.conn.close()
+
+    def _lookup_slots(self, keys: List[str]) -> Dict[str, int]:
+        slots: Dict[str, int] = {}
+        for start in range(0, len(keys), 900):
+            batch = keys[start:start + 900]
+            placeholders = ",".join("?" * len(batch))
+            cursor = self.conn.execute(f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", batch)
+            slots.update(cursor.fetchall())
+        return slots
+
+    def _allocate_slot(self) -> int:
+        if self._size < self.max_entries:
+            # Slots are handed out densely until the memmap is full.
+            slot = self._size
+            self._size += 1
+            return slot
+
+        # Full: reuse the least recently used slot.
+        key, slot = self.conn.execute(
+            "SELECT key, slot FROM entries ORDER BY last_used LIMIT 1"
+        ).fetchone()
+        with self.conn:
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self._memory.pop(key, None)
+        return slot
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
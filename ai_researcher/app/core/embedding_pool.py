@@ -0,0 +1,87 @@
+# app/core/embedding_pool.py
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SHARD_SIZE = 128
+
+# Per-process model, loaded once by the pool initializer.
+_worker_model = None
+
+
+def _init_worker(model_name: str, backend: str, config: Dict[str, Any], threads: int):
+    global _worker_model
+    from app.core.embedding_service import load_embedding_model
+
+    if backend == "torch":
+        import torch  #type: ignore
+        torch.set_num_threads(threads)
+    else:
+        config = {**config, "onnx_threads": threads}
+    _worker_model = load_embedding_model(model_name, backend, config)
+
+
+def _encode_shard(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_model.encode(texts, convert_to_numpy=True), dtype=np.float32)  #type: ignore
+
+
+class EmbeddingPool:
+    """
+    Process pool for bulk re-embedding. Chunk lists are cut into shards of
+    `shard_size`, spread across `workers` processes that each load the model once,
+    and reassembled in input order. Each worker gets cpu_count / workers intra-op
+    threads so the processes do not oversubscribe the cores.
+
+    The pool is started lazily on the first `encode`, so API processes that never
+    ingest in bulk never pay for it.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str,
+        workers: int,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+        config: Optional[Dict[str, Any]] = None,
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.workers = workers
+        self.shard_size = shard_size
+        self.config = config or {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                threads = max(1, (os.cpu_count() or 1) // self.workers)
+                logger.info(f"Starting embedding pool: {self.workers} workers x {threads} threads.")
+                # spawn, not fork: torch and ONNX Runtime thread pools do not survive a fork.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self.backend, self.config, threads),
+                )
+            return self._executor
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        shards = [texts[i:i + self.shard_size] for i in range(0, len(texts), self.shard_size)]
+        # executor.map yields results in submission order, so rows line up with `texts`.
+        results = list(self._get_executor().map(_encode_shard, shards))
+        return np.vstack(results)
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
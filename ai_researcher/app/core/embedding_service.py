@@ -1,35 +1,136 @@
-from typing import List
-from sentence_transformers import SentenceTransformer 
+from typing import List, Optional
 import numpy as np 
+from app.core.config_loader import get_section
+from app.core.embedding_cache import EmbeddingCache, DEFAULT_MAX_ENTRIES, DEFAULT_MEMORY_ENTRIES, EMBEDDING_CACHE_DIR
+from app.core.embedding_batcher import EmbeddingBatcher, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS
+from app.core.embedding_pool import EmbeddingPool, DEFAULT_SHARD_SIZE
 from app.utils.logger import get_logger
+from app.utils.text_cleaner import iter_chunks
 
 
 logger = get_logger(__name__)
 
+# Batches smaller than this are embedded in-process even when a pool is configured.
+DEFAULT_POOL_MIN_TEXTS = 512
+
+
+def load_embedding_model(model_name: str, backend: str, config: dict):
+    """
+    `torch` runs SentenceTransformer; `onnx` runs the int8 ONNX export through
+    ONNX Runtime and never imports torch. Both expose `encode`.
+    """
+    if backend == "onnx":
+        from app.core.onnx_embedder import OnnxEmbedder, ONNX_MODEL_DIR
+        return OnnxEmbedder(
+            model_dir=config.get("onnx_model_dir", ONNX_MODEL_DIR),
+            intra_op_threads=config.get("onnx_threads"),
+        )
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    raise ValueError(f"Unknown embedding backend '{backend}'. Expected 'torch' or 'onnx'.")
+
 
 
 class EmbeddingService:
 
-    def __init__(self, model_name:str = "all-MiniLM-L6-v2"):
-        logger.info(f"Initializing embedding model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+    def __init__(
+        self,
+        model_name:str = "all-MiniLM-L6-v2",
+        cache: Optional[EmbeddingCache] = None,
+        backend: Optional[str] = None,
+    ):
+        config = get_section("embedding_model")
+        self.model_name = model_name
+        self.backend = backend or config.get("backend", "torch")
+        logger.info(f"Initializing embedding model: {model_name} (backend={self.backend})")
+        self.model = load_embedding_model(model_name, self.backend, config)
         logger.info("Embedding Model Loaded Successfully ")
+        self.cache = cache or self._cache_from_config()
+        self.batcher = self._batcher_from_config()
+        self.pool, self.pool_min_texts = self._pool_from_config(config)
+
+    def _pool_from_config(self, config: dict):
+        pool_config = config.get("pool") or {}
+        workers = pool_config.get("workers", 0)
+        if workers < 2:
+            return None, 0
+        pool = EmbeddingPool(
+            self.model_name,
+            self.backend,
+            workers=workers,
+            shard_size=pool_config.get("shard_size", DEFAULT_SHARD_SIZE),
+            config=config,
+        )
+        return pool, pool_config.get("min_texts", DEFAULT_POOL_MIN_TEXTS)
+
+    def _cache_from_config(self) -> Optional[EmbeddingCache]:
+        config = get_section("embedding_model").get("cache") or {}
+        if not config.get("enabled", True):
+            return None
+        # The quantized model's vectors differ slightly, so it gets its own cache namespace.
+        cache_name = self.model_name if self.backend == "torch" else f"{self.model_name}-{self.backend}"
+        return EmbeddingCache(
+            model_name=cache_name,
+            dim=self.model.get_sentence_embedding_dimension(),
+            cache_dir=config.get("dir", EMBEDDING_CACHE_DIR),
+            max_entries=config.get("max_entries", DEFAULT_MAX_ENTRIES),
+            memory_entries=config.get("memory_entries", DEFAULT_MEMORY_ENTRIES),
+        )
 
     
     def chunk_document(self, document: str , chunk_size: int = 500, overlap: int = 50)-> List[str]:
-        chunks = []
-        start = 0
-        while start < len(document):
-            end = min(start + chunk_size, len(document))
-            chunks.append(document[start:end])
-            start += chunk_size - overlap
+        """
+        Splits a raw document into chunks of at most `chunk_size` characters, cut between tokens.
+        """
+        chunks = list(iter_chunks(document, chunk_size, overlap, boundary="token"))
         logger.info(f"Document chunked into {len(chunks)} segments (chunk_size={chunk_size}, overlap={overlap}).")
         return chunks
 
+    def _batcher_from_config(self) -> Optional[EmbeddingBatcher]:
+        config = get_section("embedding_model").get("batching") or {}
+        if not config.get("enabled", True):
+            return None
+        return EmbeddingBatcher(
+            self.get_embeddings,
+            max_wait_ms=config.get("max_wait_ms", DEFAULT_MAX_WAIT_MS),
+            max_batch_size=config.get("max_batch_size", DEFAULT_MAX_BATCH_SIZE),
+        )
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embeds a single search query, coalescing it with concurrent queries when batching is on.
+        Returns a (1, dim) array like `get_embeddings([query])`.
+        """
+        if self.batcher is None:
+            return self.get_embeddings([query])
+        return self.batcher.embed(query).reshape(1, -1)
+
     def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        if self.cache is None or not texts:
+            return self._encode(texts)
+
+        cached = self.cache.get_many(texts)
+        # Only texts missing from the cache reach the model, each distinct one once.
+        missing = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+        if not missing:
+            logger.info(f"All {len(texts)} embeddings served from cache.")
+            return np.vstack(cached).astype(np.float32)
+
+        encoded = self._encode(missing)
+        self.cache.put_many(missing, encoded)
+        by_text = dict(zip(missing, encoded))
+        return np.vstack([v if v is not None else by_text[t] for t, v in zip(texts, cached)]).astype(np.float32)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
         logger.info(f"Generating embeddings for {len(texts)} text chunks...")
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
+        if self.pool is not None and len(texts) >= self.pool_min_texts:
+            embeddings = self.pool.encode(texts)
+        else:
+            embeddings = self.model.encode(texts, convert_to_numpy=True)
         logger.info(f"Generated embeddings with shape: {embeddings.shape}")
         return embeddings 
 
-
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
@@ -0,0 +1,197 @@
+# app/core/index_factory.py
+
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+import faiss  #type: ignore
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# Corpus sizes at which `auto` moves to the next index type.
+AUTO_HNSW_MIN_VECTORS = 10_000
+AUTO_IVF_PQ_MIN_VECTORS = 1_000_000
+
+# FAISS warns when an IVF quantizer is trained on fewer than ~39 points per centroid.
+MIN_POINTS_PER_CENTROID = 39
+PQ_TRAINING_POINTS = 256
+
+
+def resolve_index_type(index_type: str, n_vectors: int) -> str:
+    """
+    Maps the configured index type to a concrete one. `auto` picks by corpus size:
+    exact flat search for small corpora, HNSW for mid-sized ones and IVF-PQ once
+    the raw vectors would no longer comfortably fit in RAM.
+    """
+    if index_type != "auto":
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{index_type}'. Expected one of {INDEX_TYPES} or 'auto'.")
+        return index_type
+
+    if n_vectors < AUTO_HNSW_MIN_VECTORS:
+        return "flat"
+    if n_vectors < AUTO_IVF_PQ_MIN_VECTORS:
+        return "hnsw"
+    return "ivf_pq"
+
+
+def default_nlist(n_vectors: int) -> int:
+    """
+    Rule of thumb of ~4·sqrt(n) inverted lists, capped so every centroid still
+    gets enough training points.
+    """
+    nlist = int(4 * math.sqrt(max(n_vectors, 1)))
+    return max(1, min(nlist, n_vectors // MIN_POINTS_PER_CENTROID))
+
+
+def min_training_vectors(index_type: str, nlist: int) -> int:
+    if index_type == "ivf_flat":
+        return nlist * MIN_POINTS_PER_CENTROID
+    if index_type == "ivf_pq":
+        return max(nlist * MIN_POINTS_PER_CENTROID, PQ_TRAINING_POINTS)
+    return 0
+
+
+def build_index(
+    index_type: str,
+    dim: int,
+    n_vectors: int = 0,
+    params: Optional[Dict[str, Any]] = None,
+    metric: int = faiss.METRIC_L2,
+) -> faiss.Index:
+    """
+    Builds an empty (untrained) FAISS index of the requested type.
+
+    Supported params: nlist, pq_m, pq_nbits, hnsw_m, ef_construction.
+    """
+    params = params or {}
+    index_type = resolve_index_type(index_type, n_vectors)
+
+    if index_type == "flat":
+        description = "Flat"
+    elif index_type == "ivf_flat":
+        nlist = params.get("nlist") or default_nlist(n_vectors)
+        description = f"IVF{nlist},Flat"
+    elif index_type == "ivf_pq":
+        nlist = params.get("nlist") or default_nlist(n_vectors)
+        pq_m = params.get("pq_m", 16)
+        if dim % pq_m != 0:
+            raise ValueError(f"pq_m={pq_m} must divide the embedding dimension {dim}.")
+        description = f"IVF{nlist},PQ{pq_m}x{params.get('pq_nbits', 8)}"
+    else:
+        description = f"HNSW{params.get('hnsw_m', 32)},Flat"
+
+    index = faiss.index_factory(dim, description, metric)
+
+    if index_type == "hnsw":
+        index.hnsw.efConstruction = params.get("ef_construction", 200)
+
+    logger.info(f"Built FAISS index '{description}' for {n_vectors} vectors.")
+    return index
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """
+    Returns which of INDEX_TYPES a (possibly id-mapped) FAISS index is.
+    """
+    index = unwrap_index(index)
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def unwrap_index(index: faiss.Index) -> faiss.Index:
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def configure_search(index: faiss.Index, params: Optional[Dict[str, Any]] = None):
+    """
+    Applies query-time knobs: `nprobe` for IVF indexes, `ef_search` for HNSW.
+    """
+    params = params or {}
+    inner = unwrap_index(index)
+    if isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = min(params.get("nprobe", 16), inner.nlist)
+    elif isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = params.get("ef_search", 64)
+
+
+def make_search_parameters(
+    index: faiss.Index, selector: Optional[faiss.IDSelector] = None, params: Optional[Dict[str, Any]] = None
+) -> faiss.SearchParameters:
+    """
+    Per-call search parameters of the class the index type expects (IVF rejects
+    the generic base class), carrying an optional id selector.
+    """
+    params = params or {}
+    inner = unwrap_index(index)
+    kwargs = {"sel": selector} if selector is not None else {}
+    if isinstance(inner, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(nprobe=min(params.get("nprobe", 16), inner.nlist), **kwargs)
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=params.get("ef_search", 64), **kwargs)
+    return faiss.SearchParameters(**kwargs)
+
+
+def metric_name(index: faiss.Index) -> str:
+    return "cosine" if index.metric_type == faiss.METRIC_INNER_PRODUCT else "l2"
+
+
+def faiss_metric(metric: str) -> int:
+    """
+    `cosine` is inner product over L2-normalised vectors; `l2` is FAISS' squared L2 distance.
+    """
+    if metric == "cosine":
+        return faiss.METRIC_INNER_PRODUCT
+    if metric == "l2":
+        return faiss.METRIC_L2
+    raise ValueError(f"Unknown metric '{metric}'. Expected 'cosine' or 'l2'.")
+
+
+def train_index(index: faiss.Index, vectors: np.ndarray, max_training_vectors: int = 100_000):
+    """
+    Trains IVF / PQ indexes on (a sample of) the given vectors. No-op for flat and HNSW.
+    """
+    if index.is_trained:
+        return
+
+    if len(vectors) > max_training_vectors:
+        rng = np.random.default_rng(0)
+        vectors = vectors[rng.choice(len(vectors), max_training_vectors, replace=False)]
+
+    logger.info(f"Training FAISS index on {len(vectors)} vectors...")
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+
+
+def reconstruct_all(index: faiss.Index) -> np.ndarray:
+    """
+    Returns every stored vector in insertion order. Exact for flat, HNSW and
+    IVF-Flat; IVF-PQ only yields the lossy PQ reconstructions.
+    """
+    inner = unwrap_index(index)
+    if not isinstance(inner, faiss.IndexIVF):
+        return inner.reconstruct_n(0, inner.ntotal)
+
+    # The direct map is only needed for this call; IVF `remove_ids` refuses to run while it exists.
+    inner.make_direct_map()
+    try:
+        return inner.reconstruct_n(0, inner.ntotal)
+    finally:
+        inner.make_direct_map(False)
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    """
+    HNSW graphs cannot drop vectors in place; every other supported type can.
+    """
+    return index_type_of(index) != "hnsw"
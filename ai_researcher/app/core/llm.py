@@ -1,16 +1,20 @@
 # app/core/llm.py
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.messages import HumanMessage, SystemMessage
+from app.core.config_loader import get_section
+from app.core.llm_cache import LLMCache, cache_key, llm_cache_from_config
 from app.utils.logger import get_logger
 import os
 from dotenv import load_dotenv
-from typing import Any, Union
+from typing import TYPE_CHECKING, Any, AsyncIterator, Optional, Tuple, Union
+
+# langchain is imported when the client is built, so importing this module stays cheap.
+if TYPE_CHECKING:
+    from langchain.messages import HumanMessage, SystemMessage
 
 load_dotenv()
 logger = get_logger(__name__)
 
-MessageType = Union[HumanMessage, SystemMessage]
+MessageType = Union["HumanMessage", "SystemMessage"]
 
 class GeminiLLM:
     """
@@ -18,32 +22,108 @@ class GeminiLLM:
     Handles summarization, explanation, and conversational prompts.
     """
 
-    def __init__(self, model_name: str = "gemini-2.5-flash"):
+    def __init__(self, model_name: str = "gemini-2.5-flash", cache: Optional[LLMCache] = None):
         self.api_key = os.getenv("GOOGLE_API_KEY")
         if not self.api_key:
             raise ValueError("❌ GOOGLE_API_KEY not found in .env file")
 
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         self.model_name = model_name
         self.llm = ChatGoogleGenerativeAI(model=model_name, google_api_key=self.api_key)
+        self.cache = cache or llm_cache_from_config(get_section("llm").get("cache") or {})
         logger.info(f"Gemini LLM initialized with model '{model_name}'")
 
+    def _messages(self, prompt: str, system_prompt: str | None = None) -> list[MessageType]:
+        from langchain.messages import HumanMessage, SystemMessage
+
+        messages: list [MessageType] = []
+        if system_prompt:
+            messages.append(SystemMessage(content=system_prompt))
+        messages.append(HumanMessage(prompt))
+        return messages
+
+    @staticmethod
+    def _text(content: Any) -> str:
+        # Gemini may return a list of content parts instead of a plain string.
+        if isinstance(content, str):
+            return content
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+    def _cached(self, prompt: str, system_prompt: str | None) -> Tuple[Optional[str], Optional[str]]:
+        if self.cache is None:
+            return None, None
+        key = cache_key(self.model_name, system_prompt, prompt)
+        return key, self.cache.get(key)
+
+    def _store(self, key: Optional[str], text: str):
+        # Error strings are returned, not raised, below; they are never cached.
+        if self.cache is not None and key is not None and text:
+            self.cache.put(key, text)
+
     def generate_text(self, prompt: str, system_prompt: str| None =  None) -> str | Any:
         """
         Sends a prompt to the Gemini model and returns its response.
+        Identical (model, system prompt, prompt) calls are answered from the response cache.
         """
+        key, cached = self._cached(prompt, system_prompt)
+        if cached is not None:
+            logger.info("Gemini response served from cache.")
+            return cached
+
         try:
-            messages: list [MessageType] = []
-            if system_prompt:
-                messages.append(SystemMessage(content=system_prompt))
-            messages.append(HumanMessage(prompt))
+            response = self.llm.invoke(self._messages(prompt, system_prompt))
+            text = self._text(response.content)
+            self._store(key, text)
+            return text
 
-            response = self.llm.invoke(messages)
-            return response.content
+        except Exception as e:
+            logger.error(f"Gemini API error: {str(e)}")
+            return "⚠️ Error generating response from Gemini."
+
+    async def agenerate_text(self, prompt: str, system_prompt: str | None = None) -> str | Any:
+        """
+        Async variant of `generate_text`: awaits the Gemini call without blocking the event loop.
+        """
+        key, cached = self._cached(prompt, system_prompt)
+        if cached is not None:
+            logger.info("Gemini response served from cache.")
+            return cached
+
+        try:
+            response = await self.llm.ainvoke(self._messages(prompt, system_prompt))
+            text = self._text(response.content)
+            self._store(key, text)
+            return text
 
         except Exception as e:
             logger.error(f"Gemini API error: {str(e)}")
             return "⚠️ Error generating response from Gemini."
 
+    async def astream_text(self, prompt: str, system_prompt: str | None = None) -> AsyncIterator[str]:
+        """
+        Streams the response as text deltas while Gemini generates it. A cached
+        response is yielded in one piece; a completed stream is cached.
+        """
+        key, cached = self._cached(prompt, system_prompt)
+        if cached is not None:
+            logger.info("Gemini response served from cache.")
+            yield cached
+            return
+
+        try:
+            parts = []
+            async for chunk in self.llm.astream(self._messages(prompt, system_prompt)):
+                text = self._text(chunk.content)
+                if text:
+                    parts.append(text)
+                    yield text
+            self._store(key, "".join(parts))
+
+        except Exception as e:
+            logger.error(f"Gemini API error while streaming: {str(e)}")
+            yield "⚠️ Error generating response from Gemini."
+
 # if __name__ == "__main__":
 
 #     llm = GeminiLLM()
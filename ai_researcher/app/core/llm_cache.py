@@ -0,0 +1,285 @@
+# app/core/llm_cache.py
+
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+LLM_CACHE_PATH = "./app/data/llm_cache/responses.db"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 10_000
+
+# Set per request (e.g. by the API's bypass header); cached answers are neither read nor written while set.
+_bypass = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def cache_bypassed(bypass: bool = True) -> Iterator[None]:
+    token = _bypass.set(bypass)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def bypass_requested() -> bool:
+    """
+    True while the current request asked to skip caches (see `cache_bypassed`).
+    """
+    return _bypass.get()
+
+
+def cache_key(model_name: str, system_prompt: Optional[str], prompt: str) -> str:
+    payload = json.dumps([model_name, system_prompt, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """
+    LRU OrderedDict of (value, expires_at); expired entries are dropped when read.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def close(self):
+        pass
+
+
+class DiskBackend:
+    """
+    SQLite table of responses that survives restarts. Past `max_entries`, expired
+    rows go first, then the least recently used.
+    """
+
+    name = "disk"
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.evictions = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used);
+            """
+        )
+        self.conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: float):
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            excess = self._count() - self.max_entries
+            if excess > 0:
+                self.conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+                excess = self._count() - self.max_entries
+            if excess > 0:
+                self.conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+            self.conn.commit()
+
+    def _count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def size(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class RedisBackend:
+    """
+    Shared cache for several API workers. Entries expire through Redis TTLs; a
+    sorted set of last-use times bounds the number of keys under `prefix`.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, max_entries: int = DEFAULT_MAX_ENTRIES, prefix: str = "ai_researcher:llm:"):
+        try:
+            import redis  #type: ignore
+        except ImportError as e:
+            raise ImportError("The redis LLM cache backend needs the `redis` package: pip install redis") from e
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.lru_key = prefix + "lru"
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            self.client.zrem(self.lru_key, key)
+            return None
+        self.client.zadd(self.lru_key, {key: time.time()})
+        return value
+
+    def set(self, key: str, value: str, ttl: float):
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, value, ex=max(1, int(ttl)))
+        pipe.zadd(self.lru_key, {key: time.time()})
+        pipe.execute()
+
+        excess = self.client.zcard(self.lru_key) - self.max_entries
+        if excess > 0:
+            oldest = [k for k, _ in self.client.zpopmin(self.lru_key, excess)]
+            if oldest:
+                self.client.delete(*(self.prefix + k for k in oldest))
+                self.evictions += len(oldest)
+
+    def size(self) -> int:
+        return self.client.zcard(self.lru_key)
+
+    def close(self):
+        self.client.close()
+
+
+class LLMCache:
+    """
+    Response cache for deterministic prompts, keyed by sha256(model_name, system_prompt, prompt).
+    Storage is pluggable (memory, disk or Redis); every entry lives for `ttl_seconds`.
+    """
+
+    def __init__(self, backend, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.errors = 0
+
+    def get(self, key: str) -> Optional[str]:
+        if bypass_requested():
+            self.bypassed += 1
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            # A broken cache must never break generation; treat it as a miss.
+            self.errors += 1
+            logger.warning(f"LLM cache read failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: str):
+        if bypass_requested():
+            return
+        try:
+            self.backend.set(key, value, self.ttl_seconds)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "entries": self.backend.size(),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "bypassed": self.bypassed,
+            "evictions": self.backend.evictions,
+            "errors": self.errors,
+        }
+
+    def close(self):
+        self.backend.close()
+
+
+def llm_cache_from_config(config: Dict[str, Any]) -> Optional[LLMCache]:
+    """
+    Builds the cache described by config.yaml `llm.cache`, or None when disabled.
+    """
+    if not config.get("enabled", True):
+        return None
+
+    backend_name = config.get("backend", "memory")
+    max_entries = config.get("max_entries", DEFAULT_MAX_ENTRIES)
+    if backend_name == "memory":
+        backend = MemoryBackend(max_entries)
+    elif backend_name == "disk":
+        backend = DiskBackend(config.get("path", LLM_CACHE_PATH), max_entries)
+    elif backend_name == "redis":
+        backend = RedisBackend(config.get("redis_url", "redis://localhost:6379/0"), max_entries)
+    else:
+        raise ValueError(f"Unknown LLM cache backend '{backend_name}'. Expected 'memory', 'disk' or 'redis'.")
+
+    logger.info(f"LLM response cache enabled (backend={backend_name}, max_entries={max_entries}).")
+    return LLMCache(backend, ttl_seconds=config.get("ttl_seconds", DEFAULT_TTL_SECONDS))
@@ -0,0 +1,286 @@
+# app/core/metadata_store.py
+
+import hashlib
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# SQLite caps the number of bound parameters per statement; stay well below it.
+MAX_SQL_VARIABLES = 900
+
+
+def chunk_text(metadata: Dict[str, Any]) -> str:
+    """
+    Chunk text from either metadata layout: arXiv/ingest rows nest it under
+    `chunk.text`, rows from `add_papers` keep it in `content`.
+    """
+    return (metadata.get("chunk") or {}).get("text") or metadata.get("content", "")
+
+
+def content_hash(text: str) -> str:
+    """
+    Hash of a chunk's text with whitespace normalised, so re-cleaned copies of the same chunk match.
+    """
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+class MetadataStore:
+    """
+    Disk-backed chunk metadata keyed by FAISS id.
+
+    Rows live in SQLite, so opening a store costs nothing no matter how large the
+    corpus is, searches only read the handful of rows they return, and every
+    write is a small incremental transaction instead of a full JSON rewrite.
+
+    Each row also records its paper url and a hash of its chunk text (both
+    indexed), so ingestion can skip papers and chunks that are already stored
+    before spending any compute on them.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                title TEXT,
+                url TEXT,
+                data TEXT NOT NULL,
+                content_hash TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_title ON chunks(title);
+            CREATE INDEX IF NOT EXISTS idx_chunks_url ON chunks(url);
+            CREATE TABLE IF NOT EXISTS tombstones (
+                id INTEGER PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS counters (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            """
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(chunks)")}
+        if "content_hash" not in columns:
+            # Stores from before content hashing; `backfill_hashes` fills the column in.
+            self.conn.execute("ALTER TABLE chunks ADD COLUMN content_hash TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_content_hash ON chunks(content_hash)")
+        self.conn.commit()
+
+    def add_many(self, ids: Sequence[int], metadatas: Sequence[Dict[str, Any]]):
+        """
+        Inserts (or overwrites) one row per id in a single transaction and raises
+        the id high-water mark, so ids stay used even after compaction purges them.
+        """
+        rows = [
+            (
+                int(i),
+                meta.get("title"),
+                meta.get("url"),
+                json.dumps(meta, ensure_ascii=False),
+                content_hash(chunk_text(meta)),
+            )
+            for i, meta in zip(ids, metadatas)
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, title, url, data, content_hash) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            if rows:
+                self.conn.execute(
+                    "INSERT INTO counters (key, value) VALUES ('high_water', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+                    (max(row[0] for row in rows),),
+                )
+
+    def get_many(self, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Fetches metadata for the given FAISS ids. Missing ids are simply absent from the result.
+        """
+        ids = [int(i) for i in ids]
+        found: Dict[int, Dict[str, Any]] = {}
+        with self._lock:
+            for start in range(0, len(ids), MAX_SQL_VARIABLES):
+                batch = ids[start:start + MAX_SQL_VARIABLES]
+                placeholders = ",".join("?" * len(batch))
+                cursor = self.conn.execute(
+                    f"SELECT id, data FROM chunks WHERE id IN ({placeholders})", batch
+                )
+                for row_id, data in cursor:
+                    found[row_id] = json.loads(data)
+        return found
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def max_id(self) -> int:
+        """
+        Highest id ever used by a chunk (including purged ones) or tombstone, or -1 for an empty store.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT MAX(m) FROM (SELECT MAX(id) AS m FROM chunks UNION ALL SELECT MAX(id) FROM tombstones "
+                "UNION ALL SELECT value FROM counters WHERE key = 'high_water')"
+            ).fetchone()
+        return row[0] if row[0] is not None else -1
+
+    def ids_for(self, title: Optional[str] = None, url: Optional[str] = None) -> List[int]:
+        """
+        Ids of every live (not yet deleted) chunk of a paper, looked up through the title/url indexes.
+        """
+        if title is None and url is None:
+            raise ValueError("Either title or url is required.")
+
+        clauses, params = [], []
+        if title is not None:
+            clauses.append("title = ?")
+            params.append(title)
+        if url is not None:
+            clauses.append("url = ?")
+            params.append(url)
+
+        with self._lock:
+            cursor = self.conn.execute(
+                f"SELECT id FROM chunks WHERE {' AND '.join(clauses)} "
+                "AND id NOT IN (SELECT id FROM tombstones)",
+                params,
+            )
+            return [row[0] for row in cursor]
+
+    def _live_matches(self, column: str, values: Iterable[str]) -> Set[str]:
+        values = [v for v in set(values) if v]
+        found: Set[str] = set()
+        with self._lock:
+            for start in range(0, len(values), MAX_SQL_VARIABLES):
+                batch = values[start:start + MAX_SQL_VARIABLES]
+                placeholders = ",".join("?" * len(batch))
+                cursor = self.conn.execute(
+                    f"SELECT DISTINCT {column} FROM chunks WHERE {column} IN ({placeholders}) "
+                    "AND id NOT IN (SELECT id FROM tombstones)",
+                    batch,
+                )
+                found.update(row[0] for row in cursor)
+        return found
+
+    def indexed_urls(self, urls: Iterable[str]) -> Set[str]:
+        """
+        The given paper urls that already have live chunks.
+        """
+        return self._live_matches("url", urls)
+
+    def indexed_hashes(self, hashes: Iterable[str]) -> Set[str]:
+        """
+        The given chunk content hashes that already belong to a live chunk.
+        """
+        return self._live_matches("content_hash", hashes)
+
+    def backfill_hashes(self, batch_size: int = 1000) -> int:
+        """
+        Computes content hashes for rows written before the column existed.
+        """
+        filled = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT id, data FROM chunks WHERE content_hash IS NULL LIMIT ?", (batch_size,)
+                ).fetchall()
+                if not rows:
+                    return filled
+                with self.conn:
+                    self.conn.executemany(
+                        "UPDATE chunks SET content_hash = ? WHERE id = ?",
+                        [(content_hash(chunk_text(json.loads(data))), row_id) for row_id, data in rows],
+                    )
+            filled += len(rows)
+
+    def duplicate_ids(self) -> List[int]:
+        """
+        Live chunks whose content matches a live chunk with a lower id (the copy that is kept).
+        """
+        with self._lock:
+            cursor = self.conn.execute(
+                """
+                SELECT c.id FROM chunks c
+                WHERE c.content_hash IS NOT NULL
+                AND c.id NOT IN (SELECT id FROM tombstones)
+                AND EXISTS (
+                    SELECT 1 FROM chunks d
+                    WHERE d.content_hash = c.content_hash AND d.id < c.id
+                    AND d.id NOT IN (SELECT id FROM tombstones)
+                )
+                ORDER BY c.id
+                """
+            )
+            return [row[0] for row in cursor]
+
+    def add_tombstones(self, ids: Iterable[int]):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tombstones (id) VALUES (?)", [(int(i),) for i in ids]
+            )
+
+    def tombstones(self) -> Set[int]:
+        with self._lock:
+            return {row[0] for row in self.conn.execute("SELECT id FROM tombstones")}
+
+    def purge(self, ids: Iterable[int]):
+        """
+        Permanently drops chunks and their tombstones once compaction has removed them from the index.
+        """
+        rows = [(int(i),) for i in ids]
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM chunks WHERE id = ?", rows)
+            self.conn.executemany("DELETE FROM tombstones WHERE id = ?", rows)
+
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM chunks")
+            self.conn.execute("DELETE FROM tombstones")
+            self.conn.execute("DELETE FROM counters")
+
+    def iter_batches(
+        self, batch_size: int = 1000, after_id: int = -1
+    ) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        """
+        Walks every live chunk (with an id above `after_id`) in id order,
+        `batch_size` rows at a time, without loading the whole table.
+        """
+        last_id = after_id
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT id, data FROM chunks WHERE id > ? AND id NOT IN (SELECT id FROM tombstones) "
+                    "ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            yield [(row_id, json.loads(data)) for row_id, data in rows]
+            last_id = rows[-1][0]
+
+    def import_json(self, json_path: str, batch_size: int = 1000) -> int:
+        """
+        One-off migration from the legacy metadata.json list, where a row's
+        position in the list is its FAISS id.
+        """
+        with open(json_path, "r", encoding="utf-8") as f:
+            metadata: List[Dict[str, Any]] = json.load(f)
+
+        for start in range(0, len(metadata), batch_size):
+            batch = metadata[start:start + batch_size]
+            self.add_many(range(start, start + len(batch)), batch)
+
+        logger.info(f"Imported {len(metadata)} metadata rows from '{json_path}'.")
+        return len(metadata)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
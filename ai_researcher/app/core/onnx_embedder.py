@@ -0,0 +1,142 @@
+# app/core/onnx_embedder.py
+
+import argparse
+import os
+from typing import List, Optional
+
+import numpy as np
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ONNX_MODEL_DIR = "./app/data/models/all-MiniLM-L6-v2-onnx-int8"
+ONNX_MODEL_FILE = "model.int8.onnx"
+# all-MiniLM-L6-v2 is served with max_seq_length=256 by SentenceTransformer; match it for parity.
+MAX_SEQ_LENGTH = 256
+
+
+class OnnxEmbedder:
+    """
+    CPU embedding backend running an int8-quantized transformer export through
+    ONNX Runtime. Mirrors the SentenceTransformer pipeline of all-MiniLM-L6-v2
+    (mean pooling over the attention mask, then L2 normalisation) and exposes the
+    same `encode` / `get_sentence_embedding_dimension` surface, so it can stand in
+    for the torch model without importing torch at all.
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, intra_op_threads: Optional[int] = None):
+        try:
+            import onnxruntime as ort  #type: ignore
+            from tokenizers import Tokenizer  #type: ignore
+        except ImportError as e:
+            raise ImportError(
+                f"embedding_model.backend 'onnx' needs the `{e.name}` package: "
+                "pip install 'ai-researcher[onnx]' (or set backend: torch)"
+            ) from e
+
+        model_path = os.path.join(model_dir, ONNX_MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"No ONNX model at '{model_path}'. Export one with: python -m app.core.onnx_embedder --out {model_dir}"
+            )
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dim = self.session.get_outputs()[0].shape[-1]
+        logger.info(f"ONNX embedding model loaded from '{model_path}' (dim={self.dim}).")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, batch_size: int = 32) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+            token_embeddings = self.session.run(None, feeds)[0]
+            outputs.append(mean_pool_normalize(token_embeddings, attention_mask))
+
+        return np.vstack(outputs)
+
+
+def mean_pool_normalize(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def export_quantized(model_name: str, out_dir: str) -> str:
+    """
+    Exports a Hugging Face encoder to ONNX and applies dynamic int8 weight quantization.
+    Needs torch and transformers at export time only; serving needs just onnxruntime + tokenizers.
+    """
+    import torch  #type: ignore
+    from onnxruntime.quantization import QuantType, quantize_dynamic  #type: ignore
+    from transformers import AutoModel, AutoTokenizer  #type: ignore
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(out_dir)
+
+    class Encoder(torch.nn.Module):
+        # Pins the argument order and output of the export; transformers' own forward takes many more kwargs.
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.inner(
+                input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+            ).last_hidden_state
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    fp32_path = os.path.join(out_dir, "model.fp32.onnx")
+    torch.onnx.export(
+        Encoder(model),
+        (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+        fp32_path,
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "token_type_ids": {0: "batch", 1: "sequence"},
+            "last_hidden_state": {0: "batch", 1: "sequence"},
+        },
+        opset_version=17,
+        dynamo=False,
+    )
+
+    int8_path = os.path.join(out_dir, ONNX_MODEL_FILE)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    logger.info(f"Exported int8 ONNX model for '{model_name}' to '{int8_path}'.")
+    return int8_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export an int8-quantized ONNX embedding model.")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--out", default=ONNX_MODEL_DIR)
+    args = parser.parse_args()
+    export_quantized(args.model, args.out)
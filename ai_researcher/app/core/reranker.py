@@ -0,0 +1,135 @@
+# app/core/reranker.py
+
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from app.core.metadata_store import chunk_text
+from app.utils.logger import get_logger
+from app.utils.metrics import LATENCY_MS_BUCKETS, Histogram
+
+logger = get_logger(__name__)
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+DEFAULT_CANDIDATES = 30
+DEFAULT_BUDGET_MS = 150.0
+DEFAULT_MAX_LENGTH = 256
+
+
+class CrossEncoderReranker:
+    """
+    Re-orders retrieved chunks by a cross-encoder's (query, chunk) relevance score.
+
+    All candidates of a request go through the model in one batched forward
+    pass on the reranker's own thread. The caller waits at most `budget_ms`
+    (queueing behind other requests included); past that it keeps the vector
+    order, so re-ranking can only improve a response, never stall it.
+    `model` swaps in any object with a CrossEncoder-style `predict` (e.g. a fake in tests).
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_RERANK_MODEL,
+        budget_ms: float = DEFAULT_BUDGET_MS,
+        max_length: int = DEFAULT_MAX_LENGTH,
+        model: Optional[Any] = None,
+    ):
+        if model is None:
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(model_name, max_length=max_length)
+        self.model = model
+        self.model_name = model_name
+        self.budget_ms = budget_ms
+        # One forward pass at a time: a second concurrent batch would only slow both down.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+        self.latency_ms = Histogram(LATENCY_MS_BUCKETS)
+        self.reranked = 0
+        self.timed_out = 0
+        self.failed = 0
+        logger.info(f"Cross-encoder reranker ready: {model_name} (budget {budget_ms} ms).")
+
+    def _score(self, query: str, results: List[Dict[str, Any]]) -> np.ndarray:
+        start = time.perf_counter()
+        pairs = [(query, chunk_text(r.get("metadata", {}))) for r in results]
+        scores = np.asarray(self.model.predict(pairs, batch_size=len(pairs)), dtype=np.float32).reshape(-1)
+        self.latency_ms.observe((time.perf_counter() - start) * 1000)
+        return scores
+
+    def _submit(self, query: str, results: List[Dict[str, Any]]) -> Future:
+        return self._executor.submit(self._score, query, results)
+
+    def _apply(
+        self, results: List[Dict[str, Any]], top_n: Optional[int], scores: Optional[np.ndarray], elapsed_ms: float
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        keep = top_n or len(results)
+        info = {"candidates": len(results), "ms": round(elapsed_ms, 2), "reranked": scores is not None}
+        if scores is None:
+            return results[:keep], info
+        self.reranked += 1
+        order = np.argsort(-scores, kind="stable")[:keep]
+        return [{**results[i], "rerank_score": round(float(scores[i]), 4)} for i in order], info
+
+    def rerank(
+        self, query: str, results: List[Dict[str, Any]], top_n: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Returns the best `top_n` results (all when None) and what happened:
+        {"candidates", "ms", "reranked"} — `reranked` is False on a budget or model miss.
+        """
+        if len(results) < 2:
+            return self._apply(results, top_n, None, 0.0)
+        start = time.perf_counter()
+        future = self._submit(query, results)
+        try:
+            scores = future.result(timeout=self.budget_ms / 1000)
+        except FutureTimeoutError:
+            scores = self._on_timeout(future)
+        except Exception as e:
+            scores = self._on_error(e)
+        return self._apply(results, top_n, scores, (time.perf_counter() - start) * 1000)
+
+    async def arerank(
+        self, query: str, results: List[Dict[str, Any]], top_n: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Async `rerank`: the event loop is free while the forward pass runs.
+        """
+        if len(results) < 2:
+            return self._apply(results, top_n, None, 0.0)
+        start = time.perf_counter()
+        future = self._submit(query, results)
+        try:
+            scores = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.budget_ms / 1000)
+        except asyncio.TimeoutError:
+            scores = self._on_timeout(future)
+        except Exception as e:
+            scores = self._on_error(e)
+        return self._apply(results, top_n, scores, (time.perf_counter() - start) * 1000)
+
+    def _on_timeout(self, future: Future) -> None:
+        # A batch still queued is dropped; one already running finishes and is discarded.
+        future.cancel()
+        self.timed_out += 1
+        logger.warning(f"Re-ranking exceeded its {self.budget_ms} ms budget; keeping vector order.")
+        return None
+
+    def _on_error(self, error: Exception) -> None:
+        self.failed += 1
+        logger.error(f"Re-ranking failed ({error}); keeping vector order.")
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "budget_ms": self.budget_ms,
+            "reranked": self.reranked,
+            "timed_out": self.timed_out,
+            "failed": self.failed,
+            "latency_ms": self.latency_ms.snapshot(),
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,217 @@
+# app/core/semantic_cache.py
+
+import copy
+import functools
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss  #type: ignore
+import numpy as np
+from app.core.sparse_index import tokenize
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SIMILARITY = 0.92
+DEFAULT_MAX_ENTRIES = 2_000
+DEFAULT_TTL_SECONDS = 24 * 3600
+# Candidates checked per lookup; only entries asked with the same search parameters can match.
+LOOKUP_CANDIDATES = 8
+
+
+class SemanticCache:
+    """
+    Answer cache for paraphrased questions. Past queries are kept as normalised
+    embeddings in a small exact inner-product FAISS index; a new query whose
+    cosine similarity to a cached one is at least `similarity` (and that used the
+    same threshold/top_k) gets the stored answer without retrieval or an LLM call.
+
+    Entries expire after `ttl_seconds`, the least recently used are evicted past
+    `max_entries`, and `invalidate_similar` (registered on a store by `watch`)
+    drops answers that newly indexed chunks would have changed.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        similarity: float = DEFAULT_SIMILARITY,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ):
+        self.dim = dim
+        self.similarity = similarity
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        self.entries: Dict[int, Dict[str, Any]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.array(vectors, dtype=np.float32, order="C", copy=True).reshape(-1, vectors.shape[-1])
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def watch(self, store: Any):
+        """
+        Keeps the cache in step with a vector store: its new chunks invalidate the
+        answers they would appear in (scored in the store's metric, keyword matches
+        counted when it is hybrid) and any deletion clears the cache.
+        """
+        store.add_listener(
+            "add",
+            functools.partial(
+                self.invalidate_similar,
+                metric=store.metric,
+                min_term_match=store.min_term_match if store.hybrid else None,
+            ),
+        )
+        store.add_listener("delete", self.clear)
+
+    def lookup(self, query_vector: np.ndarray, params: Tuple) -> Optional[Dict[str, Any]]:
+        """
+        Returns a copy of the cached response for the closest past query asked with
+        the same `params`, or None.
+        """
+        query_vector = self._normalize(query_vector)
+        now = time.time()
+        with self._lock:
+            if self.index.ntotal == 0:
+                self.misses += 1
+                return None
+
+            scores, ids = self.index.search(query_vector, min(LOOKUP_CANDIDATES, self.index.ntotal))
+            expired = []
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id < 0 or score < self.similarity:
+                    break
+                entry = self.entries[int(entry_id)]
+                if entry["expires_at"] <= now:
+                    expired.append(int(entry_id))
+                    continue
+                if entry["params"] != params:
+                    continue
+                entry["last_used"] = now
+                self.hits += 1
+                self._remove(expired)
+                logger.info(f"Semantic cache hit ({score:.3f}) for cached query '{entry['query']}'.")
+                return copy.deepcopy(entry["response"])
+
+            self._remove(expired)
+            self.misses += 1
+            return None
+
+    def put(self, query: str, query_vector: np.ndarray, params: Tuple, response: Dict[str, Any]):
+        raw_vector = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        query_vector = self._normalize(query_vector)
+        now = time.time()
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self.index.add_with_ids(query_vector, np.array([entry_id], dtype=np.int64))  # type: ignore
+            self.entries[entry_id] = {
+                "query": query,
+                "params": params,
+                # The search threshold, the un-normalised query vector and the query terms
+                # decide which new chunks would have changed this answer.
+                "threshold": params[0],
+                "vector": raw_vector,
+                "terms": set(tokenize(query)),
+                "response": copy.deepcopy(response),
+                "expires_at": now + self.ttl_seconds,
+                "last_used": now,
+            }
+
+            excess = len(self.entries) - self.max_entries
+            if excess > 0:
+                oldest = sorted(self.entries, key=lambda i: self.entries[i]["last_used"])[:excess]
+                self._remove(oldest)
+                self.evictions += len(oldest)
+
+    def invalidate_similar(
+        self,
+        chunk_vectors: np.ndarray,
+        texts: Optional[List[str]] = None,
+        metric: str = "cosine",
+        min_term_match: Optional[float] = None,
+    ) -> int:
+        """
+        Drops every cached answer a new chunk would now appear in: the chunk's
+        similarity to the query reaches the entry's search threshold, measured in
+        the store's own scale (cosine, or 1 / (1 + d) for L2), or, with
+        `min_term_match` set (hybrid stores), its text holds enough of the query's
+        terms to come back as a keyword hit. Called after chunks are added.
+        """
+        with self._lock:
+            if not self.entries or len(chunk_vectors) == 0:
+                return 0
+            entry_ids = list(self.entries)
+            queries = np.vstack([self.entries[i]["vector"] for i in entry_ids])
+            thresholds = np.array([self.entries[i]["threshold"] for i in entry_ids], dtype=np.float32)
+
+            similarities = self._store_similarities(queries, chunk_vectors, metric)
+            stale_rows = (similarities >= thresholds[:, None]).any(axis=1)
+            if min_term_match is not None and texts:
+                chunk_terms = [set(tokenize(text)) for text in texts]
+                for row, entry_id in enumerate(entry_ids):
+                    terms = self.entries[entry_id]["terms"]
+                    if stale_rows[row] or not terms:
+                        continue
+                    # BM25 only returns chunks sharing at least one term, then the term-match floor applies.
+                    matched = max(len(terms & chunk) for chunk in chunk_terms) / len(terms)
+                    stale_rows[row] = matched > 0 and matched >= min_term_match
+
+            stale = [entry_ids[row] for row in np.flatnonzero(stale_rows)]
+            self._remove(stale)
+            self.invalidations += len(stale)
+
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached answers after {len(chunk_vectors)} new chunks.")
+        return len(stale)
+
+    def _store_similarities(self, queries: np.ndarray, chunk_vectors: np.ndarray, metric: str) -> np.ndarray:
+        """
+        (queries × chunks) similarities as the vector store reports them for its metric.
+        """
+        if metric == "cosine":
+            return self._normalize(queries) @ self._normalize(chunk_vectors).T
+        chunk_vectors = np.asarray(chunk_vectors, dtype=np.float32).reshape(-1, self.dim)
+        distances = (
+            (queries ** 2).sum(axis=1)[:, None]
+            + (chunk_vectors ** 2).sum(axis=1)[None, :]
+            - 2.0 * queries @ chunk_vectors.T
+        )
+        return 1.0 / (1.0 + np.maximum(distances, 0.0))
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self.entries)
+            self.index.reset()
+            self.entries.clear()
+
+    def _remove(self, entry_ids):
+        if not entry_ids:
+            return
+        self.index.remove_ids(np.asarray(entry_ids, dtype=np.int64))
+        for entry_id in entry_ids:
+            self.entries.pop(entry_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "similarity": self.similarity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
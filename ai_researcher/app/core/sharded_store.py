@@ -0,0 +1,367 @@
+# app/core/sharded_store.py
+
+import hashlib
+import heapq
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import faiss  #type: ignore
+from app.core.config_loader import get_section, merge_config
+from app.core.metadata_store import chunk_text
+from app.core.vector_store import (
+    DEFAULT_HYBRID_CANDIDATES,
+    DEFAULT_MAX_RANGE_RESULTS,
+    DEFAULT_MIN_TERM_MATCH,
+    DEFAULT_RRF_K,
+)
+from app.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from app.core.embedding_service import EmbeddingService
+    from app.core.vector_store import VectorStore
+
+# A ranked candidate: ((shard, id), hit), so ids from different shards never collide.
+Ranked = List[Tuple[Tuple[int, int], Dict[str, Any]]]
+
+logger = get_logger(__name__)
+
+SHARDS_DIR = "./app/data/shards"
+
+# Per-process shard, opened once by the pool initializer.
+_worker_store: Optional["VectorStore"] = None
+
+
+class _NoEmbedding:
+    """
+    Shard workers never load a model: the coordinator embeds chunks and queries once
+    and sends the vectors.
+    """
+
+    def get_embeddings(self, texts):
+        raise RuntimeError("Shard workers take precomputed embeddings.")
+
+    def embed_query(self, query):
+        raise RuntimeError("Shard workers take precomputed query vectors.")
+
+    def close(self):
+        pass
+
+
+def _init_worker(directory: str, embedding_dim: int, config: Dict[str, Any]):
+    global _worker_store
+    from app.core.vector_store import VectorStore
+    _worker_store = VectorStore(
+        embedding_dem=embedding_dim, embedding_service=_NoEmbedding(), directory=directory, config=config  #type: ignore
+    )
+
+
+def _call(method: str, *args, **kwargs) -> Any:
+    return getattr(_worker_store, method)(*args, **kwargs)
+
+
+def _vector_count() -> int:
+    return int(_worker_store.index.ntotal) - len(_worker_store.tombstones)  #type: ignore
+
+
+def _term_stats(query: str) -> Optional[Dict[str, Any]]:
+    sparse_index = _worker_store.sparse_index  #type: ignore
+    return sparse_index.term_stats(query) if sparse_index is not None else None
+
+
+def _filter_new(texts: List[str], metadatas: List[Dict], seen: Dict[str, Set[str]], by_url: bool) -> Tuple[List[str], List[Dict], int, Dict[str, Set[str]]]:
+    # `seen` is updated in the worker, so it travels back with the result.
+    texts, metadatas, skipped = _worker_store.filter_new(texts, metadatas, seen, by_url)  #type: ignore
+    return texts, metadatas, skipped, seen
+
+
+def paper_id(metadata: Dict[str, Any]) -> str:
+    """
+    A chunk's paper: its url, or its title for papers without one.
+    """
+    return metadata.get("url") or metadata.get("title", "")
+
+
+def shard_of(paper: str, shards: int) -> int:
+    """
+    Shard holding every chunk of `paper`. A fixed hash (not Python's salted `hash`)
+    so placement is the same in every process and across restarts.
+    """
+    digest = hashlib.blake2b(paper.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+class ShardedVectorStore:
+    """
+    The index split into `shards` VectorStores, one per local worker process, each
+    in its own directory under `root` (shard-0, shard-1, ...). Papers are placed by
+    `shard_of(paper_id)`, so all chunks of a paper, and its url dedupe, live on one
+    shard.
+
+    Queries are embedded once here, fanned out to every shard in parallel, and the
+    per-shard best-first lists are merged with a heap into the global top k. With
+    hybrid retrieval on, shards first report their BM25 statistics for the query
+    terms, then score keyword hits with the summed statistics and return their
+    unfused vector and keyword candidates; both lists are heap-merged here and
+    fused once, so results match one index over the whole corpus.
+
+    Exposes the parts of the VectorStore interface that ingestion, search and the
+    semantic cache use.
+    """
+
+    def __init__(
+        self,
+        shards: int,
+        embedding_dem: int = 384,
+        embedding_service: Optional["EmbeddingService"] = None,
+        root: str = SHARDS_DIR,
+        config: Optional[Dict[str, Any]] = None,
+    ):
+        if shards < 1:
+            raise ValueError(f"A sharded store needs at least one shard, got {shards}.")
+        self.shards = shards
+        self.embedding_dim = embedding_dem
+        self.root = root
+        config = merge_config(get_section("vector_db"), config or {})
+        config.pop("shards", None)
+        self.metric = config.get("metric", "cosine")
+        hybrid = config.get("hybrid") or {}
+        self.hybrid = hybrid.get("enabled", True)
+        self.rrf_k = hybrid.get("rrf_k", DEFAULT_RRF_K)
+        self.hybrid_candidates = hybrid.get("candidates", DEFAULT_HYBRID_CANDIDATES)
+        self.min_term_match = hybrid.get("min_term_match", DEFAULT_MIN_TERM_MATCH)
+        self.max_range_results = config.get("max_range_results", DEFAULT_MAX_RANGE_RESULTS)
+        self._listeners: Dict[str, List[Callable[..., None]]] = {"add": [], "delete": []}
+
+        if embedding_service is None:
+            from app.core.embedding_service import EmbeddingService
+            embedding_service = EmbeddingService(model_name="all-MiniLM-L6-v2")
+        self.embedding_service = embedding_service
+
+        # spawn, not fork: FAISS and torch thread pools do not survive a fork.
+        context = multiprocessing.get_context("spawn")
+        self._executors = [
+            ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(os.path.join(root, f"shard-{i}"), embedding_dem, config),
+            )
+            for i in range(shards)
+        ]
+        self._lock = threading.Lock()
+        # Waits for every worker, so a shard that fails to open fails here rather than on the first query.
+        sizes = self.shard_sizes()
+        logger.info(f"🧩 Opened {shards} index shards under {root} ({sum(sizes)} vectors: {sizes}).")
+
+    def _scatter(self, fn: Callable[..., Any], *args, **kwargs) -> List[Any]:
+        """
+        Runs `fn` on every shard at once and returns the results in shard order.
+        """
+        futures = [executor.submit(fn, *args, **kwargs) for executor in self._executors]
+        return [future.result() for future in futures]
+
+    def _submit(self, shard: int, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        return self._executors[shard].submit(fn, *args, **kwargs)
+
+    def _group_by_shard(self, metadatas: List[Dict]) -> Dict[int, List[int]]:
+        groups: Dict[int, List[int]] = {}
+        for row, metadata in enumerate(metadatas):
+            groups.setdefault(shard_of(paper_id(metadata), self.shards), []).append(row)
+        return groups
+
+    def shard_sizes(self) -> List[int]:
+        return self._scatter(_vector_count)
+
+    def _prepare_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.array(vectors, dtype=np.float32, order="C", copy=True)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if self.metric == "cosine":
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    def add_chunks(self, metadatas: List[Dict], embeddings: np.ndarray) -> int:
+        """
+        Sends each chunk to its paper's shard; shards add their batches in parallel.
+        """
+        if not metadatas:
+            return 0
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.shape[0] != len(metadatas):
+            raise ValueError(
+                f"Got {embeddings.shape[0]} embeddings for {len(metadatas)} metadata entries."
+            )
+
+        futures = [
+            self._submit(shard, _call, "add_chunks", [metadatas[row] for row in rows], embeddings[rows])
+            for shard, rows in self._group_by_shard(metadatas).items()
+        ]
+        added = sum(future.result() for future in futures)
+        self._notify("add", self._prepare_vectors(embeddings), [chunk_text(meta) for meta in metadatas])
+        return added
+
+    def add_listener(self, event: str, callback: Callable[..., None]):
+        self._listeners[event].append(callback)
+
+    def _notify(self, event: str, *args):
+        for callback in self._listeners[event]:
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"ShardedVectorStore '{event}' listener failed: {e}")
+
+    def filter_new(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        seen: Optional[Dict[str, Set[str]]] = None,
+        by_url: bool = True,
+    ) -> Tuple[List[str], List[Dict], int]:
+        """
+        `VectorStore.filter_new` on each chunk's shard. Kept chunks come back grouped
+        by shard. Identical text in papers placed on different shards is not detected.
+        """
+        if seen is None:
+            seen = {"urls": set(), "hashes": set()}
+        futures = [
+            self._submit(shard, _filter_new, [texts[row] for row in rows], [metadatas[row] for row in rows], seen, by_url)
+            for shard, rows in self._group_by_shard(metadatas).items()
+        ]
+        kept_texts: List[str] = []
+        kept_metadatas: List[Dict] = []
+        skipped = 0
+        for future in futures:
+            shard_texts, shard_metadatas, shard_skipped, shard_seen = future.result()
+            kept_texts.extend(shard_texts)
+            kept_metadatas.extend(shard_metadatas)
+            skipped += shard_skipped
+            seen["urls"] |= shard_seen["urls"]
+            seen["hashes"] |= shard_seen["hashes"]
+        return kept_texts, kept_metadatas, skipped
+
+    def _use_hybrid(self, hybrid: Optional[bool]) -> bool:
+        return self.hybrid and (True if hybrid is None else hybrid)
+
+    def _vector_key(self, hit: Dict[str, Any]) -> float:
+        # The unrounded FAISS score: inner product (higher is better) or L2 distance (lower is better).
+        return hit["score"] if self.metric == "l2" else -hit["score"]
+
+    @staticmethod
+    def _ranked(per_shard: List[List[Dict[str, Any]]], key: Callable[[Dict[str, Any]], float], limit: int) -> Ranked:
+        # Each shard's list is already best first, so a k-way heap merge yields the global order.
+        tagged = [[((shard, hit.get("id", row)), hit) for row, hit in enumerate(hits)] for shard, hits in enumerate(per_shard)]
+        return list(islice(heapq.merge(*tagged, key=lambda item: key(item[1])), limit))
+
+    def _corpus(self, query: str) -> Dict[str, Any]:
+        stats = [s for s in self._scatter(_term_stats, query) if s is not None]
+        df: Counter = Counter()
+        for s in stats:
+            df.update(s["df"])
+        return {
+            "n_docs": sum(s["n_docs"] for s in stats),
+            "total_length": sum(s["total_length"] for s in stats),
+            "df": dict(df),
+        }
+
+    def _fuse(self, vector: Ranked, keyword: Ranked, limit: int) -> List[Dict[str, Any]]:
+        """
+        Reciprocal-rank fusion over the global lists, as `VectorStore._fused_results`
+        does for one store. A chunk's vector similarity is preferred to the one its
+        shard reconstructed for a keyword hit.
+        """
+        fused: Dict[Tuple[int, int], float] = {}
+        hits: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        for ranked in (vector, keyword):
+            for rank, (doc, hit) in enumerate(ranked):
+                fused[doc] = fused.get(doc, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+                hits.setdefault(doc, hit)
+        top = sorted(fused.items(), key=lambda item: -item[1])[:limit]
+        return [
+            {
+                "score": round(score, 6),
+                "similarity": round(hits[doc]["similarity"], 3) if hits[doc]["similarity"] is not None else None,
+                "metadata": hits[doc]["metadata"],
+            }
+            for doc, score in top
+        ]
+
+    def _hybrid_search(
+        self, query: str, candidates: int, limit: int, similarity_threshold: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        query_vector = self.embedding_service.embed_query(query)
+        corpus = self._corpus(query)
+        per_shard = self._scatter(
+            _call, "candidates", query, candidates,
+            similarity_threshold=similarity_threshold, hybrid=True, query_vector=query_vector, corpus=corpus,
+        )
+        vector = self._ranked([c["vector"] for c in per_shard], self._vector_key, candidates)
+        keyword = self._ranked([c["keyword"] for c in per_shard], lambda hit: -hit["score"], candidates)
+        return self._fuse(vector, keyword, limit)
+
+    def search(self, query: str, top_k: int = 3, hybrid: Optional[bool] = None) -> List[Dict[str, Any]]:
+        if self._use_hybrid(hybrid):
+            results = self._hybrid_search(query, max(top_k, self.hybrid_candidates), top_k)
+        else:
+            query_vector = self.embedding_service.embed_query(query)
+            per_shard = self._scatter(_call, "search", query, top_k, False, query_vector=query_vector)
+            results = [hit for _, hit in self._ranked(per_shard, self._vector_key, top_k)]
+        logger.info(f"Sharded search over {self.shards} shards returned {len(results)} results.")
+        return results
+
+    def search_by_threshold(
+        self, query: str, similarity_threshold: float, max_results: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        limit = max_results or self.max_range_results
+        if self._use_hybrid(None):
+            results = self._hybrid_search(query, limit, limit, similarity_threshold)
+        else:
+            query_vector = self.embedding_service.embed_query(query)
+            per_shard = self._scatter(
+                _call, "search_by_threshold", query, similarity_threshold, limit, query_vector=query_vector
+            )
+            results = [hit for _, hit in self._ranked(per_shard, self._vector_key, limit)]
+        logger.info(
+            f"Sharded threshold search (>= {similarity_threshold}) over {self.shards} shards "
+            f"returned {len(results)} results."
+        )
+        return results
+
+    def save_index(self, force: bool = False):
+        self._scatter(_call, "save_index", force)
+
+    def delete_papers(self, title: Optional[str] = None, url: Optional[str] = None) -> int:
+        deleted = sum(self._scatter(_call, "delete_papers", title=title, url=url))
+        if deleted:
+            self._notify("delete")
+        return deleted
+
+    def deduplicate(self) -> Dict[str, int]:
+        totals = {"hashed": 0, "duplicates": 0}
+        for counts in self._scatter(_call, "deduplicate"):
+            for key in totals:
+                totals[key] += counts[key]
+        if totals["duplicates"]:
+            self._notify("delete")
+        return totals
+
+    def stats(self) -> Dict[str, Any]:
+        return {"shards": self.shards, "vectors": self.shard_sizes()}
+
+    def close(self):
+        with self._lock:
+            executors, self._executors = self._executors, []
+        # Each shard checkpoints and closes its files before its worker exits.
+        futures = [executor.submit(_call, "close") for executor in executors]
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Closing index shard failed: {e}")
+        for executor in executors:
+            executor.shutdown()
@@ -0,0 +1,356 @@
+# app/core/sparse_index.py
+
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from app.core.metadata_store import MAX_SQL_VARIABLES
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SPARSE_INDEX_PATH = "./app/data/vector_store/sparse.db"
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+# Posting rows per term before `optimize` folds them into one.
+MAX_POSTING_ROWS = 32
+
+# Keeps model names and acronyms whole: "gpt-4", "t5", "bert-base", "llama2", "3.5".
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    """
+    a an and are as at be but by can do does for from has have how i if in into is it its of on or
+    our so such than that the their them then there these they this to was we were what when where
+    which while who why will with you your about also been between both each more most other over
+    using used use via
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS and (len(t) > 1 or t.isdigit())]
+
+
+def encode_varints(values: np.ndarray) -> bytes:
+    """
+    LEB128 varints, vectorised: 7 bits per byte, high bit set on every byte but a value's last.
+    """
+    if len(values) < 64:
+        # Most terms of a batch have a handful of postings; plain Python beats numpy's per-call overhead there.
+        out = bytearray()
+        for value in (int(v) for v in values):
+            while value >= 0x80:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+        return bytes(out)
+    values = np.asarray(values, dtype=np.uint64)
+    n_bytes = np.ones(len(values), dtype=np.int64)
+    for shift in (7, 14, 21, 28, 35):
+        n_bytes += values >= (np.uint64(1) << np.uint64(shift))
+    starts = np.concatenate(([0], np.cumsum(n_bytes)[:-1]))
+    out = np.zeros(int(n_bytes.sum()), dtype=np.uint8)
+    for k in range(int(n_bytes.max())):
+        has = n_bytes > k
+        byte = (values[has] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (n_bytes[has] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[has] + k] = (byte | more).astype(np.uint8)
+    return out.tobytes()
+
+
+def decode_varints(data: bytes) -> np.ndarray:
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if not len(raw):
+        return np.zeros(0, dtype=np.int64)
+    last = (raw & 0x80) == 0
+    value_index = np.concatenate(([0], np.cumsum(last)[:-1]))
+    first_byte = np.concatenate(([True], last[:-1]))
+    byte_starts = np.flatnonzero(first_byte)
+    position = np.arange(len(raw)) - byte_starts[value_index]
+    parts = (raw & 0x7F).astype(np.int64) << (7 * position)
+    return np.bincount(value_index, weights=parts, minlength=int(last.sum())).astype(np.int64)
+
+
+class SparseIndex:
+    """
+    BM25 inverted index over chunk text, kept in SQLite next to the metadata.
+
+    A term's postings are (doc id delta, term frequency, doc length) triples
+    packed as varints. Ids only grow, so each batch of new chunks appends one
+    small posting row per term whose deltas continue from the term's last id:
+    adding is proportional to the batch, and a term's full list is just its
+    rows concatenated. `optimize` folds rows together and drops removed docs.
+    """
+
+    def __init__(self, db_path: str = SPARSE_INDEX_PATH, k1: float = DEFAULT_K1, b: float = DEFAULT_B):
+        self.db_path = db_path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS terms (
+                term TEXT PRIMARY KEY,
+                df INTEGER NOT NULL,
+                last_id INTEGER NOT NULL,
+                rows INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                term TEXT NOT NULL,
+                data BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_postings_term ON postings(term, seq);
+            CREATE TABLE IF NOT EXISTS removed (
+                id INTEGER PRIMARY KEY,
+                length INTEGER,
+                terms TEXT
+            );
+            CREATE TABLE IF NOT EXISTS stats (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            """
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(removed)")}
+        if "terms" not in columns:
+            # Indexes from before removals recorded their documents; `optimize` scans every term for those.
+            self.conn.execute("ALTER TABLE removed ADD COLUMN length INTEGER")
+            self.conn.execute("ALTER TABLE removed ADD COLUMN terms TEXT")
+        self.conn.commit()
+        stats = dict(self.conn.execute("SELECT key, value FROM stats").fetchall())
+        self.n_docs = stats.get("n_docs", 0)
+        self.total_length = stats.get("total_length", 0)
+        self.max_id = stats.get("max_id", -1)
+        self.removed: Set[int] = {row[0] for row in self.conn.execute("SELECT id FROM removed")}
+
+    def add(self, ids: Sequence[int], texts: Sequence[str]):
+        """
+        Indexes a batch of chunks. Ids must be higher than any already indexed.
+        """
+        if not len(ids):
+            return
+        postings: Dict[str, List[Tuple[int, int, int]]] = defaultdict(list)
+        added_length = 0
+        for doc_id, text in sorted(zip((int(i) for i in ids), texts)):
+            tokens = tokenize(text)
+            added_length += len(tokens)
+            for term, tf in Counter(tokens).items():
+                postings[term].append((doc_id, tf, len(tokens)))
+
+        with self._lock, self.conn:
+            new_max = max(int(i) for i in ids)
+            if min(int(i) for i in ids) <= self.max_id:
+                raise ValueError(f"Sparse index ids must increase; got {min(ids)} after {self.max_id}.")
+            known = self._terms(postings.keys())
+            term_rows, posting_rows = [], []
+            for term, entries in postings.items():
+                df, last_id, rows = known.get(term, (0, 0, 0))
+                triples, previous = [], last_id
+                for doc_id, tf, length in entries:
+                    triples += (doc_id - previous, tf, length)
+                    previous = doc_id
+                posting_rows.append((term, encode_varints(triples)))
+                term_rows.append((term, df + len(entries), previous, rows + 1))
+            self.conn.executemany("INSERT INTO postings (term, data) VALUES (?, ?)", posting_rows)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO terms (term, df, last_id, rows) VALUES (?, ?, ?, ?)", term_rows
+            )
+            self.n_docs += len(ids)
+            self.total_length += added_length
+            self.max_id = new_max
+            self._save_stats()
+
+    def _terms(self, terms: Iterable[str]) -> Dict[str, Tuple[int, int, int]]:
+        terms = list(terms)
+        found = {}
+        for start in range(0, len(terms), MAX_SQL_VARIABLES):
+            batch = terms[start:start + MAX_SQL_VARIABLES]
+            cursor = self.conn.execute(
+                f"SELECT term, df, last_id, rows FROM terms WHERE term IN ({','.join('?' * len(batch))})", batch
+            )
+            found.update((term, (df, last_id, rows)) for term, df, last_id, rows in cursor)
+        return found
+
+    def _save_stats(self):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO stats (key, value) VALUES (?, ?)",
+            [("n_docs", self.n_docs), ("total_length", self.total_length), ("max_id", self.max_id)],
+        )
+
+    def _postings(self, term: str) -> np.ndarray:
+        # Called with the lock held. Returns an (n, 3) array of (doc id, tf, doc length).
+        data = b"".join(row[0] for row in self.conn.execute(
+            "SELECT data FROM postings WHERE term = ? ORDER BY seq", (term,)
+        ))
+        triples = decode_varints(data).reshape(-1, 3)
+        triples[:, 0] = np.cumsum(triples[:, 0])
+        return triples
+
+    def term_stats(self, query: str) -> Dict[str, Any]:
+        """
+        Corpus statistics BM25 needs for the query: document count, total length
+        and each query term's document frequency. Summed over several indexes
+        (shards) and passed back to `search` as `corpus`, they give every index
+        the scores one index over the whole corpus would.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            df = {term: known[0] for term, known in self._terms(terms).items()}
+            return {"n_docs": self.n_docs, "total_length": self.total_length, "df": df}
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        exclude: Optional[Set[int]] = None,
+        corpus: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        BM25 top-`limit` for the query. Returns (ids, scores, matched term fraction), best first.
+        `corpus` (see `term_stats`) replaces this index's own statistics.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        empty = np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+        if not terms or not self.n_docs:
+            return empty
+
+        with self._lock:
+            known = self._terms(terms)
+            lists = [(term, self._postings(term)) for term in terms if term in known]
+            n_docs, total_length = self.n_docs, self.total_length
+            removed = self.removed | (exclude or set())
+        if not lists:
+            return empty
+        if corpus is not None:
+            n_docs, total_length = corpus["n_docs"], corpus["total_length"]
+        avg_length = total_length / max(n_docs, 1)
+
+        ids_parts, score_parts = [], []
+        for term, triples in lists:
+            doc_ids, tf, length = triples[:, 0], triples[:, 1].astype(float), triples[:, 2].astype(float)
+            df = corpus["df"].get(term, len(doc_ids)) if corpus is not None else len(doc_ids)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * length / max(avg_length, 1e-9))
+            ids_parts.append(doc_ids)
+            score_parts.append(idf * tf * (self.k1 + 1) / (tf + norm))
+
+        all_ids = np.concatenate(ids_parts)
+        doc_ids, inverse = np.unique(all_ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+        matched = np.bincount(inverse) / len(terms)
+        if removed:
+            live = ~np.isin(doc_ids, np.fromiter(removed, dtype=np.int64, count=len(removed)))
+            doc_ids, scores, matched = doc_ids[live], scores[live], matched[live]
+
+        if len(doc_ids) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            doc_ids, scores, matched = doc_ids[top], scores[top], matched[top]
+        order = np.argsort(-scores, kind="stable")
+        return doc_ids[order], scores[order], matched[order]
+
+    def remove(self, ids: Iterable[int], texts: Optional[Sequence[str]] = None):
+        """
+        Drops documents from results at once; their postings go at the next `optimize`.
+        With the documents' `texts`, `optimize` only rewrites the terms they contain.
+        """
+        ids = [int(i) for i in ids]
+        if texts is None:
+            rows = [(doc_id, None, None) for doc_id in ids]
+        else:
+            tokens = [tokenize(text) for text in texts]
+            rows = [(doc_id, len(t), " ".join(sorted(set(t)))) for doc_id, t in zip(ids, tokens)]
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO removed (id, length, terms) VALUES (?, ?, ?)", rows)
+            self.removed.update(ids)
+
+    def optimize(self, max_rows: int = MAX_POSTING_ROWS) -> int:
+        """
+        Rewrites posting lists that span more than `max_rows` rows (or hold removed
+        documents) as a single row, and updates df and corpus statistics.
+        Only the terms of removed documents are scanned, unless a removal was
+        recorded without its text. Returns the number of terms rewritten.
+        """
+        with self._lock, self.conn:
+            removed = np.fromiter(self.removed, dtype=np.int64, count=len(self.removed))
+            records = self.conn.execute("SELECT id, length, terms FROM removed").fetchall()
+            # Removed doc id → its length, to take it out of the corpus statistics. Documents
+            # without tokens have no postings, but still count in n_docs.
+            removed_lengths: Dict[int, int] = {doc_id: length or 0 for doc_id, length, _ in records}
+            unrecorded = {doc_id for doc_id, _, terms in records if terms is None}
+            if unrecorded:
+                candidates = {row[0] for row in self.conn.execute("SELECT term FROM terms")}
+            else:
+                candidates = {row[0] for row in self.conn.execute("SELECT term FROM terms WHERE rows > ?", (max_rows,))}
+                candidates.update(term for _, _, terms in records for term in terms.split())
+
+            rewritten = 0
+            for term in sorted(candidates):
+                row_count = self._row_count(term)
+                if not row_count:
+                    continue
+                triples = self._postings(term)
+                dead = np.isin(triples[:, 0], removed) if len(removed) else np.zeros(len(triples), dtype=bool)
+                if not dead.any() and row_count <= max_rows:
+                    continue
+                for doc_id, length in triples[dead][:, [0, 2]]:
+                    if int(doc_id) in unrecorded:
+                        removed_lengths[int(doc_id)] = int(length)
+                live = triples[~dead]
+                self.conn.execute("DELETE FROM postings WHERE term = ?", (term,))
+                if not len(live):
+                    self.conn.execute("DELETE FROM terms WHERE term = ?", (term,))
+                else:
+                    deltas = np.diff(live[:, 0], prepend=0)
+                    data = encode_varints(np.column_stack((deltas, live[:, 1], live[:, 2])).ravel())
+                    self.conn.execute("INSERT INTO postings (term, data) VALUES (?, ?)", (term, data))
+                    self.conn.execute(
+                        "UPDATE terms SET df = ?, last_id = ?, rows = 1 WHERE term = ?",
+                        (len(live), int(live[-1, 0]), term),
+                    )
+                rewritten += 1
+
+            if len(removed):
+                self.n_docs -= len(removed_lengths)
+                self.total_length -= sum(removed_lengths.values())
+                self.conn.execute("DELETE FROM removed")
+                self.removed = set()
+                self._save_stats()
+
+        if rewritten:
+            logger.info(f"Optimized {rewritten} posting lists.")
+        return rewritten
+
+    def _row_count(self, term: str) -> int:
+        row = self.conn.execute("SELECT rows FROM terms WHERE term = ?", (term,)).fetchone()
+        return row[0] if row is not None else 0
+
+    def clear(self):
+        with self._lock, self.conn:
+            for table in ("terms", "postings", "removed", "stats"):
+                self.conn.execute(f"DELETE FROM {table}")
+            self.n_docs, self.total_length, self.max_id = 0, 0, -1
+            self.removed = set()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            terms, posting_bytes = self.conn.execute(
+                "SELECT (SELECT COUNT(*) FROM terms), COALESCE((SELECT SUM(LENGTH(data)) FROM postings), 0)"
+            ).fetchone()
+        return {
+            "documents": self.n_docs,
+            "terms": terms,
+            "posting_bytes": posting_bytes,
+            "avg_doc_length": round(self.total_length / self.n_docs, 2) if self.n_docs else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,218 @@
+# app/core/vector_collections.py
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+from app.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from app.core.vector_store import VectorStore
+
+logger = get_logger(__name__)
+
+COLLECTIONS_DIR = "./app/data/collections"
+# Served by the original store at VECTOR_STORE_DIR, so existing data stays where it is.
+DEFAULT_COLLECTION = "default"
+# Collections unused for this long are closed and dropped from memory.
+DEFAULT_IDLE_SECONDS = 900
+DEFAULT_MAX_LOADED = 8
+
+COLLECTION_NAME_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+COLLECTION_NAME_PATTERN = COLLECTION_NAME_RE.pattern
+
+StoreFactory = Callable[[str, str, Dict[str, Any]], "VectorStore"]
+
+
+class CollectionNotFound(LookupError):
+    pass
+
+
+@dataclass
+class _Loaded:
+    store: "VectorStore"
+    users: int = 0
+    last_used: float = 0.0
+
+
+class CollectionManager:
+    """
+    Named vector store collections, each a separate VectorStore (index, metadata,
+    WAL, keyword index) in its own directory under `root`, with optional
+    `vector_db` overrides per collection.
+
+    A collection is loaded the first time it is acquired and closed once it has
+    been idle for `idle_seconds` (checked by a reaper thread), or earlier when
+    more than `max_loaded` are open. Collections in use are never evicted:
+    callers hold them between `acquire` and `release` (or inside `lease`).
+    `factory(name, directory, overrides)` builds a collection's store;
+    `on_load(store)` runs after each load.
+    """
+
+    def __init__(
+        self,
+        factory: StoreFactory,
+        root: str = COLLECTIONS_DIR,
+        overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+        max_loaded: int = DEFAULT_MAX_LOADED,
+        on_load: Optional[Callable[["VectorStore"], None]] = None,
+    ):
+        self.factory = factory
+        self.root = root
+        self.overrides = overrides or {}
+        self.idle_seconds = idle_seconds
+        self.max_loaded = max_loaded
+        self.on_load = on_load
+        self.loads = 0
+        self.evictions = 0
+        self._loaded: Dict[str, _Loaded] = {}
+        self._lock = threading.Lock()
+        # Serialises cold loads only; acquiring an open collection never waits on one.
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def validate_name(name: str) -> str:
+        if not COLLECTION_NAME_RE.match(name or "") or name == DEFAULT_COLLECTION:
+            raise ValueError(
+                f"Invalid collection name '{name}': use 1-64 lowercase letters, digits, '-' or '_' "
+                f"(and not '{DEFAULT_COLLECTION}')."
+            )
+        return name
+
+    def directory(self, name: str) -> str:
+        return os.path.join(self.root, self.validate_name(name))
+
+    def exists(self, name: str) -> bool:
+        return name in self._loaded or name in self.overrides or os.path.isdir(self.directory(name))
+
+    def names(self) -> List[str]:
+        on_disk = {entry.name for entry in os.scandir(self.root) if entry.is_dir() and COLLECTION_NAME_RE.match(entry.name)}
+        return sorted(on_disk | set(self.overrides) | set(self._loaded))
+
+    def acquire(self, name: str, create: bool = False) -> "VectorStore":
+        """
+        Returns the collection's store, loading it if needed, and marks it in use
+        until `release`. Unknown collections raise CollectionNotFound unless `create`.
+        """
+        entry = self._checkout(name)
+        if entry is not None:
+            return entry.store
+
+        with self._load_lock:
+            # Another caller may have loaded it while this one waited.
+            entry = self._checkout(name)
+            if entry is not None:
+                return entry.store
+            if not create and not self.exists(name):
+                raise CollectionNotFound(f"Unknown collection '{name}'.")
+            directory = self.directory(name)
+            logger.info(f"📂 Loading collection '{name}' from {directory}...")
+            start = time.perf_counter()
+            store = self.factory(name, directory, self.overrides.get(name) or {})
+            if self.on_load is not None:
+                self.on_load(store)
+            with self._lock:
+                self._loaded[name] = _Loaded(store, users=1, last_used=time.monotonic())
+                self.loads += 1
+            logger.info(f"✅ Collection '{name}' loaded in {time.perf_counter() - start:.2f}s.")
+        self._evict(self._over_capacity())
+        return store
+
+    def _checkout(self, name: str) -> Optional[_Loaded]:
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is not None:
+                entry.users += 1
+                entry.last_used = time.monotonic()
+            return entry
+
+    def release(self, name: str):
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is not None:
+                entry.users = max(entry.users - 1, 0)
+                entry.last_used = time.monotonic()
+
+    @contextmanager
+    def lease(self, name: str, create: bool = False) -> Iterator["VectorStore"]:
+        store = self.acquire(name, create=create)
+        try:
+            yield store
+        finally:
+            self.release(name)
+
+    def _over_capacity(self) -> List[str]:
+        # Least recently used first, skipping collections in use.
+        with self._lock:
+            idle = sorted((e.last_used, name) for name, e in self._loaded.items() if e.users == 0)
+            excess = len(self._loaded) - self.max_loaded
+        return [name for _, name in idle[:max(excess, 0)]]
+
+    def evict_idle(self) -> List[str]:
+        """
+        Closes collections unused for `idle_seconds` (or beyond `max_loaded`). Returns their names.
+        """
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [name for name, e in self._loaded.items() if e.users == 0 and e.last_used <= cutoff]
+        return self._evict(sorted(set(idle) | set(self._over_capacity())))
+
+    def _evict(self, names: List[str]) -> List[str]:
+        evicted = []
+        for name in names:
+            with self._lock:
+                entry = self._loaded.get(name)
+                # Re-checked under the lock: a request may have picked it up since it was chosen.
+                if entry is None or entry.users:
+                    continue
+                del self._loaded[name]
+                self.evictions += 1
+            entry.store.close()
+            evicted.append(name)
+            logger.info(f"💤 Evicted collection '{name}'.")
+        return evicted
+
+    def start(self) -> "CollectionManager":
+        if self._reaper is None:
+            interval = max(min(self.idle_seconds / 2, 60.0), 0.05)
+
+            def reap():
+                while not self._stop.wait(interval):
+                    try:
+                        self.evict_idle()
+                    except Exception:
+                        logger.exception("Collection eviction failed")
+
+            self._reaper = threading.Thread(target=reap, name="collection-reaper", daemon=True)
+            self._reaper.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._reaper is not None:
+            self._reaper.join(5)
+            self._reaper = None
+        with self._lock:
+            loaded, self._loaded = self._loaded, {}
+        for entry in loaded.values():
+            entry.store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            loaded = {
+                name: {
+                    "in_use": e.users,
+                    "idle_seconds": round(now - e.last_used, 1),
+                    "vectors": int(e.store.index.ntotal),
+                }
+                for name, e in self._loaded.items()
+            }
+        return {"known": self.names(), "loaded": loaded, "loads": self.loads, "evictions": self.evictions}
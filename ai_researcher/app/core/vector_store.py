@@ -1,111 +1,910 @@
 import os 
-import json
+import threading
 import numpy as np
 import faiss  #type: ignore
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional, Set, Tuple
 from app.core.embedding_service import EmbeddingService 
+from app.core.config_loader import get_section, merge_config
+from app.core.metadata_store import MetadataStore, chunk_text, content_hash
+from app.core.sparse_index import SparseIndex, DEFAULT_B, DEFAULT_K1
+from app.core.wal import WriteAheadLog
+from app.core.index_factory import (
+    build_index,
+    configure_search,
+    default_nlist,
+    faiss_metric,
+    index_type_of,
+    make_search_parameters,
+    metric_name,
+    min_training_vectors,
+    reconstruct_all,
+    resolve_index_type,
+    supports_remove,
+    train_index,
+    AUTO_HNSW_MIN_VECTORS,
+)
+from app.utils.concurrency import ReadWriteLock
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
 #path setup for FAISS index and metadata storga 
+VECTOR_STORE_DIR = "./app/data/vector_store"
 VECTOR_INDEX_PATH = "./app/data/vector_store/index.faiss"
-METADATA_PATH = "./app/data/vector_store/metadata.json" 
+METADATA_PATH = "./app/data/vector_store/metadata.db" 
+# Pre-SQLite stores kept every chunk in one JSON list; imported once on first load.
+LEGACY_METADATA_PATH = "./app/data/vector_store/metadata.json"
+WAL_PATH = "./app/data/vector_store/index.wal"
+SPARSE_INDEX_PATH = "./app/data/vector_store/sparse.db"
+
+# Fold the write-ahead log into a fresh index checkpoint once it grows past this size.
+DEFAULT_CHECKPOINT_WAL_BYTES = 64 * 1024 * 1024
+# Start a background compaction once this fraction of stored vectors is deleted.
+DEFAULT_COMPACTION_TOMBSTONE_RATIO = 0.2
+# Upper bound on rows a similarity-threshold search returns when the caller sets no limit.
+DEFAULT_MAX_RANGE_RESULTS = 100
+# Reciprocal-rank fusion constant and candidates taken from each retriever before fusing.
+DEFAULT_RRF_K = 60
+DEFAULT_HYBRID_CANDIDATES = 50
+# Share of query terms a keyword-only hit must contain to pass a similarity-threshold search.
+DEFAULT_MIN_TERM_MATCH = 0.5
 
 
 
 class VectorStore:
-    def __init__(self, embedding_dem: int = 384, embedding_service: Optional['EmbeddingService'] = None): 
+    """
+    FAISS index plus SQLite chunk metadata, write-ahead log and keyword index.
+
+    By default the store lives in VECTOR_STORE_DIR and is configured by the
+    `vector_db` section. `directory` places all of its files elsewhere (one
+    directory per collection), and `config` overrides `vector_db` keys for this
+    store only.
+    """
+
+    def __init__(
+        self,
+        embedding_dem: int = 384,
+        embedding_service: Optional['EmbeddingService'] = None,
+        directory: Optional[str] = None,
+        config: Optional[Dict[str, Any]] = None,
+    ):
         self.embedding_dim = embedding_dem
         self.index_path = VECTOR_INDEX_PATH
         self.metadata_path = METADATA_PATH
+        self.legacy_metadata_path = LEGACY_METADATA_PATH
+        self.wal_path = WAL_PATH
+        self.sparse_path = SPARSE_INDEX_PATH
+        if directory is not None:
+            self.index_path, self.metadata_path, self.legacy_metadata_path, self.wal_path, self.sparse_path = (
+                os.path.join(directory, os.path.basename(path))
+                for path in (VECTOR_INDEX_PATH, METADATA_PATH, LEGACY_METADATA_PATH, WAL_PATH, SPARSE_INDEX_PATH)
+            )
+
+        config = merge_config(get_section("vector_db"), config or {})
+        self.index_type = config.get("index_type", "auto")
+        self.migrate_threshold = config.get("migrate_threshold", AUTO_HNSW_MIN_VECTORS)
+        self.index_params = config.get("index_params") or {}
+        # New stores use this metric; an existing index keeps its own unless `convert_metric` asks
+        # for a rebuild, since a similarity threshold means a different cut-off under each metric.
+        self.configured_metric = config.get("metric", "cosine")
+        self.convert_metric = config.get("convert_metric", False)
+        self.metric = self.configured_metric
+        self.max_range_results = config.get("max_range_results", DEFAULT_MAX_RANGE_RESULTS)
+        self.checkpoint_wal_bytes = config.get("checkpoint_wal_bytes", DEFAULT_CHECKPOINT_WAL_BYTES)
+        self.compaction_tombstone_ratio = config.get(
+            "compaction_tombstone_ratio", DEFAULT_COMPACTION_TOMBSTONE_RATIO
+        )
+        # Hybrid retrieval: BM25 over chunk text fused with the vector results (reciprocal-rank fusion).
+        hybrid = config.get("hybrid") or {}
+        self.hybrid = hybrid.get("enabled", True)
+        self.rrf_k = hybrid.get("rrf_k", DEFAULT_RRF_K)
+        self.hybrid_candidates = hybrid.get("candidates", DEFAULT_HYBRID_CANDIDATES)
+        self.min_term_match = hybrid.get("min_term_match", DEFAULT_MIN_TERM_MATCH)
+        self._bm25_params = (hybrid.get("bm25_k1", DEFAULT_K1), hybrid.get("bm25_b", DEFAULT_B))
+
+        # `_lock` serialises writers (id counter, WAL order, tombstones, checkpoints) and is never
+        # taken by searches. `_index_lock` is held shared by searches and exclusively only for the
+        # moment the index is mutated or swapped, so queries never wait on an fsync or a rebuild.
+        # Tombstone sets are replaced, not mutated, so readers can hold on to the old one.
+        self._lock = threading.RLock()
+        self._index_lock = ReadWriteLock()
+        self._compaction_lock = threading.Lock()
+        # Callbacks notified after chunks are added ("add", with their vectors) or removed ("delete").
+        self._listeners: Dict[str, List[Callable[..., None]]] = {"add": [], "delete": []}
 
         os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
 
         # self.model = SentenceTransformer("all-MiniLM-L6-v2")
         self.embedding_service = embedding_service or EmbeddingService(model_name="all-MiniLM-L6-v2")
-        self.index, self.metadata = self._load_or_initialize()
+        self.index, self.metadata_store = self._load_or_initialize()
+        self.metric = metric_name(self.index)
+        self.tombstones = self.metadata_store.tombstones()
+        self.wal = WriteAheadLog(self.wal_path)
+        needs_checkpoint = self._replay_wal()
+        self.sparse_index = SparseIndex(self.sparse_path, *self._bm25_params) if self.hybrid else None
+        self._catch_up_sparse()
+        needs_checkpoint = self._maybe_convert_metric() or needs_checkpoint
+        # Ids are never reused: the keyword index only accepts increasing ids, and stores
+        # from before the metadata high-water mark may only have it recorded there.
+        self._next_id = max(
+            self._max_index_id(),
+            self.metadata_store.max_id(),
+            self.sparse_index.max_id if self.sparse_index is not None else -1,
+        ) + 1
+        self._refresh_search_params()
+        if self._maybe_migrate() or needs_checkpoint:
+            self.checkpoint()
 
     
     def _load_or_initialize(self):
-        if os.path.exists(self.index_path) and os.path.exists(self.metadata_path):
+        has_metadata = os.path.exists(self.metadata_path)
+        metadata_store = MetadataStore(self.metadata_path)
+
+        if os.path.exists(self.index_path):
             index = faiss.read_index(self.index_path)
-            with open(self.metadata_path, "r", encoding="utf-8") as f:
-                metadata = json.load(f)
-            logger.info(f"Loaded existing FAISS index with {len(metadata)} entries.")    
+            if not has_metadata and os.path.exists(self.legacy_metadata_path):
+                metadata_store.import_json(self.legacy_metadata_path)
+                os.replace(self.legacy_metadata_path, self.legacy_metadata_path + ".migrated")
+            if not isinstance(faiss.downcast_index(index), faiss.IndexIDMap2):
+                # Older stores used positional ids; keep them as explicit ids so metadata rows still match.
+                logger.info("Converting FAISS index to id-mapped storage.")
+                vectors = reconstruct_all(index)
+                index = self._build_id_mapped(
+                    index_type_of(index), np.arange(len(vectors), dtype=np.int64), vectors
+                )
+            logger.info(f"Loaded existing FAISS index with {index.ntotal} entries.")    
         else:
-            index = faiss.IndexFlatL2(self.embedding_dim)
-            metadata = []
-            logger.info("Created a new FAISS index.")
-        return index, metadata
+            # Every store starts exact; `_maybe_migrate` switches to an ANN index once it is big enough.
+            index = faiss.IndexIDMap2(build_index("flat", self.embedding_dim, metric=faiss_metric(self.metric)))
+            logger.info(f"Created a new FAISS index (metric={self.metric}).")
+        configure_search(index, self.index_params)
+        return index, metadata_store
+
+    def _build_id_mapped(self, index_type: str, ids: np.ndarray, vectors: np.ndarray) -> faiss.Index:
+        """
+        Builds, trains and fills an id-mapped index of the given type.
+        """
+        n_vectors = len(vectors)
+        nlist = self.index_params.get("nlist") or default_nlist(n_vectors)
+        index = faiss.IndexIDMap2(
+            build_index(
+                index_type,
+                self.embedding_dim,
+                n_vectors,
+                {**self.index_params, "nlist": nlist},
+                metric=faiss_metric(self.metric),
+            )
+        )
+        if n_vectors:
+            train_index(index, vectors)
+            index.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32), ids)  # type: ignore
+        configure_search(index, self.index_params)
+        return index
+
+    def _index_ids(self) -> np.ndarray:
+        return faiss.vector_to_array(self.index.id_map)
+
+    def _max_index_id(self) -> int:
+        ids = self._index_ids()
+        return int(ids.max()) if len(ids) else -1
+
+    def _replay_wal(self) -> bool:
+        """
+        Re-applies batches logged after the last checkpoint, id by id: an id
+        already in the index made it into the checkpoint, and a tombstoned one
+        was deleted, so both are skipped while the rest of their batch is still
+        re-added. Replay is idempotent. Returns True if anything was replayed.
+        """
+        present = set(self._index_ids().tolist())
+        replayed = 0
+        for ids, vectors, metadatas in self.wal.replay():
+            missing = np.array(
+                [row for row, doc_id in enumerate(ids.tolist()) if doc_id not in present and doc_id not in self.tombstones],
+                dtype=np.int64,
+            )
+            if not len(missing):
+                continue
+            ids = ids[missing]
+            self.metadata_store.add_many(ids, [metadatas[row] for row in missing.tolist()])
+            self.index.add_with_ids(np.ascontiguousarray(vectors[missing]), ids)  # type: ignore
+            present.update(ids.tolist())
+            replayed += len(ids)
+
+        if replayed:
+            logger.info(f"Replayed {replayed} vectors from the write-ahead log.")
+        return replayed > 0
+
+    def _catch_up_sparse(self, batch_size: int = 1000):
+        """
+        Indexes chunks the keyword index has not seen: the whole store the first
+        time hybrid search is enabled, or the tail of an ingest cut off by a crash.
+        """
+        if self.sparse_index is None:
+            return
+        caught_up = 0
+        for rows in self.metadata_store.iter_batches(batch_size, after_id=self.sparse_index.max_id):
+            self.sparse_index.add([row_id for row_id, _ in rows], [chunk_text(meta) for _, meta in rows])
+            caught_up += len(rows)
+        if caught_up:
+            logger.info(f"Added {caught_up} chunks to the keyword index.")
+
+    def _search_params_for(self, index: faiss.Index) -> Tuple[Any, Any]:
+        """
+        The FAISS id selector that hides tombstoned vectors and search parameters using it.
+        """
+        if not self.tombstones:
+            return None, None
+        # Keep the batch selector referenced: IDSelectorNot does not own it.
+        selector = faiss.IDSelectorBatch(np.fromiter(self.tombstones, dtype=np.int64, count=len(self.tombstones)))
+        return selector, make_search_parameters(index, faiss.IDSelectorNot(selector), self.index_params)
+
+    def _refresh_search_params(self):
+        """
+        Rebuilds the selector after the tombstone set changed; swapped in under the index lock
+        so no search is still using the old one when it is freed.
+        """
+        selector, params = self._search_params_for(self.index)
+        with self._index_lock.write():
+            self._tombstone_selector, self._search_params = selector, params
+
+    def _install_index(self, index: faiss.Index):
+        """
+        Swaps in a rebuilt index together with its search parameters. Called with `_lock` held.
+        """
+        selector, params = self._search_params_for(index)
+        with self._index_lock.write():
+            self.index = index
+            self._tombstone_selector, self._search_params = selector, params
+
+    def _maybe_convert_metric(self) -> bool:
+        """
+        Rebuilds an existing index under the configured metric (e.g. an L2 store
+        after switching to cosine) when `convert_metric` is set. Vectors are
+        re-normalised from the index itself, so nothing is re-embedded. IVF-PQ codes
+        are lossy and are left as they are.
+        """
+        if self.configured_metric == self.metric:
+            return False
+        if not self.convert_metric:
+            logger.info(
+                f"Index uses metric '{self.metric}', not the configured '{self.configured_metric}'; "
+                "keeping it (set vector_db.convert_metric to rebuild)."
+            )
+            return False
+        current = index_type_of(self.index)
+        if current == "ivf_pq":
+            logger.warning(
+                f"Index is '{current}' with metric '{self.metric}'; not converting to '{self.configured_metric}'."
+            )
+            return False
+
+        logger.info(f"Converting FAISS index from '{self.metric}' to '{self.configured_metric}'.")
+        ids, vectors = self._index_ids(), reconstruct_all(self.index)
+        self.metric = self.configured_metric
+        self.index = self._build_id_mapped(current, ids, self._prepare_vectors(vectors))
+        return True
+
+    def _prepare_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Float32, contiguous and, for cosine stores, unit length, so inner product is cosine similarity.
+        """
+        vectors = np.array(vectors, dtype=np.float32, order="C", copy=True)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if self.metric == "cosine":
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    def _to_similarity(self, scores: np.ndarray) -> np.ndarray:
+        """
+        FAISS scores → similarity in one vectorised step: inner product already is
+        cosine similarity; squared L2 distances map to 1 / (1 + d) as before.
+        """
+        if self.metric == "cosine":
+            return scores
+        return 1.0 / (1.0 + scores)
+
+    def _range_radius(self, similarity_threshold: float) -> Optional[float]:
+        """
+        FAISS range-search radius for a similarity threshold, or None when every
+        vector qualifies (an L2 similarity 1 / (1 + d) is always above 0).
+        """
+        if self.metric == "cosine":
+            return similarity_threshold
+        if similarity_threshold <= 0:
+            return None
+        return 1.0 / similarity_threshold - 1.0
+
+    def _live_vectors(self, exclude: set) -> Tuple[np.ndarray, np.ndarray]:
+        ids = self._index_ids()
+        vectors = reconstruct_all(self.index)
+        keep = ~np.isin(ids, np.fromiter(exclude, dtype=np.int64, count=len(exclude)))
+        return ids[keep], vectors[keep]
+
+    def _maybe_migrate(self) -> bool:
+        """
+        Rebuilds the index as the configured ANN type once the corpus crosses
+        `migrate_threshold` and there are enough vectors to train it.
+        Vectors keep their ids, so metadata rows still match after the rebuild;
+        tombstoned vectors are carried over and left for compaction to remove.
+        """
+        n_vectors = self.index.ntotal
+        if n_vectors < self.migrate_threshold:
+            return False
+
+        current = index_type_of(self.index)
+        target = resolve_index_type(self.index_type, n_vectors)
+        # PQ codes are lossy, so an IVF-PQ index is never rebuilt into another type.
+        if target == current or current == "ivf_pq":
+            return False
+
+        nlist = self.index_params.get("nlist") or default_nlist(n_vectors)
+        if n_vectors < min_training_vectors(target, nlist):
+            logger.info(f"Not enough vectors ({n_vectors}) to train a '{target}' index yet.")
+            return False
+
+        logger.info(f"Migrating FAISS index from '{current}' to '{target}' at {n_vectors} vectors.")
+        # Built while searches keep using the old index; only the swap is exclusive.
+        self._install_index(self._build_id_mapped(target, self._index_ids(), reconstruct_all(self.index)))
+        return True
     
     
     
-    def add_papers(self, title:str, content: str):
-        logger.info(f"Adding paper: {title}")
+    def add_chunks(self, metadatas: List[Dict], embeddings: np.ndarray) -> int:
+        """
+        Adds a batch of pre-computed embeddings with one contiguous `index.add` call.
+        `metadatas[i]` describes the vector in row `i` of `embeddings`.
+        """
+        if not metadatas:
+            return 0
 
-        chunks = self.embedding_service.chunk_document(content)
+        embeddings = self._prepare_vectors(embeddings)
 
-        embeddings = self.embedding_service.get_embeddings(chunks)
+        if embeddings.shape[0] != len(metadatas):
+            raise ValueError(
+                f"Got {embeddings.shape[0]} embeddings for {len(metadatas)} metadata entries."
+            )
+
+        with self._lock:
+            ids = np.arange(self._next_id, self._next_id + len(metadatas), dtype=np.int64)
+            # Checked before anything is logged, so a rejected batch leaves no WAL or metadata rows behind.
+            if self.sparse_index is not None and ids[0] <= self.sparse_index.max_id:
+                raise ValueError(
+                    f"Chunk id {ids[0]} is not above the keyword index's last id {self.sparse_index.max_id}."
+                )
+            self._next_id += len(metadatas)
+
+            # Durable once logged; the index itself is only rewritten at checkpoints.
+            self.wal.append(ids, embeddings, metadatas)
+            self.metadata_store.add_many(ids, metadatas)
+            if self.sparse_index is not None:
+                self.sparse_index.add(ids, [chunk_text(meta) for meta in metadatas])
+            with self._index_lock.write():
+                self.index.add_with_ids(embeddings, ids)  # type: ignore
+
+            if self._maybe_migrate():
+                self.checkpoint()
 
-        embeddings= np.asarray(embeddings, dtype=np.float32)
-        if embeddings.ndim == 1:
-            embeddings = embeddings.reshape(1, -1)
+        self._notify("add", embeddings, [chunk_text(meta) for meta in metadatas])
+        return len(metadatas)
 
+    def add_listener(self, event: str, callback: Callable[..., None]):
+        """
+        Registers a callback for "add" (called with the new, prepared vectors and
+        their chunk texts) or "delete" (called with no arguments), e.g. to
+        invalidate derived caches.
+        """
+        self._listeners[event].append(callback)
 
+    def _notify(self, event: str, *args):
+        for callback in self._listeners[event]:
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"VectorStore '{event}' listener failed: {e}")
 
-        for i, chunk in enumerate(chunks):
-            meta = {
+    def filter_new(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        seen: Optional[Dict[str, Set[str]]] = None,
+        by_url: bool = True,
+    ) -> Tuple[List[str], List[Dict], int]:
+        """
+        Drops chunks that are already indexed, before they are embedded: every chunk
+        of a paper whose url is already stored (unless `by_url` is off), and any
+        chunk whose text hash is already stored. `seen` carries the urls and hashes
+        admitted earlier in the same ingest across calls, so later batches of a new
+        paper are kept while repeated chunks are not. Returns (texts, metadatas,
+        number skipped).
+        """
+        if seen is None:
+            seen = {"urls": set(), "hashes": set()}
+        hashes = [content_hash(text) for text in texts]
+        known_urls: Set[str] = set()
+        if by_url:
+            known_urls = self.metadata_store.indexed_urls(
+                m.get("url") for m in metadatas if m.get("url") and m.get("url") not in seen["urls"]
+            )
+        known_hashes = self.metadata_store.indexed_hashes(hashes)
+
+        kept_texts, kept_metadatas = [], []
+        for text, metadata, digest in zip(texts, metadatas, hashes):
+            url = metadata.get("url")
+            if url in known_urls or digest in known_hashes or digest in seen["hashes"]:
+                continue
+            seen["hashes"].add(digest)
+            if url:
+                seen["urls"].add(url)
+            kept_texts.append(text)
+            kept_metadatas.append(metadata)
+
+        skipped = len(texts) - len(kept_texts)
+        if skipped:
+            logger.info(f"Skipped {skipped} already indexed chunks.")
+        return kept_texts, kept_metadatas, skipped
+
+    def add_papers(self, title:str, content: str):
+        logger.info(f"Adding paper: {title}")
+
+        chunks = self.embedding_service.chunk_document(content)
+
+        metadatas = [
+            {
                 "title": title,
                 "chunk_id": i,
                 "content": chunk
             }
-            # self.index.add(embeddings.astype(np.float32))
-            self.index.add(np.array([embeddings[i]], dtype=np.float32)) #type: ignore
-            self.metadata.append(meta)
+            for i, chunk in enumerate(chunks)
+        ]
+        chunks, metadatas, _ = self.filter_new(chunks, metadatas)
+        if not chunks:
+            logger.info(f"Paper '{title}' is already indexed.")
+            return
+
+        embeddings = self.embedding_service.get_embeddings(chunks)
+        self.add_chunks(metadatas, embeddings)
 
         logger.info(f"Added {len(chunks)} chunks for paper '{title}' to FAISS index.")
 
-    def search(self, query: str, top_k: int = 3) -> List[Dict[str, str]]:
+    @staticmethod
+    def chunk_text_of(metadata: Dict) -> str:
+        return chunk_text(metadata)
+
+    def reembed(self, batch_size: int = 4096) -> int:
+        """
+        Re-embeds every live chunk (e.g. after changing the embedding model or
+        backend) and swaps in a freshly built index that keeps the same ids.
+        Batches go through `get_embeddings`, so a configured embedding process
+        pool spreads them across cores.
+        """
+        with self._lock:
+            high_water = self._next_id
+
+        ids_parts, vector_parts = [], []
+        for rows in self.metadata_store.iter_batches(batch_size):
+            rows = [(row_id, meta) for row_id, meta in rows if row_id < high_water]
+            if not rows:
+                continue
+            ids_parts.append(np.array([row_id for row_id, _ in rows], dtype=np.int64))
+            vector_parts.append(
+                self._prepare_vectors(
+                    self.embedding_service.get_embeddings([self.chunk_text_of(meta) for _, meta in rows])
+                )
+            )
+            logger.info(f"Re-embedded {sum(len(p) for p in ids_parts)} chunks...")
+
+        if not ids_parts:
+            return 0
+
+        ids, vectors = np.concatenate(ids_parts), np.vstack(vector_parts)
+        index = self._build_id_mapped(index_type_of(self.index), ids, vectors)
+
+        with self._lock:
+            # Chunks added while re-embedding were already embedded with the current model.
+            all_ids = self._index_ids()
+            late_ids = all_ids[all_ids >= high_water]
+            if len(late_ids):
+                index.add_with_ids(np.vstack([self.index.reconstruct(int(i)) for i in late_ids]), late_ids)  # type: ignore
+            self._install_index(index)
+            self.checkpoint()
+
+        logger.info(f"Re-embedded {len(ids)} chunks into a fresh index.")
+        return len(ids)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 3,
+        hybrid: Optional[bool] = None,
+        query_vector: Optional[np.ndarray] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Top-k chunks for the query. With hybrid retrieval on (config, or `hybrid`),
+        the vector and BM25 candidate lists are merged by reciprocal-rank fusion and
+        `score` is the fused score; `similarity` stays the cosine/L2 similarity.
+        `query_vector` skips embedding the query when it is already embedded.
+        """
         if self.index.ntotal == 0:
             logger.warning("Search attempted on empty FAISS index.")
             return []
 
+        use_hybrid = self._use_hybrid(hybrid)
+        k = max(top_k, self.hybrid_candidates) if use_hybrid else top_k
         # query_vector = self.model.encode([query], convert_to_numpy=True)
-        query_vector = self.embedding_service.get_embeddings([query])
-        distances, indices = self.index.search(query_vector.astype(np.float32), k=top_k) #type: ignore
+        query_vector = self._embed_query(query, query_vector)
+        ids, scores = self._knn_hits(query_vector, k)
+        if use_hybrid:
+            keyword_ids, _ = self._keyword_hits(query, k)
+            results = self._fused_results(query_vector, ids, scores, keyword_ids, top_k)
+        else:
+            results = self._build_results(ids, scores)
+        logger.info(f"Search completed. Found {len(results)} results.")
+        return results
 
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.metadata):
-                results.append({
-                    "score": float(distances[0][i]),
-                    "metadata": self.metadata[idx]
-                })
+    def _use_hybrid(self, hybrid: Optional[bool]) -> bool:
+        return self.sparse_index is not None and (self.hybrid if hybrid is None else hybrid)
 
-        logger.info(f"Search completed. Found {len(results)} results.")
+    def _knn_hits(self, query_vector: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        with self._index_lock.read():
+            # Tombstoned ids are excluded inside FAISS, so top_k stays exact without over-fetching.
+            distances, indices = self.index.search(query_vector, k=k, params=self._search_params) #type: ignore
 
-        return results
+        # ANN indexes pad with -1 when fewer than top_k are found
+        found = indices[0] >= 0
+        return indices[0][found], distances[0][found]
+
+    def _range_hits(
+        self, query_vector: np.ndarray, similarity_threshold: float, limit: int
+    ) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Ids and scores at or above the threshold, best first and capped at `limit`,
+        plus how many passed the threshold before the cap.
+        """
+        radius = self._range_radius(similarity_threshold)
+        ids: Optional[np.ndarray] = None
+        with self._index_lock.read():
+            if radius is not None:
+                try:
+                    lims, distances, indices = self.index.range_search(
+                        query_vector, radius, params=self._search_params
+                    )  # type: ignore
+                    ids, scores = indices[lims[0]:lims[1]], distances[lims[0]:lims[1]]
+                except RuntimeError as e:
+                    logger.warning(f"range_search unavailable ({e}); falling back to top-{limit} search.")
+            if ids is None:
+                # No radius, or no range search for this index type: a wide knn search filtered below is equivalent up to `limit`.
+                scores, ids = self.index.search(query_vector, k=limit, params=self._search_params)  # type: ignore
+                ids, scores = ids[0], scores[0]
+                ids, scores = ids[ids >= 0], scores[ids >= 0]
+
+        similarities = self._to_similarity(scores)
+        keep = similarities >= similarity_threshold
+        ids, scores, similarities = ids[keep], scores[keep], similarities[keep]
+        # Best first; metadata is only read for the rows that survive the cap.
+        order = np.argsort(-similarities, kind="stable")[:limit]
+        return ids[order], scores[order], int(keep.sum())
+
+    def _keyword_hits(
+        self, query: str, limit: int, min_term_match: float = 0.0, corpus: Optional[Dict[str, Any]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        ids, scores, matched = self.sparse_index.search(query, limit, exclude=self.tombstones, corpus=corpus)  #type: ignore
+        keep = matched >= min_term_match
+        return ids[keep], scores[keep]
+
+    def candidates(
+        self,
+        query: str,
+        limit: int,
+        similarity_threshold: Optional[float] = None,
+        hybrid: Optional[bool] = None,
+        query_vector: Optional[np.ndarray] = None,
+        corpus: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        The unfused candidate lists behind `search` (or, with `similarity_threshold`,
+        `search_by_threshold`), for callers that fuse several stores' candidates
+        themselves: `vector` and `keyword` hits, each best first with `id`, its raw
+        `score` (FAISS score or BM25) and `similarity`. `corpus` (summed
+        `SparseIndex.term_stats`) makes BM25 scores comparable across stores.
+        """
+        hits: Dict[str, List[Dict[str, Any]]] = {"vector": [], "keyword": []}
+        if self.index.ntotal == 0:
+            return hits
+
+        query_vector = self._embed_query(query, query_vector)
+        if similarity_threshold is None:
+            ids, scores = self._knn_hits(query_vector, limit)
+            min_term_match = 0.0
+        else:
+            ids, scores, _ = self._range_hits(query_vector, similarity_threshold, limit)
+            min_term_match = self.min_term_match
+        if self._use_hybrid(hybrid):
+            keyword_ids, keyword_scores = self._keyword_hits(query, limit, min_term_match, corpus)
+        else:
+            keyword_ids, keyword_scores = np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        # Keyword hits carry the similarity `_fused_results` gives keyword-only hits: from the stored vector.
+        similarities = {
+            "vector": dict(zip(ids.tolist(), self._to_similarity(scores).tolist())),
+            "keyword": self._similarities_of(query_vector, keyword_ids.tolist()),
+        }
+        metadata = self.metadata_store.get_many(set(ids.tolist()) | set(keyword_ids.tolist()))
+        for name, hit_ids, hit_scores in (("vector", ids, scores), ("keyword", keyword_ids, keyword_scores)):
+            hits[name] = [
+                {"id": doc_id, "score": float(score), "similarity": similarities[name].get(doc_id), "metadata": metadata[doc_id]}
+                for doc_id, score in zip(hit_ids.tolist(), hit_scores.tolist())
+                if doc_id in metadata
+            ]
+        return hits
+
+    def _fused_results(
+        self,
+        query_vector: np.ndarray,
+        vector_ids: np.ndarray,
+        vector_scores: np.ndarray,
+        keyword_ids: np.ndarray,
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Reciprocal-rank fusion: each list contributes 1 / (rrf_k + rank) per id.
+        Keyword-only hits get their similarity from the stored vector when the
+        index can reconstruct it (flat, HNSW), else None.
+        """
+        fused: Dict[int, float] = {}
+        for ranked in (vector_ids, keyword_ids):
+            for rank, doc_id in enumerate(ranked.tolist()):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+        top = sorted(fused.items(), key=lambda item: -item[1])[:limit]
+
+        similarities = dict(zip(vector_ids.tolist(), self._to_similarity(vector_scores).tolist()))
+        missing = [doc_id for doc_id, _ in top if doc_id not in similarities]
+        similarities.update(self._similarities_of(query_vector, missing))
+
+        metadata = self.metadata_store.get_many(doc_id for doc_id, _ in top)
+        return [
+            {
+                "score": round(score, 6),
+                "similarity": round(float(similarities[doc_id]), 3) if similarities.get(doc_id) is not None else None,
+                "metadata": metadata[doc_id],
+            }
+            for doc_id, score in top
+            if doc_id in metadata
+        ]
+
+    def _similarities_of(self, query_vector: np.ndarray, ids: List[int]) -> Dict[int, Optional[float]]:
+        if not ids:
+            return {}
+        try:
+            with self._index_lock.read():
+                vectors = np.vstack([self.index.reconstruct(int(i)) for i in ids])
+        except RuntimeError:
+            return {}
+        if self.metric == "cosine":
+            scores = vectors @ query_vector[0]
+        else:
+            scores = ((vectors - query_vector[0]) ** 2).sum(axis=1)
+        return dict(zip(ids, self._to_similarity(scores).tolist()))
+
+    def _embed_query(self, query: str, query_vector: Optional[np.ndarray] = None) -> np.ndarray:
+        if query_vector is None:
+            query_vector = self.embedding_service.embed_query(query)
+        return self._prepare_vectors(query_vector)
 
-    def save_index(self):
-        faiss.write_index(
-            self.index,
-            self.index_path
+    def search_by_threshold(
+        self,
+        query: str,
+        similarity_threshold: float,
+        max_results: Optional[int] = None,
+        query_vector: Optional[np.ndarray] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns every chunk whose similarity to the query is at least
+        `similarity_threshold`, best first, capped at `max_results` (or
+        `max_range_results`). Uses FAISS `range_search`, so nothing above the
+        threshold is lost to a fixed top_k and nothing below it is fetched.
+
+        With hybrid retrieval on, BM25 hits containing at least `min_term_match`
+        of the query terms are fused in as well, so exact-term queries (model
+        names, acronyms) that embed poorly still find their chunks locally.
+        """
+        if self.index.ntotal == 0:
+            logger.warning("Search attempted on empty FAISS index.")
+            return []
+
+        limit = max_results or self.max_range_results
+        query_vector = self._embed_query(query, query_vector)
+        ids, scores, above = self._range_hits(query_vector, similarity_threshold, limit)
+        if self._use_hybrid(None):
+            keyword_ids, _ = self._keyword_hits(query, limit, self.min_term_match)
+            results = self._fused_results(query_vector, ids, scores, keyword_ids, limit)
+        else:
+            results = self._build_results(ids, scores)
+        logger.info(
+            f"Threshold search (>= {similarity_threshold}) found {above} chunks; returning {len(results)}."
         )
+        return results
 
-        with open(self.metadata_path, "w", encoding="utf-8") as f:
-            json.dump(
-                self.metadata,
-                f,
-                ensure_ascii=False,
-                indent=2
-            )
+    def _build_results(self, ids: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        similarities = self._to_similarity(scores)
+        metadata = self.metadata_store.get_many(int(i) for i in ids)
+        return [
+            {"score": float(score), "similarity": round(float(similarity), 3), "metadata": metadata[int(idx)]}
+            for idx, score, similarity in zip(ids, scores, similarities)
+            if int(idx) in metadata
+        ]
+
+    def save_index(self, force: bool = False):
+        """
+        Adds are already durable in the write-ahead log, so this only writes a new
+        checkpoint once the log has grown past `checkpoint_wal_bytes` (or when forced).
+        """
+        if force or self.wal.size() >= self.checkpoint_wal_bytes:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """
+        Atomically replaces the index file with the current in-memory index and
+        then empties the write-ahead log. A crash between the two steps is safe:
+        replay skips batches the checkpoint already contains.
+        """
+        with self._lock:
+            tmp_path = self.index_path + ".tmp"
+            faiss.write_index(self.index, tmp_path)
+            with open(tmp_path, "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.index_path)
+
+            self.wal.truncate()
+        logger.info(f"FAISS index checkpointed with {self.index.ntotal} vectors.")
+
+    def close(self):
+        # Let a running compaction finish before the files it writes are closed.
+        with self._compaction_lock:
+            if self.wal.size():
+                self.checkpoint()
+            self.wal.close()
+            self.metadata_store.close()
+            if self.sparse_index is not None:
+                self.sparse_index.close()
+
+    def delete_papers(self, title: Optional[str] = None, url: Optional[str] = None) -> int:
+        """
+        Deletes every chunk of the paper(s) matching title and/or url.
+
+        Chunks are tombstoned (a few SQLite rows plus an in-memory set), hidden from
+        searches straight away, and physically removed by a background compaction
+        once the tombstone ratio passes `compaction_tombstone_ratio`.
+        """
+        ids = self.metadata_store.ids_for(title=title, url=url)
+        if not ids:
+            return 0
+
+        ratio = self._tombstone(ids)
+        logger.info(f"Tombstoned {len(ids)} chunks (title={title!r}, url={url!r}); ratio={ratio:.2f}.")
+        return len(ids)
+
+    def deduplicate(self) -> Dict[str, int]:
+        """
+        One-off cleanup for stores that collected duplicate chunks before ingestion
+        checked content hashes: hashes any rows that lack one, then tombstones every
+        chunk whose text matches an earlier chunk (the lowest id is kept).
+        """
+        hashed = self.metadata_store.backfill_hashes()
+        duplicates = self.metadata_store.duplicate_ids()
+        if duplicates:
+            ratio = self._tombstone(duplicates)
+            logger.info(f"🧹 Tombstoned {len(duplicates)} duplicate chunks; ratio={ratio:.2f}.")
+        else:
+            logger.info("🧹 No duplicate chunks found.")
+        return {"hashed": hashed, "duplicates": len(duplicates)}
+
+    def _tombstone(self, ids: List[int]) -> float:
+        """
+        Hides chunks from searches and schedules compaction if enough are dead.
+        Returns the tombstone ratio.
+        """
+        with self._lock:
+            self.metadata_store.add_tombstones(ids)
+            self.tombstones = self.tombstones | set(ids)
+            self._refresh_search_params()
+            ratio = len(self.tombstones) / max(self.index.ntotal, 1)
+
+        self._notify("delete")
+        if ratio >= self.compaction_tombstone_ratio:
+            self.compact_in_background()
+        return ratio
+
+    def compact_in_background(self) -> Optional[threading.Thread]:
+        if self._compaction_lock.locked():
+            return None
+        thread = threading.Thread(target=self.compact, name="vector-store-compaction", daemon=True)
+        thread.start()
+        return thread
+
+    def compact(self) -> int:
+        """
+        Physically removes tombstoned vectors, checkpoints the index and only then
+        purges their metadata rows, so a crash at any point leaves the store consistent.
+        Flat and IVF indexes drop ids in place; HNSW is rebuilt from the live vectors
+        outside the lock, then catches up on any adds that landed meanwhile.
+        """
+        if not self._compaction_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self._lock:
+                dead = set(self.tombstones)
+                if not dead:
+                    return 0
+                if supports_remove(self.index):
+                    with self._index_lock.write():
+                        self.index.remove_ids(
+                            faiss.IDSelectorBatch(np.fromiter(dead, dtype=np.int64, count=len(dead)))
+                        )
+                    rebuild = None
+                else:
+                    rebuild = self._live_vectors(exclude=dead)
+                    high_water = self._next_id
+                    source_index = self.index
+
+            if rebuild is not None:
+                index = self._build_id_mapped(index_type_of(source_index), *rebuild)
+                with self._lock:
+                    if self.index is not source_index:
+                        logger.warning("Index was rebuilt during compaction; will retry later.")
+                        return 0
+                    all_ids = self._index_ids()
+                    late_ids = all_ids[all_ids >= high_water]
+                    if len(late_ids):
+                        late_vectors = np.vstack([self.index.reconstruct(int(i)) for i in late_ids])
+                        index.add_with_ids(late_vectors, late_ids)  # type: ignore
+                    self._install_index(index)
+
+            with self._lock:
+                self.checkpoint()
+                self._forget_tombstones(dead)
+
+            if self.sparse_index is not None:
+                self.sparse_index.optimize()
+            logger.info(f"Compaction removed {len(dead)} vectors; {self.index.ntotal} remain.")
+            return len(dead)
+        finally:
+            self._compaction_lock.release()
+
+    def _forget_tombstones(self, ids: set):
+        """
+        Drops tombstones (and their metadata) for vectors no longer in the index.
+        Only safe after a checkpoint, hence callers checkpoint first.
+        """
+        if not ids:
+            return
+        self.tombstones = self.tombstones - ids
+        self._refresh_search_params()
+        if self.sparse_index is not None:
+            # Texts are read before the purge so the keyword index knows which terms to rewrite.
+            metadata = self.metadata_store.get_many(ids)
+            self.sparse_index.remove(list(metadata), [chunk_text(meta) for meta in metadata.values()])
+        self.metadata_store.purge(ids)
 
-            logger.info("FAISS index and metadata saved successfully.")
-    
     def delete_index(self):
-        pass
+        """
+        Wipes the whole store: index file, write-ahead log, metadata and tombstones.
+        """
+        with self._compaction_lock, self._lock:
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            self.wal.truncate()
+            self.metadata_store.clear()
+            if self.sparse_index is not None:
+                self.sparse_index.clear()
+            index = faiss.IndexIDMap2(build_index("flat", self.embedding_dim, metric=faiss_metric(self.metric)))
+            configure_search(index, self.index_params)
+            self.tombstones = set()
+            self._next_id = 0
+            self._install_index(index)
+        self._notify("delete")
+        logger.info("FAISS index and metadata deleted.")
 
 
 
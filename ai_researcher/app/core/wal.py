@@ -0,0 +1,93 @@
+# app/core/wal.py
+
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+WAL_MAGIC = b"VWAL"
+# magic, crc32 of payload, rows, dim, metadata bytes
+HEADER = struct.Struct("<4sIIII")
+
+WalRecord = Tuple[np.ndarray, np.ndarray, List[Dict[str, Any]]]
+
+
+class WriteAheadLog:
+    """
+    Append-only log of the vector batches added since the last index checkpoint.
+
+    Each record holds the FAISS ids, the float32 vectors and the chunk metadata of
+    one batch and is fsynced before `append` returns, so an ingest only pays for
+    the bytes it adds. On startup the records are replayed on top of the last
+    checkpoint; a torn record at the tail (crash mid-write) is detected by its
+    length/CRC and cut off.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(self.path, "ab")
+
+    def append(self, ids: Sequence[int], vectors: np.ndarray, metadatas: Sequence[Dict[str, Any]]):
+        ids_bytes = np.asarray(ids, dtype=np.int64).tobytes()
+        vector_bytes = np.ascontiguousarray(vectors, dtype=np.float32).tobytes()
+        meta_bytes = json.dumps(list(metadatas), ensure_ascii=False).encode("utf-8")
+        payload = ids_bytes + vector_bytes + meta_bytes
+        header = HEADER.pack(WAL_MAGIC, zlib.crc32(payload), len(ids), vectors.shape[1], len(meta_bytes))
+
+        with self._lock:
+            self._file.write(header + payload)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def replay(self) -> Iterator[WalRecord]:
+        """
+        Yields (ids, vectors, metadatas) for every intact record, truncating any torn tail.
+        """
+        with self._lock:
+            self._file.flush()
+            valid_end = 0
+            with open(self.path, "rb") as f:
+                while True:
+                    header = f.read(HEADER.size)
+                    if len(header) < HEADER.size:
+                        break
+                    magic, crc, rows, dim, meta_len = HEADER.unpack(header)
+                    payload_len = rows * 8 + rows * dim * 4 + meta_len
+                    payload = f.read(payload_len)
+                    if magic != WAL_MAGIC or len(payload) < payload_len or zlib.crc32(payload) != crc:
+                        break
+
+                    ids = np.frombuffer(payload, dtype=np.int64, count=rows)
+                    vectors = np.frombuffer(payload, dtype=np.float32, count=rows * dim, offset=rows * 8)
+                    metadatas = json.loads(payload[rows * 8 + rows * dim * 4:].decode("utf-8"))
+                    valid_end = f.tell()
+                    yield ids, vectors.reshape(rows, dim), metadatas
+
+            if valid_end < os.path.getsize(self.path):
+                logger.warning(f"Truncating torn write-ahead log tail at byte {valid_end}.")
+                self._file.truncate(valid_end)
+                os.fsync(self._file.fileno())
+
+    def size(self) -> int:
+        with self._lock:
+            return os.fstat(self._file.fileno()).st_size
+
+    def truncate(self):
+        """
+        Drops every record; called once their contents are part of a durable checkpoint.
+        """
+        with self._lock:
+            self._file.truncate(0)
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            self._file.close()
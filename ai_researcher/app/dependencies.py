@@ -0,0 +1,13 @@
+# app/dependencies.py
+
+from functools import lru_cache
+from app.services.rag_service import RAGService
+
+
+@lru_cache(maxsize=1)
+def get_rag_service() -> RAGService:
+    """
+    The process-wide RAGService. Cheap to create: its components load lazily
+    (or in the lifespan warm-up), so importing the app does not load any models.
+    """
+    return RAGService()
@@ -1,14 +1,35 @@
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.config_loader import get_section
+from app.dependencies import get_rag_service
 from app.routes import router as rag_router
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Models, the FAISS index and the Gemini client are not loaded at import time.
+    With `server.warm_up` on, they load in a background thread after the server
+    binds; `/api/ready` reports progress. Otherwise each loads on first use.
+    """
+    rag_service = get_rag_service()
+    if get_section("server").get("warm_up", True):
+        threading.Thread(target=rag_service.warm_up, name="rag-warm-up", daemon=True).start()
+    yield
+    logger.info("Shutting down: closing HTTP clients and flushing vector store.")
+    await rag_service.aclose()
+
+
 app = FastAPI(
     title="AI Research Assistant API",
     version="1.0.0",
-    description="Backend API for research query and summarization using RAG architecture."
+    description="Backend API for research query and summarization using RAG architecture.",
+    lifespan=lifespan,
 )
 
 # CORS setup — useful for later Streamlit / frontend use
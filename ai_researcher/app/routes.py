@@ -1,19 +1,28 @@
-from fastapi import  APIRouter, HTTPException
-from app.schemas import QueryRequest, QueryResponse 
+from fastapi import  APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Optional
+from app.schemas import QueryRequest, QueryResponse, IngestRequest, IngestResponse, DeleteResponse, ReadinessResponse, JobStatusResponse, CollectionsResponse
 from app.utils.logger import get_logger
+from app.utils.response_formatter import format_sse
+from app.dependencies import get_rag_service
 from app.services.rag_service import RAGService
+from app.core.llm_cache import cache_bypassed
+from app.core.vector_collections import COLLECTION_NAME_PATTERN, CollectionNotFound, DEFAULT_COLLECTION
 
 DEFAULT_SIMILARITY_THRESHOLD = 0.4
 
 router = APIRouter()
 logger = get_logger(__name__)
-rag_service = RAGService()
 
 
 @router.post("/query", response_model = QueryResponse)
 
 
-async def query_knowledge(request: QueryRequest):
+async def query_knowledge(
+    request: QueryRequest,
+    rag_service: RAGService = Depends(get_rag_service),
+    x_cache_bypass: bool = Header(default=False),
+):
 
     threshold_value = request.similarity_threshold
     if threshold_value == None:
@@ -21,22 +30,178 @@ async def query_knowledge(request: QueryRequest):
 
     try:
         logger.info(f"Recieved your Query : {request.query}")
-        result = rag_service.query_knowledge(
-            query=request.query,
-            similarity_threshold=threshold_value,
-            top_k=request.top_k
-        )
+        # `X-Cache-Bypass: true` forces a fresh Gemini answer (and does not cache it).
+        with cache_bypassed(x_cache_bypass):
+            result = await rag_service.aquery_knowledge(
+                query=request.query,
+                similarity_threshold=threshold_value,
+                top_k=request.top_k,
+                collection=request.collection,
+            )
 
         # if result["status"] != "success":
         #     raise HTTPException(status_code=400, detail=result["message"])
         
         return result
     
+    except CollectionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.exception(f"❎ error while processing a query request")
         raise HTTPException(status_code=500, detail=str(e))
-    
 
 
+@router.post("/query/stream")
+async def stream_query(
+    request: QueryRequest,
+    rag_service: RAGService = Depends(get_rag_service),
+    x_cache_bypass: bool = Header(default=False),
+):
+    """
+    Server-sent events: `results` once retrieval is done, then `token` events as the
+    summary is generated, then `done` (or `error`).
+    """
+    threshold_value = request.similarity_threshold
+    if threshold_value == None:
+        threshold_value = DEFAULT_SIMILARITY_THRESHOLD
+
+    logger.info(f"Recieved your streaming Query : {request.query}")
+
+    async def events():
+        # Set inside the generator: the response body is streamed after this handler returns.
+        try:
+            with cache_bypassed(x_cache_bypass):
+                async for event in rag_service.astream_query(
+                    query=request.query,
+                    similarity_threshold=threshold_value,
+                    top_k=request.top_k,
+                    collection=request.collection,
+                ):
+                    yield format_sse(event["event"], event["data"])
+        except Exception as e:
+            logger.exception(f"❎ error while streaming a query response")
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/ingest", response_model = IngestResponse)
+def ingest_papers(request: IngestRequest, rag_service: RAGService = Depends(get_rag_service)):
+    # Plain `def` so FastAPI runs the CPU-bound ingest in its threadpool instead of the event loop.
+    try:
+        logger.info(f"Recieved ingest request with {len(request.papers)} papers")
+        # A named collection is created by its first ingest.
+        with rag_service.collection(request.collection, create=True) as store:
+            pipeline = rag_service.ingestion_for(store)
+            if request.batch_size:
+                from app.services.ingestion import IngestionPipeline
+                pipeline = IngestionPipeline(
+                    store,
+                    rag_service.embedding_service,
+                    batch_size=request.batch_size,
+                )
+
+            stats = pipeline.ingest(paper.model_dump() for paper in request.papers)
+        return {"status": "success", **stats}
+
+    except Exception as e:
+        logger.exception(f"❎ error while ingesting papers")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/maintenance/dedupe", response_model = JobStatusResponse)
+def dedupe_store(
+    collection: Optional[str] = Query(default=None, pattern=COLLECTION_NAME_PATTERN),
+    rag_service: RAGService = Depends(get_rag_service),
+):
+    # One-off cleanup of duplicate chunks in an existing store, run as a background job.
+    try:
+        job = rag_service.submit_dedupe_job(collection)
+    except CollectionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    job.pop("payload")
+    return {**job, "papers": 0}
+
+
+@router.get("/jobs/{job_id}", response_model = JobStatusResponse)
+def job_status(job_id: str, rag_service: RAGService = Depends(get_rag_service)):
+    # Progress of a background ingestion job started by an ArXiv fallback.
+    job = rag_service.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+    payload = job.pop("payload")
+    return {**job, "papers": len(payload.get("papers", []))}
+
+
+@router.delete("/papers", response_model = DeleteResponse)
+def delete_papers(
+    title: Optional[str] = None,
+    url: Optional[str] = None,
+    collection: Optional[str] = Query(default=None, pattern=COLLECTION_NAME_PATTERN),
+    rag_service: RAGService = Depends(get_rag_service),
+):
+    if title is None and url is None:
+        raise HTTPException(status_code=400, detail="Provide a title or url to delete.")
+
+    try:
+        # Compaction of the tombstoned chunks runs in the same collection's store.
+        with rag_service.collection(collection) as store:
+            deleted = store.delete_papers(title=title, url=url)
+        if not deleted:
+            raise HTTPException(status_code=404, detail="No indexed chunks match that paper.")
+        return {"status": "success", "deleted": deleted}
+
+    except HTTPException:
+        raise
+    except CollectionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.exception(f"❎ error while deleting papers")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/metrics")
+async def metrics(rag_service: RAGService = Depends(get_rag_service)):
+    # Report without forcing the embedding model to load.
+    embedding_service = rag_service.loaded("embedding_service")
+    cache = embedding_service.cache if embedding_service else None
+    batcher = embedding_service.batcher if embedding_service else None
+    summarizer = rag_service.loaded("summarizer")
+    semantic_cache = rag_service.loaded("semantic_cache")
+    llm_cache = getattr(summarizer.llm, "cache", None) if summarizer else None
+    fetcher = rag_service.loaded("fetcher")
+    jobs = rag_service.loaded("jobs")
+    reranker = rag_service.loaded("reranker")
+    collections = rag_service.loaded("collections")
+    vector_store = rag_service.loaded("vector_store")
+    return {
+        "embedding_cache": cache.stats() if cache else None,
+        "query_batcher": batcher.stats() if batcher else None,
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "semantic_cache": semantic_cache.stats() if semantic_cache else None,
+        "arxiv_cache": fetcher.cache_stats() if fetcher else None,
+        "ingestion_jobs": jobs.stats() if jobs else None,
+        "reranker": reranker.stats() if reranker else None,
+        "collections": collections.stats() if collections else None,
+        "shards": vector_store.stats() if hasattr(vector_store, "shards") else None,
+        "pipeline_stages": {name: stage.stats() for name, stage in rag_service.stages.items()},
+    }
+
+
+@router.get("/collections", response_model = CollectionsResponse)
+def list_collections(rag_service: RAGService = Depends(get_rag_service)):
+    # Known collections (configured or on disk) and which are loaded right now.
+    stats = rag_service.collections.stats()
+    return {"collections": [DEFAULT_COLLECTION, *stats["known"]], "loaded": stats["loaded"]}
 
 
+@router.get("/ready", response_model = ReadinessResponse)
+async def readiness(rag_service: RAGService = Depends(get_rag_service)):
+    # 503 until every component is loaded, so load balancers hold traffic during warm-up.
+    status = rag_service.readiness()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
@@ -1,17 +1,24 @@
 from pydantic import BaseModel, Field 
 from typing import List, Dict, Optional, Any
 from typing import Optional
+from app.core.vector_collections import COLLECTION_NAME_PATTERN
 
 
 class QueryRequest(BaseModel):
     query:str 
     similarity_threshold: Optional[float] = Field(default=0.5, ge=0.3, le=0.6)
-    top_k: int = 5 
+    # Most chunks above the threshold to return; None returns all of them (up to vector_db.max_range_results).
+    top_k: Optional[int] = Field(default=5, ge=1)
+    # Collection to search; None searches the default store
+    collection: Optional[str] = Field(default=None, pattern=COLLECTION_NAME_PATTERN)
 
 
 class SearchResult(BaseModel):
     score: float
     # similarity_threshold: str 
+    similarity: Optional[float] = None
+    # Cross-encoder relevance, set when the reranker ordered these results
+    rerank_score: Optional[float] = None
     metadata: Dict[str, Any]
 
 
@@ -22,3 +29,80 @@ class QueryResponse(BaseModel):
     summary: str
     # results: Any
     message: Optional[str] = None
+    # True when served from the semantic answer cache
+    cached: bool = False
+    # Background ingestion job indexing the papers this answer was built from
+    job_id: Optional[str] = None
+    # Collection the answer was retrieved from
+    collection: Optional[str] = None
+    # Milliseconds spent per pipeline stage (cache, search, rerank, arxiv, ingest, llm)
+    timings: Optional[Dict[str, float]] = None
+    # Size of the summarization prompt: prompt_tokens, context_tokens, chunks packed and dropped
+    prompt: Optional[Dict[str, Any]] = None
+
+
+
+class PaperIn(BaseModel):
+    title: str
+    summary: str = ""
+    content: Optional[str] = None
+    link: str = ""
+    source: str = "ingest"
+    authors: List[str] = []
+    published: Optional[str] = None
+
+
+class IngestRequest(BaseModel):
+    papers: List[PaperIn]
+    batch_size: Optional[int] = Field(default=None, ge=1, le=4096)
+    # Collection to add the papers to (created on first use); None → the default store
+    collection: Optional[str] = Field(default=None, pattern=COLLECTION_NAME_PATTERN)
+
+
+class IngestResponse(BaseModel):
+    status: str
+    papers: int
+    chunks: int
+    # Chunks skipped because the store already held them
+    duplicates: int = 0
+    batches: int
+    elapsed_seconds: float
+    embed_seconds: float
+    add_seconds: float
+    chunks_per_second: float
+    papers_per_second: float
+
+
+class CollectionsResponse(BaseModel):
+    collections: List[str]
+    # Currently loaded collections: in_use, idle_seconds, vectors
+    loaded: Dict[str, Dict[str, Any]]
+
+
+class DeleteResponse(BaseModel):
+    status: str
+    deleted: int
+
+
+class ComponentStatus(BaseModel):
+    loaded: bool
+    load_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    components: Dict[str, ComponentStatus]
+
+
+class JobStatusResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    papers: int
+    progress: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
@@ -0,0 +1,155 @@
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config_loader import get_section
+from app.core.embedding_service import EmbeddingService
+from app.core.vector_store import VectorStore
+from app.utils.logger import get_logger
+from app.utils.text_cleaner import clean_text, chunk_text
+
+logger = get_logger(__name__)
+
+DEFAULT_BATCH_SIZE = 256
+
+
+class IngestionPipeline:
+    """
+    Bulk ingestion of papers into the vector store:
+    1️⃣ Clean the paper text
+    2️⃣ Chunk it
+    3️⃣ Embed a whole batch of chunks in one call
+    4️⃣ Add the batch to FAISS with one contiguous `index.add`
+
+    Papers are pulled lazily from any iterable, so only one batch of chunks is
+    held in memory at a time regardless of how long the input stream is.
+    Chunks of already indexed papers, and chunks whose text is already stored,
+    are dropped before step 3️⃣.
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        embedding_service: Optional[EmbeddingService] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.vector_store = vector_store
+        self.embedding_service = embedding_service or vector_store.embedding_service
+        config = get_section("ingestion")
+        self.batch_size = batch_size or config.get("batch_size", DEFAULT_BATCH_SIZE)
+        # Skip papers and chunks the store already holds before embedding them.
+        self.dedupe = config.get("dedupe", True)
+
+    def _iter_chunks(
+        self, papers: Iterable[Dict[str, Any]], counters: Dict[str, int]
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Cleans and chunks papers one at a time, yielding (chunk text, metadata) pairs.
+        Uses the full `content` of a paper when present, otherwise its arXiv `summary`.
+        """
+        for paper in papers:
+            counters["papers"] += 1
+            text = paper.get("content") or paper.get("summary") or ""
+            cleaned_text = clean_text(text)
+            if not cleaned_text:
+                logger.warning(f"Skipping paper with no text: '{paper.get('title', '')}'")
+                continue
+
+            for chunk in chunk_text(cleaned_text, source=paper["title"]):
+                yield chunk["text"], {
+                    "title": paper["title"],
+                    "chunk_id": chunk["chunk_id"],
+                    "source": paper.get("source", "arxiv"),
+                    "url": paper.get("link", ""),
+                    "chunk": chunk,
+                }
+
+    def prepare(self, papers: Iterable[Dict[str, Any]]) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Cleans and chunks papers without embedding or indexing them.
+        Returns (chunk texts, chunk metadata) in the shape `ingest` would store.
+        """
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        for text, metadata in self._iter_chunks(papers, {"papers": 0}):
+            texts.append(text)
+            metadatas.append(metadata)
+        return texts, metadatas
+
+    def _iter_batches(
+        self, chunks: Iterator[Tuple[str, Dict[str, Any]]]
+    ) -> Iterator[Tuple[List[str], List[Dict[str, Any]]]]:
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        for text, metadata in chunks:
+            texts.append(text)
+            metadatas.append(metadata)
+            if len(texts) >= self.batch_size:
+                yield texts, metadatas
+                texts, metadatas = [], []
+        if texts:
+            yield texts, metadatas
+
+    def ingest(
+        self,
+        papers: Iterable[Dict[str, Any]],
+        save: bool = True,
+        progress: Optional[Callable[[Dict[str, int]], None]] = None,
+        resume: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Runs the batched clean → chunk → embed → add pipeline over a stream of papers
+        and returns throughput statistics. `progress`, if given, is called after each
+        batch with the papers read and chunks indexed so far.
+
+        `resume` re-runs an interrupted ingest: a paper may have only some of its
+        chunks stored, so chunks are deduplicated by content hash alone rather than
+        skipping every paper whose url is already indexed.
+        """
+        start = time.perf_counter()
+        counters = {"papers": 0}
+        total_chunks = 0
+        duplicates = 0
+        seen: Dict[str, set] = {"urls": set(), "hashes": set()}
+        batches = 0
+        embed_seconds = 0.0
+        add_seconds = 0.0
+
+        for texts, metadatas in self._iter_batches(self._iter_chunks(papers, counters)):
+            if self.dedupe:
+                texts, metadatas, skipped = self.vector_store.filter_new(texts, metadatas, seen, by_url=not resume)
+                duplicates += skipped
+                if not texts:
+                    continue
+
+            t0 = time.perf_counter()
+            embeddings = self.embedding_service.get_embeddings(texts)
+            t1 = time.perf_counter()
+            self.vector_store.add_chunks(metadatas, embeddings)
+            t2 = time.perf_counter()
+
+            embed_seconds += t1 - t0
+            add_seconds += t2 - t1
+            total_chunks += len(metadatas)
+            batches += 1
+            logger.info(f"Ingested batch {batches}: {len(metadatas)} chunks (total {total_chunks}).")
+            if progress is not None:
+                progress({"papers": counters["papers"], "chunks": total_chunks, "duplicates": duplicates, "batches": batches})
+
+        if save and total_chunks:
+            self.vector_store.save_index()
+
+        elapsed = time.perf_counter() - start
+        papers_seen = counters["papers"]
+        stats = {
+            "papers": papers_seen,
+            "chunks": total_chunks,
+            "duplicates": duplicates,
+            "batches": batches,
+            "elapsed_seconds": round(elapsed, 4),
+            "embed_seconds": round(embed_seconds, 4),
+            "add_seconds": round(add_seconds, 4),
+            "chunks_per_second": round(total_chunks / elapsed, 2) if elapsed > 0 else 0.0,
+            "papers_per_second": round(papers_seen / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+        logger.info(f"🧠 Ingestion finished: {stats}")
+        return stats
@@ -0,0 +1,280 @@
+# app/services/job_queue.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+JOB_QUEUE_PATH = "./app/data/jobs/jobs.db"
+# A finished job with the same key inside this window is returned instead of queueing a duplicate.
+DEFAULT_DEDUPE_SECONDS = 3600
+DEFAULT_KEEP_FINISHED = 1000
+
+ACTIVE_STATUSES = ("queued", "running")
+
+JobHandler = Callable[[Dict[str, Any], Callable[[Dict[str, Any]], None]], Dict[str, Any]]
+
+
+class JobInterrupted(Exception):
+    """
+    Raised from a job's `progress` callback once the queue is stopping; the job is re-queued.
+    """
+
+
+class JobQueue:
+    """
+    Durable background job queue backed by SQLite, worked by one daemon thread.
+
+    `submit` persists the job before returning, so queued work survives a
+    restart: jobs still `queued` (or `running` when the process died) are picked
+    up again by the next worker. Jobs carry a dedupe key; submitting a key that
+    is already queued, running, or finished within `dedupe_seconds` returns the
+    existing job instead of doing the work twice.
+
+    `handlers` maps each job kind to a function that gets the job payload and a
+    `progress(dict)` callback and returns the job's result dict. Once the queue
+    is stopping, `progress` raises JobInterrupted so a long job stops at its next
+    report and is re-queued rather than cut off mid-write. A job that already
+    reported progress in an earlier run gets `resumed: True` in its payload, so
+    its handler knows part of the work may be done.
+    """
+
+    def __init__(
+        self,
+        handlers: Dict[str, JobHandler],
+        path: str = JOB_QUEUE_PATH,
+        dedupe_seconds: float = DEFAULT_DEDUPE_SECONDS,
+        keep_finished: int = DEFAULT_KEEP_FINISHED,
+    ):
+        self.handlers = handlers
+        self.dedupe_seconds = dedupe_seconds
+        self.keep_finished = keep_finished
+        self.deduplicated = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._stopping = False
+        self._worker: Optional[threading.Thread] = None
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                dedupe_key TEXT,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+            CREATE INDEX IF NOT EXISTS idx_jobs_dedupe_key ON jobs(dedupe_key);
+            """
+        )
+        # A job left `running` was interrupted by a crash or restart; run it again.
+        resumed = self.conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'").rowcount
+        self.conn.commit()
+        if resumed:
+            logger.warning(f"Re-queued {resumed} interrupted job(s).")
+
+    def submit(self, kind: str, payload: Dict[str, Any], dedupe_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Persists a job and wakes the worker. Returns the job (or the existing duplicate).
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind '{kind}'. Expected one of {sorted(self.handlers)}.")
+        now = time.time()
+        with self._lock:
+            if dedupe_key is not None:
+                row = self.conn.execute(
+                    f"""
+                    SELECT * FROM jobs WHERE kind = ? AND dedupe_key = ?
+                    AND (status IN ({",".join("?" * len(ACTIVE_STATUSES))}) OR (status = 'done' AND finished_at > ?))
+                    ORDER BY created_at DESC LIMIT 1
+                    """,
+                    (kind, dedupe_key, *ACTIVE_STATUSES, now - self.dedupe_seconds),
+                ).fetchone()
+                if row is not None:
+                    self.deduplicated += 1
+                    job = self._row_to_job(row)
+                    logger.info(f"Job {job['id']} already covers key {dedupe_key} ({job['status']}).")
+                    return job
+
+            job_id = uuid.uuid4().hex
+            self.conn.execute(
+                "INSERT INTO jobs (id, kind, dedupe_key, status, payload, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, dedupe_key, json.dumps(payload, ensure_ascii=False), now),
+            )
+            self.conn.commit()
+            self._changed.notify_all()
+        logger.info(f"📥 Queued {kind} job {job_id}.")
+        return self.get(job_id)  #type: ignore
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Blocks until the job finishes (or `timeout` passes) and returns its latest state.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                row = self.conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is None or row[0] not in ACTIVE_STATUSES:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+        return self.get(job_id)
+
+    def start(self) -> "JobQueue":
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._stopping = False
+                self._worker = threading.Thread(target=self._run, name="job-queue-worker", daemon=True)
+                self._worker.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """
+        Stops the worker once its current job finishes or is interrupted at its next
+        progress report; queued jobs stay in the database. Returns False if the
+        worker is still running after `timeout`.
+        """
+        with self._lock:
+            self._stopping = True
+            self._changed.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            if self._worker.is_alive():
+                logger.warning("Job worker is still running a job.")
+                return False
+            self._worker = None
+        return True
+
+    def close(self):
+        # Waits for the worker: its job may still be writing to the stores closed after the queue.
+        self.stop()
+        self.conn.close()
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        # Called with the lock held.
+        row = self.conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        job = self._row_to_job(row)
+        self.conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), job["id"]))
+        self.conn.commit()
+        return job
+
+    def _run(self):
+        while True:
+            with self._lock:
+                job = None
+                while not self._stopping:
+                    job = self._claim()
+                    if job is not None:
+                        break
+                    self._changed.wait()
+                if self._stopping:
+                    return
+            self._execute(job)  #type: ignore
+
+    def _execute(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        logger.info(f"⚙️ Running {job['kind']} job {job_id}.")
+
+        def progress(update: Dict[str, Any]):
+            with self._lock:
+                self.conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(update), job_id))
+                self.conn.commit()
+                if self._stopping:
+                    raise JobInterrupted(job_id)
+
+        payload = job["payload"]
+        if job["progress"] is not None:
+            payload = {**payload, "resumed": True}
+
+        status, result, error = "done", None, None
+        try:
+            result = self.handlers[job["kind"]](payload, progress)
+        except JobInterrupted:
+            with self._lock:
+                self.conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE id = ?", (job_id,))
+                self.conn.commit()
+                self._changed.notify_all()
+            logger.warning(f"⏸️ Job {job_id} interrupted by shutdown; re-queued.")
+            return
+        except Exception as e:
+            status, error = "failed", str(e)
+            logger.exception(f"❌ Job {job_id} failed")
+
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id),
+            )
+            self._prune()
+            self.conn.commit()
+            self._changed.notify_all()
+        logger.info(f"✅ Job {job_id} {status}.")
+
+    def _prune(self):
+        # Keep the newest `keep_finished` finished jobs for status lookups.
+        self.conn.execute(
+            f"""
+            DELETE FROM jobs WHERE status NOT IN ({",".join("?" * len(ACTIVE_STATUSES))}) AND id NOT IN (
+                SELECT id FROM jobs WHERE status NOT IN ({",".join("?" * len(ACTIVE_STATUSES))})
+                ORDER BY finished_at DESC LIMIT ?
+            )
+            """,
+            (*ACTIVE_STATUSES, *ACTIVE_STATUSES, self.keep_finished),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "queued": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "deduplicated": self.deduplicated,
+            "worker_alive": self._worker is not None and self._worker.is_alive(),
+        }
+
+    @staticmethod
+    def _row_to_job(row: tuple) -> Dict[str, Any]:
+        (job_id, kind, dedupe_key, status, payload, progress, result, error,
+         created_at, started_at, finished_at) = row
+        return {
+            "id": job_id,
+            "kind": kind,
+            "dedupe_key": dedupe_key,
+            "status": status,
+            "payload": json.loads(payload),
+            "progress": json.loads(progress) if progress else None,
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+        }
+
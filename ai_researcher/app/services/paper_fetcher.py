@@ -1,24 +1,172 @@
-#type: ignore 
+#type: ignore
 
+import httpx
+import random
 import requests
+import time
 import xml.etree.ElementTree as ET
-from typing import List, Dict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from app.core.config_loader import get_section
+from app.core.llm_cache import MemoryBackend
+from app.utils.concurrency import RateLimiter
 from app.utils.logger import get_logger
 import asyncio
+from contextlib import aclosing
 
 logger = get_logger(__name__)
 
 ARXIV_API_URL = "http://export.arxiv.org/api/query"
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+OPENSEARCH_NS = "{http://a9.com/-/spec/opensearch/1.1/}"
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_MAX_CONCURRENT_PAGES = 2
+# arXiv's API terms ask for no more than one request every three seconds.
+DEFAULT_MIN_REQUEST_INTERVAL = 3.0
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_SECONDS = 1.0
+DEFAULT_TIMEOUT_SECONDS = 15.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Response bytes handed to the incremental parser at a time.
+STREAM_CHUNK_BYTES = 16 * 1024
+DEFAULT_CACHE_TTL_SECONDS = 3600
+DEFAULT_CACHE_MAX_PAGES = 256
 
 
 class PaperFetcher:
     """
     Service to fetch research papers from ArXiv API.
+
+    Large requests are split into pages of `page_size`. The async path reuses one
+    pooled httpx client and fetches pages concurrently (at most
+    `max_concurrent_pages` in flight); every request, sync or async, first waits
+    on a shared rate limiter, and transient failures (429/5xx, timeouts) are
+    retried with exponential backoff that honours `Retry-After`.
+
+    Responses are parsed incrementally while they download, and papers are
+    yielded (`iter_papers` / `aiter_papers`) as soon as their entry is complete.
+    Complete pages are kept in a TTL cache.
     """
 
-    def __init__(self):
+    def __init__(self, base_url: Optional[str] = None, **overrides):
+        config = {**get_section("arxiv"), **overrides}
+        self.base_url = base_url or config.get("base_url", ARXIV_API_URL)
+        self.sort_by = config.get("sort_by", "relevance")
+        self.page_size = config.get("page_size", DEFAULT_PAGE_SIZE)
+        self.max_concurrent_pages = config.get("max_concurrent_pages", DEFAULT_MAX_CONCURRENT_PAGES)
+        self.max_retries = config.get("max_retries", DEFAULT_MAX_RETRIES)
+        self.backoff_seconds = config.get("backoff_seconds", DEFAULT_BACKOFF_SECONDS)
+        self.timeout = config.get("timeout_seconds", DEFAULT_TIMEOUT_SECONDS)
+        self.rate_limiter = RateLimiter(config.get("min_request_interval", DEFAULT_MIN_REQUEST_INTERVAL))
+
+        # Parsed pages keyed by (query, sort, start, page length), so repeated fallbacks skip the network.
+        cache_config = config.get("cache") or {}
+        self.cache_ttl = cache_config.get("ttl_seconds", DEFAULT_CACHE_TTL_SECONDS)
+        self.cache = (
+            MemoryBackend(cache_config.get("max_pages", DEFAULT_CACHE_MAX_PAGES))
+            if cache_config.get("enabled", True)
+            else None
+        )
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session = requests.Session()
+        # Sync retries happen inside urllib3, with the same backoff and Retry-After handling.
+        self._session.mount("http://", HTTPAdapter(max_retries=self._sync_retry()))
+        self._session.mount("https://", HTTPAdapter(max_retries=self._sync_retry()))
         logger.info("PaperFetcher initialized — ready to fetch papers from ArXiv.")
 
+    def _sync_retry(self) -> Retry:
+        return Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_seconds,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=["GET"],
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+
+    def _page_starts(self, max_results: int, first_page_total: Optional[int] = None) -> List[int]:
+        limit = max_results if first_page_total is None else min(max_results, first_page_total)
+        return list(range(0, limit, self.page_size))
+
+    def _params(self, query: str, start: int, max_results: int) -> Dict:
+        return {
+            "search_query": f"all:{query}",
+            "start": start,
+            "max_results": min(self.page_size, max_results - start),
+            "sortBy": self.sort_by,
+        }
+
+    def _cache_key(self, query: str, start: int, max_results: int) -> Tuple:
+        return (query.strip().lower(), self.sort_by, start, min(self.page_size, max_results - start))
+
+    def _cached_page(self, key: Tuple) -> Optional[Dict]:
+        if self.cache is None:
+            return None
+        page = self.cache.get(key)
+        if page is None:
+            self.cache_misses += 1
+        else:
+            self.cache_hits += 1
+        return page
+
+    def _store_page(self, key: Tuple, papers: List[Dict], total: Optional[int]):
+        # Only complete pages are cached; a page cut short by an error is fetched again next time.
+        # A feed without totalResults stays None so cached reads keep paginating until a short page.
+        if self.cache is not None:
+            self.cache.set(key, {"papers": papers, "total": total}, self.cache_ttl)
+
+    def iter_papers(self, query: str, max_results: int = 3) -> Iterator[Dict]:
+        """
+        Yields papers one by one while each page is still downloading. Pages are
+        requested in order; the first one's totalResults decides when to stop.
+        """
+        emitted = _Emitter(max_results)
+        total = None
+        for start in self._page_starts(max_results):
+            if emitted.full or (total is not None and start >= total):
+                return
+            page_meta: Dict = {}
+            for paper in self._stream_page(query, start, max_results, page_meta):
+                if emitted.add(paper):
+                    yield paper
+                if emitted.full:
+                    return
+            total = page_meta["total"]
+            if page_meta["count"] < self.page_size:
+                return
+
+    def _stream_page(self, query: str, start: int, max_results: int, meta: Dict) -> Iterator[Dict]:
+        key = self._cache_key(query, start, max_results)
+        cached = self._cached_page(key)
+        if cached is not None:
+            meta.update(total=cached["total"], count=len(cached["papers"]))
+            yield from (dict(paper) for paper in cached["papers"])
+            return
+
+        self.rate_limiter.wait_sync()
+        parser = FeedParser()
+        papers: List[Dict] = []
+        with self._session.get(
+            self.base_url, params=self._params(query, start, max_results), timeout=self.timeout, stream=True
+        ) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+                for paper in parser.feed(chunk):
+                    papers.append(paper)
+                    yield dict(paper)
+        for paper in parser.close():
+            papers.append(paper)
+            yield dict(paper)
+
+        meta.update(total=parser.total, count=len(papers))
+        self._store_page(key, papers, parser.total)
+
     def fetch_papers(self, query: str, max_results: int = 3) -> List[Dict]:
         """
         Fetches papers from ArXiv based on user query.
@@ -32,37 +180,234 @@ class PaperFetcher:
         """
         logger.info(f"Fetching papers for query: '{query}' (max_results={max_results})")
 
-        params = {
-            "search_query": f"all:{query}",
-            "start": 0,
-            "max_results": max_results
-        }
+        papers: List[Dict] = []
+        try:
+            for paper in self.iter_papers(query, max_results):
+                papers.append(paper)
+        except (requests.exceptions.RequestException, ET.ParseError) as e:
+            logger.error(f"Failed to fetch from ArXiv: {e}")
+
+        logger.info(f"Fetched {len(papers)} papers successfully from ArXiv.")
+        return papers
 
+    def _async_client(self) -> httpx.AsyncClient:
+        # One pooled client per fetcher (and event loop); connections are reused across pages and queries.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client_loop = loop
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrent_pages, max_keepalive_connections=self.max_concurrent_pages),
+            )
+        return self._client
+
+    async def _astream_page(self, query: str, start: int, max_results: int, meta: Dict) -> AsyncIterator[Dict]:
+        """
+        Streams one page, parsing entries as bytes arrive. Transient failures
+        (429/5xx, transport errors) are retried with exponential backoff and jitter;
+        a retry after a partial download re-yields from the start of the page,
+        which callers de-duplicate.
+        """
+        key = self._cache_key(query, start, max_results)
+        cached = self._cached_page(key)
+        if cached is not None:
+            meta.update(total=cached["total"], count=len(cached["papers"]))
+            for paper in cached["papers"]:
+                yield dict(paper)
+            return
+
+        params = self._params(query, start, max_results)
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.wait()
+            parser = FeedParser()
+            papers: List[Dict] = []
+            try:
+                async with self._async_client().stream("GET", self.base_url, params=params) as response:
+                    if response.status_code in RETRY_STATUSES:
+                        retry_after = response.headers.get("Retry-After")
+                        error = f"HTTP {response.status_code}"
+                    else:
+                        response.raise_for_status()
+                        async for chunk in response.aiter_bytes(STREAM_CHUNK_BYTES):
+                            for paper in parser.feed(chunk):
+                                papers.append(paper)
+                                yield dict(paper)
+                        for paper in parser.close():
+                            papers.append(paper)
+                            yield dict(paper)
+
+                        meta.update(total=parser.total, count=len(papers))
+                        self._store_page(key, papers, parser.total)
+                        return
+            except httpx.TransportError as e:
+                retry_after, error = None, str(e) or type(e).__name__
+
+            if attempt == self.max_retries:
+                raise httpx.HTTPError(f"ArXiv page start={start} failed after {attempt + 1} attempts: {error}")
+            delay = self._backoff(attempt, retry_after)
+            logger.warning(f"ArXiv page start={start} failed ({error}); retrying in {delay:.2f}s.")
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff_seconds * (2 ** attempt) * (1 + random.random() * 0.1)
+
+    async def aiter_papers(self, query: str, max_results: int = 3) -> AsyncIterator[Dict]:
+        """
+        Async generator of papers. The first page is streamed straight through and
+        tells how many results exist; the remaining pages are then fetched
+        concurrently (each parsed as it downloads) and yielded in order of `start`.
+        """
+        emitted = _Emitter(max_results)
+        meta: Dict = {}
+        async with aclosing(self._astream_page(query, 0, max_results, meta)) as first_page:
+            async for paper in first_page:
+                if emitted.add(paper):
+                    yield paper
+                if emitted.full:
+                    return
+
+        if meta["count"] < self.page_size:
+            return
+        starts = self._page_starts(max_results, meta["total"])[1:]
+        semaphore = asyncio.Semaphore(self.max_concurrent_pages)
+
+        async def collect(start: int) -> List[Dict]:
+            async with semaphore:
+                return [paper async for paper in self._astream_page(query, start, max_results, {})]
+
+        tasks = [asyncio.create_task(collect(start)) for start in starts]
         try:
-            response = requests.get(ARXIV_API_URL, params=params, timeout=10)
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
+            for task in tasks:
+                for paper in await task:
+                    if emitted.add(paper):
+                        yield paper
+                    if emitted.full:
+                        return
+        finally:
+            # The consumer may stop early; do not leave page downloads running.
+            for task in tasks:
+                task.cancel()
+
+    async def afetch_papers(self, query: str, max_results: int = 3) -> List[Dict]:
+        """
+        Async variant of `fetch_papers`, collecting `aiter_papers`.
+        """
+        logger.info(f"Fetching papers for query: '{query}' (max_results={max_results}, async)")
+        start_time = time.perf_counter()
+
+        papers: List[Dict] = []
+        try:
+            async for paper in self.aiter_papers(query, max_results):
+                papers.append(paper)
+        except (httpx.HTTPError, ET.ParseError) as e:
             logger.error(f"Failed to fetch from ArXiv: {e}")
-            return []
+            if not papers:
+                return []
 
-        # Parse the XML feed
-        root = ET.fromstring(response.text)
-        papers = []
+        logger.info(
+            f"Fetched {len(papers)} papers successfully from ArXiv in {time.perf_counter() - start_time:.2f}s."
+        )
+        return papers
 
-        for entry in root.findall("{http://www.w3.org/2005/Atom}entry"):
-            paper = {
-                "title": entry.find("{http://www.w3.org/2005/Atom}title").text.strip(),
-                "summary": entry.find("{http://www.w3.org/2005/Atom}summary").text.strip(),
-                "authors": [author.find("{http://www.w3.org/2005/Atom}name").text for author in entry.findall("{http://www.w3.org/2005/Atom}author")],
-                "published": entry.find("{http://www.w3.org/2005/Atom}published").text,
-                "link": entry.find("{http://www.w3.org/2005/Atom}id").text
-            }
-            papers.append(paper)
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
-        logger.info(f"Fetched {len(papers)} papers successfully from ArXiv.")
+    def cache_stats(self) -> Dict:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "entries": self.cache.size() if self.cache is not None else 0,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+        }
+
+    @staticmethod
+    def parse_page(xml_text: str) -> Tuple[List[Dict], int]:
+        """
+        Parses one complete Atom page into papers plus the feed's opensearch:totalResults.
+        """
+        parser = FeedParser()
+        papers = parser.feed(xml_text.encode("utf-8")) + parser.close()
+        return papers, parser.total if parser.total is not None else len(papers)
+
+    @staticmethod
+    def parse_feed(xml_text: str) -> List[Dict]:
+        return PaperFetcher.parse_page(xml_text)[0]
+
+
+class FeedParser:
+    """
+    Incremental Atom parser: feed it response bytes as they arrive and it returns
+    the papers whose <entry> elements are complete. Parsed entries are detached
+    from the tree, so memory stays bounded by one entry plus the unparsed tail
+    rather than the whole feed.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root = None
+        self.total: Optional[int] = None
+
+    def feed(self, data: bytes) -> List[Dict]:
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self) -> List[Dict]:
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> List[Dict]:
+        papers = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                continue
+            if element.tag == f"{ATOM_NS}entry":
+                papers.append(parse_entry(element))
+                self._root.remove(element)
+            elif element.tag == f"{OPENSEARCH_NS}totalResults":
+                self.total = int(element.text)
         return papers
 
 
+def parse_entry(entry) -> Dict:
+    return {
+        "title": entry.find(f"{ATOM_NS}title").text.strip(),
+        "summary": entry.find(f"{ATOM_NS}summary").text.strip(),
+        "authors": [author.find(f"{ATOM_NS}name").text for author in entry.findall(f"{ATOM_NS}author")],
+        "published": entry.find(f"{ATOM_NS}published").text,
+        "link": entry.find(f"{ATOM_NS}id").text
+    }
+
+
+class _Emitter:
+    """
+    De-duplicates papers by link (pages can overlap when arXiv results shift,
+    and retried pages are re-streamed) and stops at `limit`.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.seen = set()
+
+    @property
+    def full(self) -> bool:
+        return len(self.seen) >= self.limit
+
+    def add(self, paper: Dict) -> bool:
+        if self.full or paper["link"] in self.seen:
+            return False
+        self.seen.add(paper["link"])
+        return True
+
 if __name__ == "__main__":
     fetcher = PaperFetcher()
     results = fetcher.fetch_papers("nuclear fissions ", max_results=3)
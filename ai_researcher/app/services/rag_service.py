@@ -1,13 +1,44 @@
-from typing import Dict, Any, List
-from app.core.embedding_service import EmbeddingService
-from app.core.vector_store import VectorStore
-from app.services.paper_fetcher import PaperFetcher  #type: ignore 
-from app.utils.text_cleaner import clean_text, chunk_text
+import asyncio
+import hashlib
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from app.core.config_loader import get_section
+from app.core.llm_cache import bypass_requested
+from app.core.vector_collections import DEFAULT_COLLECTION
+import numpy as np
+from app.utils.concurrency import build_stages
 from app.utils.logger import get_logger
-from app.services.summarizer import Summarizer  
+
+# Heavy components (model weights, FAISS, the Gemini client) are imported and built on first use.
+if TYPE_CHECKING:
+    from app.core.embedding_service import EmbeddingService
+    from app.core.reranker import CrossEncoderReranker
+    from app.core.semantic_cache import SemanticCache
+    from app.core.vector_collections import CollectionManager
+    from app.core.vector_store import VectorStore
+    from app.services.ingestion import IngestionPipeline
+    from app.services.job_queue import JobQueue
+    from app.services.paper_fetcher import PaperFetcher  #type: ignore
+    from app.services.summarizer import Summarizer
 
 logger = get_logger(__name__)
 
+COMPONENTS = ("embedding_service", "vector_store", "fetcher", "ingestion", "summarizer", "jobs")
+
+
+@contextmanager
+def timed(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    """
+    Adds the wall time of the block to `timings[stage]` in milliseconds.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(timings.get(stage, 0.0) + (time.perf_counter() - start) * 1000, 2)
+
 
 class RAGService:
     """
@@ -17,41 +48,309 @@ class RAGService:
     3️⃣ Clean + chunk text
     4️⃣ Embed + add to vector store
     5️⃣ Summarize retrieved content using Gemini
+
+    Constructing the service is cheap: each component is built the first time it
+    is used (or by `warm_up`), and its load time is recorded for `readiness`.
+
+    With `ingestion.background` on, steps 3️⃣–4️⃣ of the ArXiv fallback run as a
+    queued job (see `jobs`); the query is answered right away from the freshly
+    fetched abstracts, and the response carries the job id to poll.
+
+    With `reranker.enabled`, retrieval asks for `reranker.candidates` chunks and a
+    cross-encoder keeps the best `top_k` of them before summarizing. Responses
+    carry per-stage `timings` in milliseconds.
+
+    Queries run against one collection (see `collections`); without one they use
+    the default store, `vector_store`. ArXiv fallback papers are indexed into the
+    collection that was searched.
     """
 
     def __init__(self):
-        self.embedding_service = EmbeddingService(model_name="all-MiniLM-L6-v2")
-        self.vector_store = VectorStore(embedding_dem=384, embedding_service=self.embedding_service)
-        self.fetcher = PaperFetcher()
-        self.summarizer = Summarizer()  # ✅ Initialize Gemini-based summarizer
+        self._components: Dict[str, Any] = {}
+        self.load_times: Dict[str, float] = {}
+        self.load_errors: Dict[str, str] = {}
+        # Reentrant: the vector store and ingestion pipeline load the embedding service while building.
+        self._lock = threading.RLock()
+        # Per-stage concurrency limits for the async pipeline (config.yaml `concurrency`).
+        self.stages = build_stages(get_section("concurrency"))
+        logger.info("RAGService created; components load on first use.")
 
-        logger.info("RAGService initialized successfully.")
+    def _component(self, name: str, factory: Callable[[], Any]) -> Any:
+        component = self._components.get(name)
+        if component is not None:
+            return component
 
-    def _filter_results(
-        self, results: List[Dict[str, Any]], similarity_threshold: float
-    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            if name not in self._components:
+                logger.info(f"Loading component '{name}'...")
+                start = time.perf_counter()
+                try:
+                    self._components[name] = factory()
+                except Exception as e:
+                    self.load_errors[name] = str(e)
+                    logger.error(f"Failed to load component '{name}': {e}")
+                    raise
+                self.load_times[name] = time.perf_counter() - start
+                self.load_errors.pop(name, None)
+                logger.info(f"✅ Component '{name}' loaded in {self.load_times[name]:.2f}s.")
+        return self._components[name]
+
+    def loaded(self, name: str) -> Optional[Any]:
         """
-        Filters FAISS results by similarity score threshold.
+        Returns a component only if it is already built; never triggers a load.
         """
-        filtered = []
-        for r in results:
-            try:
-                distance = float(r["score"])
-                similarity = 1 / (1 + distance)
-                if similarity >= similarity_threshold:
-                    r["similarity"] = str(round(similarity, 3))
-                    filtered.append(r)
-            except (KeyError, ValueError):
-                continue
-        return filtered
+        return self._components.get(name)
+
+    @property
+    def embedding_service(self) -> "EmbeddingService":
+        def build():
+            from app.core.embedding_service import EmbeddingService
+            return EmbeddingService(model_name="all-MiniLM-L6-v2")
+        return self._component("embedding_service", build)
+
+    @property
+    def vector_store(self) -> "VectorStore":
+        # Resolved first so the embedding model's load time is not counted against the index.
+        embedding_service = self.embedding_service
+
+        def build():
+            shards = get_section("vector_db").get("shards") or {}
+            if shards.get("count", 0) > 1:
+                from app.core.sharded_store import ShardedVectorStore, SHARDS_DIR
+                return ShardedVectorStore(
+                    shards["count"],
+                    embedding_dem=384,
+                    embedding_service=embedding_service,
+                    root=shards.get("root", SHARDS_DIR),
+                )
+            from app.core.vector_store import VectorStore
+            return VectorStore(embedding_dem=384, embedding_service=embedding_service)
+        return self._component("vector_store", build)
+
+    @property
+    def fetcher(self) -> "PaperFetcher":
+        def build():
+            from app.services.paper_fetcher import PaperFetcher  #type: ignore
+            return PaperFetcher()
+        return self._component("fetcher", build)
+
+    @property
+    def ingestion(self) -> "IngestionPipeline":
+        vector_store, embedding_service = self.vector_store, self.embedding_service
+
+        def build():
+            from app.services.ingestion import IngestionPipeline
+            return IngestionPipeline(vector_store, embedding_service)
+        return self._component("ingestion", build)
+
+    @property
+    def summarizer(self) -> "Summarizer":
+        def build():
+            from app.services.summarizer import Summarizer
+            return Summarizer()  # ✅ Gemini-based summarizer
+        return self._component("summarizer", build)
 
-    def _summarize_results(self, query: str, results: List[Dict[str, Any]]) -> str:
+    @property
+    def jobs(self) -> "JobQueue":
+        def build():
+            from app.services.job_queue import JobQueue, JOB_QUEUE_PATH, DEFAULT_DEDUPE_SECONDS
+            config = get_section("ingestion").get("jobs") or {}
+            # Started on build: jobs left over from a previous run resume right away.
+            return JobQueue(
+                {"ingest": self._run_ingest_job, "dedupe": self._run_dedupe_job},
+                path=config.get("path", JOB_QUEUE_PATH),
+                dedupe_seconds=config.get("dedupe_seconds", DEFAULT_DEDUPE_SECONDS),
+            ).start()
+        return self._component("jobs", build)
+
+    def _run_ingest_job(self, payload: Dict[str, Any], progress: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        papers = payload["papers"]
+
+        def report(counts: Dict[str, Any]):
+            progress({**counts, "papers_total": len(papers)})
+
+        report({"papers": 0, "chunks": 0, "batches": 0})
+        with self.collection(payload.get("collection"), create=True) as store:
+            return self.ingestion_for(store).ingest(papers, progress=report, resume=payload.get("resumed", False))
+
+    def _run_dedupe_job(self, payload: Dict[str, Any], progress: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        with self.collection(payload.get("collection")) as store:
+            return store.deduplicate()
+
+    def submit_dedupe_job(self, collection: Optional[str] = None) -> Dict[str, Any]:
         """
-        Extracts text content from search results and generates a summary via Gemini.
+        Queues a duplicate-chunk cleanup of `collection` (None → default). Unknown
+        collections raise CollectionNotFound here rather than failing in the worker.
         """
-        if not results:
-            return "No relevant context available for summarization."
+        with self.collection(collection):
+            pass
+        return self.jobs.submit("dedupe", {"collection": collection})
+
+    def submit_ingest_job(self, papers: List[Dict[str, Any]], collection: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queues papers for background indexing into `collection` (None → default).
+        The same set of papers (by link) is only queued once per collection while
+        a job for it is pending or recently done.
+        """
+        links = sorted(paper.get("link") or paper.get("title", "") for paper in papers)
+        if collection not in (None, DEFAULT_COLLECTION):
+            links.insert(0, f"collection:{collection}")
+        dedupe_key = hashlib.sha256("\n".join(links).encode("utf-8")).hexdigest()
+        return self.jobs.submit("ingest", {"papers": papers, "collection": collection}, dedupe_key=dedupe_key)
+
+    @property
+    def collections(self) -> "CollectionManager":
+        embedding_service = self.embedding_service
+
+        def build():
+            from app.core.vector_collections import CollectionManager, COLLECTIONS_DIR, DEFAULT_IDLE_SECONDS, DEFAULT_MAX_LOADED
+            from app.core.vector_store import VectorStore
+            config = get_section("collections")
+
+            def factory(name: str, directory: str, overrides: Dict[str, Any]) -> "VectorStore":
+                return VectorStore(
+                    embedding_dem=384, embedding_service=embedding_service, directory=directory, config=overrides
+                )
+            # Reaper started on build: idle collections are closed from then on.
+            return CollectionManager(
+                factory,
+                root=config.get("root", COLLECTIONS_DIR),
+                overrides=config.get("overrides") or {},
+                idle_seconds=config.get("idle_seconds", DEFAULT_IDLE_SECONDS),
+                max_loaded=config.get("max_loaded", DEFAULT_MAX_LOADED),
+                on_load=self._watch_store,
+            ).start()
+        return self._component("collections", build)
+
+    def _watch_store(self, store: "VectorStore"):
+        # A collection's changes invalidate cached answers the same way the default store's do.
+        cache = self.semantic_cache
+        if cache is not None:
+            cache.watch(store)
+
+    @contextmanager
+    def collection(self, name: Optional[str], create: bool = False) -> Iterator["VectorStore"]:
+        """
+        The store of collection `name` (None or "default" → `vector_store`), kept
+        loaded for the duration of the block. Unknown names raise CollectionNotFound
+        unless `create`.
+        """
+        if name in (None, DEFAULT_COLLECTION):
+            yield self.vector_store
+            return
+        with self.collections.lease(name, create=create) as store:  #type: ignore
+            yield store
+
+    @asynccontextmanager
+    async def _acollection(self, name: Optional[str]):
+        if name in (None, DEFAULT_COLLECTION):
+            yield await self._acomponent("vector_store")
+            return
+        collections = await self._acomponent("collections")
+        store = await asyncio.to_thread(collections.acquire, name)
+        try:
+            yield store
+        finally:
+            collections.release(name)
+
+    def ingestion_for(self, store: "VectorStore") -> "IngestionPipeline":
+        """
+        The ingestion pipeline writing into `store`: the shared one for the default store.
+        """
+        if store is self.loaded("vector_store"):
+            return self.ingestion
+        from app.services.ingestion import IngestionPipeline
+        return IngestionPipeline(store, self.embedding_service)
 
+    @property
+    def semantic_cache(self) -> Optional["SemanticCache"]:
+        config = get_section("semantic_cache")
+        if not config.get("enabled", True):
+            return None
+        vector_store = self.vector_store
+
+        def build():
+            from app.core.semantic_cache import SemanticCache, DEFAULT_MAX_ENTRIES, DEFAULT_SIMILARITY, DEFAULT_TTL_SECONDS
+            cache = SemanticCache(
+                dim=vector_store.embedding_dim,
+                similarity=config.get("similarity", DEFAULT_SIMILARITY),
+                max_entries=config.get("max_entries", DEFAULT_MAX_ENTRIES),
+                ttl_seconds=config.get("ttl_seconds", DEFAULT_TTL_SECONDS),
+            )
+            # New chunks on a cached topic invalidate those answers; deletions invalidate everything.
+            cache.watch(vector_store)
+            return cache
+        return self._component("semantic_cache", build)
+
+    @property
+    def reranker(self) -> Optional["CrossEncoderReranker"]:
+        config = get_section("reranker")
+        if not config.get("enabled", False):
+            return None
+
+        def build():
+            from app.core.reranker import CrossEncoderReranker, DEFAULT_BUDGET_MS, DEFAULT_MAX_LENGTH, DEFAULT_RERANK_MODEL
+            return CrossEncoderReranker(
+                model_name=config.get("model", DEFAULT_RERANK_MODEL),
+                budget_ms=config.get("budget_ms", DEFAULT_BUDGET_MS),
+                max_length=config.get("max_length", DEFAULT_MAX_LENGTH),
+            )
+        return self._component("reranker", build)
+
+    def warm_up(self) -> Dict[str, Any]:
+        """
+        Loads every component now instead of on the first request. A component that
+        fails is logged and reported by `readiness`; the others still load.
+        The optional reranker is loaded too, but readiness does not wait for it.
+        """
+        logger.info("🔥 Warming up RAGService components...")
+        for name in (*COMPONENTS, "reranker"):
+            try:
+                getattr(self, name)
+            except Exception:
+                continue
+        return self.readiness()
+
+    def readiness(self) -> Dict[str, Any]:
+        components = {
+            name: {
+                "loaded": name in self._components,
+                "load_seconds": round(self.load_times[name], 3) if name in self.load_times else None,
+                "error": self.load_errors.get(name),
+            }
+            for name in COMPONENTS
+        }
+        return {
+            "ready": all(c["loaded"] for c in components.values()),
+            "components": components,
+        }
+
+    async def aclose(self):
+        fetcher = self.loaded("fetcher")
+        if fetcher is not None:
+            await fetcher.aclose()
+        self.close()
+
+    def close(self):
+        jobs = self.loaded("jobs")
+        if jobs is not None:
+            jobs.close()
+        for stage in self.stages.values():
+            stage.shutdown()
+        vector_store = self.loaded("vector_store")
+        if vector_store is not None:
+            vector_store.close()
+        collections = self.loaded("collections")
+        if collections is not None:
+            collections.close()
+        embedding_service = self.loaded("embedding_service")
+        if embedding_service is not None:
+            embedding_service.close()
+        reranker = self.loaded("reranker")
+        if reranker is not None:
+            reranker.close()
+
+    def _context_chunks(self, results: List[Dict[str, Any]]) -> List[str]:
         # Try to extract content field from metadata safely
         context_chunks = []
         for r in results:
@@ -59,95 +358,429 @@ class RAGService:
             chunk_text = metadata.get("chunk", {}).get("text")
             if chunk_text:
                 context_chunks.append(chunk_text)
+        return context_chunks
+
+    def _summarize_results(
+        self, query: str, results: List[Dict[str, Any]], prompt: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Extracts text content from search results and generates a summary via Gemini.
+        The prompt size is added to `prompt` when given.
+        """
+        if not results:
+            return "No relevant context available for summarization."
 
+        context_chunks = self._context_chunks(results)
         if not context_chunks:
             return "No textual content found in retrieved results."
 
-        return self.summarizer.summarize(query, context_chunks)
+        return self.summarizer.summarize(query, context_chunks, report=prompt)
+
+    async def _asummarize_results(
+        self, query: str, results: List[Dict[str, Any]], prompt: Optional[Dict[str, Any]] = None
+    ) -> str:
+        if not results:
+            return "No relevant context available for summarization."
+
+        context_chunks = self._context_chunks(results)
+        if not context_chunks:
+            return "No textual content found in retrieved results."
+
+        summarizer = await self._acomponent("summarizer")
+        return await self.stages["llm"].call(summarizer.asummarize, query, context_chunks, report=prompt)
+
+    @staticmethod
+    def _local_response(results: List[Dict[str, Any]], summary: str) -> Dict[str, Any]:
+        return {
+            "status": "success",
+            "source": "local knowledge base",
+            "results": results,
+            "summary": summary,
+        }
+
+    @staticmethod
+    def _no_papers_response() -> Dict[str, Any]:
+        return {"status": "error", 
+                "message": "No papers found for your query.",
+                "summary": "no context found for the summary",
+                "results": []
+            }
+
+    @staticmethod
+    def _arxiv_response(results: List[Dict[str, Any]], summary: str) -> Dict[str, Any]:
+        if results:
+            return {
+                "status": "success",
+                "source": "arxiv (newly added)",
+                "results": results,
+                "summary": summary,
+                "message": "No local data found — papers fetched from Arxiv and added to vector store.",
+            }
+
+        # If still nothing relevant found
+        return {
+            "status": "success",
+            "source": "arxiv (newly added)",
+            "summary": "No conclusive information found in retrieved sources.",
+            "results":[],
+            "message": "No local data found — papers fetched from Arxiv and added to vector store, but none met the similarity threshold.",
+        }
+
+    @staticmethod
+    def _fresh_response(job: Dict[str, Any]) -> Callable[[List[Dict[str, Any]], str], Dict[str, Any]]:
+        def respond(results: List[Dict[str, Any]], summary: str) -> Dict[str, Any]:
+            return {
+                "status": "success",
+                "source": "arxiv (indexing in background)",
+                "results": results,
+                "summary": summary if results else "No conclusive information found in retrieved sources.",
+                "message": (
+                    "No local data found — answered from freshly fetched ArXiv abstracts; "
+                    f"they are being added to the vector store by job {job['id']}."
+                ),
+                "job_id": job["id"],
+            }
+        return respond
+
+    def _search_fresh(
+        self, query: str, papers: List[Dict[str, Any]], similarity_threshold: float, top_k: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        """
+        Ranks the chunks of just-fetched papers against the query in memory, so the
+        answer does not wait for them to be indexed. The embeddings land in the
+        embedding cache, so the background ingest does not compute them again.
+        """
+        texts, metadatas = self.ingestion.prepare(papers)
+        if not texts:
+            return []
+        query_vector = np.array(self.embedding_service.embed_query(query), dtype=np.float32)
+        chunk_vectors = np.array(self.embedding_service.get_embeddings(texts), dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector, axis=1, keepdims=True) + 1e-12
+        chunk_vectors /= np.linalg.norm(chunk_vectors, axis=1, keepdims=True) + 1e-12
+        similarities = (chunk_vectors @ query_vector[0]).astype(float)
+
+        order = [int(i) for i in np.argsort(-similarities) if similarities[i] >= similarity_threshold]
+        if top_k is not None:
+            order = order[:top_k]
+        return [
+            {"score": float(similarities[i]), "similarity": round(float(similarities[i]), 3), "metadata": metadatas[i]}
+            for i in order
+        ]
+
+    @staticmethod
+    def _background_ingest() -> bool:
+        return get_section("ingestion").get("background", True)
+
+    @staticmethod
+    def _retrieval_limit(top_k: Optional[int]) -> Optional[int]:
+        # The reranker needs a wider pool than it keeps; without one, retrieve exactly top_k.
+        config = get_section("reranker")
+        if top_k is None or not config.get("enabled", False):
+            return top_k
+        from app.core.reranker import DEFAULT_CANDIDATES
+        return max(top_k, config.get("candidates", DEFAULT_CANDIDATES))
+
+    def _rerank(
+        self, query: str, results: List[Dict[str, Any]], top_k: Optional[int], timings: Dict[str, float]
+    ) -> List[Dict[str, Any]]:
+        reranker = self.reranker
+        if reranker is None:
+            return results
+        with timed(timings, "rerank"):
+            results, info = reranker.rerank(query, results, top_n=top_k)
+        logger.info(f"Re-ranked {info['candidates']} candidates in {info['ms']} ms (applied: {info['reranked']}).")
+        return results
+
+    async def _arerank(
+        self, query: str, results: List[Dict[str, Any]], top_k: Optional[int], timings: Dict[str, float]
+    ) -> List[Dict[str, Any]]:
+        if not get_section("reranker").get("enabled", False):
+            return results
+        reranker = await self._acomponent("reranker")
+        with timed(timings, "rerank"):
+            results, info = await reranker.arerank(query, results, top_n=top_k)
+        logger.info(f"Re-ranked {info['candidates']} candidates in {info['ms']} ms (applied: {info['reranked']}).")
+        return results
+
+    def _cache_lookup(self, query: str, params: Tuple) -> Tuple[Optional[Any], Optional[Dict[str, Any]]]:
+        """
+        Embeds the query and checks the semantic answer cache.
+        Returns (query vector, cached response); the vector is None when the cache is off or bypassed.
+        """
+        cache = self.semantic_cache
+        if cache is None or bypass_requested():
+            return None, None
+        query_vector = self.embedding_service.embed_query(query)
+        cached = cache.lookup(query_vector, params)
+        if cached is not None:
+            cached["cached"] = True
+        return query_vector, cached
+
+    def _cache_store(self, query: str, query_vector: Optional[Any], params: Tuple, response: Dict[str, Any]):
+        # Only answered queries are worth replaying; misses should retry retrieval next time.
+        if query_vector is None or response.get("status") != "success" or not response.get("results"):
+            return
+        # Timings and prompt size describe this request, not the replayed ones.
+        answer = {key: value for key, value in response.items() if key not in ("timings", "prompt")}
+        self.semantic_cache.put(query, query_vector, params, answer)  #type: ignore
 
     def query_knowledge(
-        self, query: str, similarity_threshold: float = 0.4, top_k: int = 3
+        self,
+        query: str,
+        similarity_threshold: float = 0.4,
+        top_k: Optional[int] = 3,
+        collection: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Checks local knowledge base first, then fetches from Arxiv if not found.
         Finally, summarizes the most relevant findings.
+        `top_k` caps how many chunks above the threshold are returned (None → store default).
+        `collection` picks the store to search (None → default).
+        Answers to near-identical earlier questions come from the semantic cache.
         """
-        logger.info(f"🔍 Searching vector database for query: '{query}'")
-        results = self.vector_store.search(query, top_k=top_k)
-        filtered_results = self._filter_results(results, similarity_threshold)
+        collection = collection or DEFAULT_COLLECTION
+        params = (similarity_threshold, top_k, collection)
+        timings: Dict[str, float] = {}
+        with timed(timings, "cache"):
+            query_vector, cached = self._cache_lookup(query, params)
+        if cached is not None:
+            return {**cached, "timings": timings}
+
+        prompt: Dict[str, Any] = {}
+        with self.collection(collection) as store:
+            response = self._answer(query, similarity_threshold, top_k, timings, prompt, store, collection)
+        response["collection"] = collection
+        response["timings"] = timings
+        if prompt:
+            response["prompt"] = prompt
+        self._cache_store(query, query_vector, params, response)
+        return response
+
+    def _answer(
+        self,
+        query: str,
+        similarity_threshold: float,
+        top_k: Optional[int],
+        timings: Dict[str, float],
+        prompt: Dict[str, Any],
+        store: "VectorStore",
+        collection: str,
+    ) -> Dict[str, Any]:
+        logger.info(f"🔍 Searching collection '{collection}' for query: '{query}'")
+        limit = self._retrieval_limit(top_k)
+        with timed(timings, "search"):
+            filtered_results = store.search_by_threshold(query, similarity_threshold, max_results=limit)
+        filtered_results = self._rerank(query, filtered_results, top_k, timings)
 
         # 🧠 Local vector store results found
         if filtered_results:
             logger.info(f"✅ Found {len(filtered_results)} results locally.")
-            summary = self._summarize_results(query, filtered_results)
-            return {
-                "status": "success",
-                "source": "local knowledge base",
-                "results": filtered_results,
-                "summary": summary,
-            }
+            with timed(timings, "llm"):
+                summary = self._summarize_results(query, filtered_results, prompt)
+            return self._local_response(filtered_results, summary)
 
         #  Fallback: Fetch from Arxiv if local data is insufficient
         logger.warning("⚠️ No local results found. Triggering fallback to Arxiv.")
-        fetched_papers = self.fetcher.fetch_papers(query, max_results=3)
+        with timed(timings, "arxiv"):
+            fetched_papers = self.fetcher.fetch_papers(query, max_results=3)
 
         if not fetched_papers:
             logger.error("❌ No papers found on Arxiv.")
-            return {"status": "error", 
-                    "message": "No papers found for your query.",
-                    "summary": "no context found for the summary",
-                    "results": []
-                }
-
-        # Process and store new papers
-        for paper in fetched_papers:
-            cleaned_text = clean_text(paper["summary"])
-            chunks = chunk_text(cleaned_text, source=paper["title"])
-            chunk_texts = [chunk["text"] for chunk in chunks]
-            embeddings = self.embedding_service.get_embeddings(chunk_texts)
-
-            for i, chunk in enumerate(chunks):
-                metadata = {
-                    "title": paper["title"],
-                    "chunk_id": i,
-                    "source": "arxiv",
-                    "url": paper["link"],
-                    "chunk": chunk,
-                }
-                self.vector_store.index.add(embeddings[i].reshape(1, -1))  # type: ignore
-                self.vector_store.metadata.append(metadata)
-
-        self.vector_store.save_index()
+            return self._no_papers_response()
+
+        if self._background_ingest():
+            job = self.submit_ingest_job(fetched_papers, collection)
+            with timed(timings, "search"):
+                fresh_results = self._search_fresh(query, fetched_papers, similarity_threshold, limit)
+            fresh_results = self._rerank(query, fresh_results, top_k, timings)
+            logger.info(f"✅ Found {len(fresh_results)} results in fetched abstracts; indexing in job {job['id']}.")
+            with timed(timings, "llm"):
+                summary = self._summarize_results(query, fresh_results, prompt) if fresh_results else ""
+            return self._fresh_response(job)(fresh_results, summary)
+
+        # Process and store new papers in one batched ingest
+        with timed(timings, "ingest"):
+            self.ingestion_for(store).ingest(fetched_papers)
         logger.info("🧠 Added new papers to local vector store.")
 
         # 🔁 Re-run the search on updated index
-        updated_results = self.vector_store.search(query, top_k=top_k)
-        filtered_updated_results = self._filter_results(
-            updated_results, similarity_threshold
-        )
+        with timed(timings, "search"):
+            filtered_updated_results = store.search_by_threshold(
+                query, similarity_threshold, max_results=limit
+            )
+        filtered_updated_results = self._rerank(query, filtered_updated_results, top_k, timings)
 
         if filtered_updated_results:
             logger.info(
                 f"✅ Found {len(filtered_updated_results)} new relevant results after adding Arxiv papers."
             )
-            summary = self._summarize_results(query, filtered_updated_results)
-            return {
-                "status": "success",
-                "source": "arxiv (newly added)",
-                "results": filtered_updated_results,
-                "summary": summary,
-                "message": "No local data found — papers fetched from Arxiv and added to vector store.",
-            }
+        with timed(timings, "llm"):
+            summary = (
+                self._summarize_results(query, filtered_updated_results, prompt) if filtered_updated_results else ""
+            )
+        return self._arxiv_response(filtered_updated_results, summary)
 
-        # If still nothing relevant found
-        return {
-            "status": "success",
-            "source": "arxiv (newly added)",
-            "summary": "No conclusive information found in retrieved sources.",
-            "results":[],
-            "message": "No local data found — papers fetched from Arxiv and added to vector store, but none met the similarity threshold.",
-        }
+    async def _acomponent(self, name: str) -> Any:
+        """
+        Returns a component, building it on a worker thread if it is not loaded yet
+        so a cold model or index load never blocks the event loop.
+        """
+        component = self.loaded(name)
+        if component is not None:
+            return component
+        return await asyncio.to_thread(getattr, self, name)
+
+    async def _asearch(
+        self, store: "VectorStore", query: str, similarity_threshold: float, top_k: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        return await self.stages["search"].run(store.search_by_threshold, query, similarity_threshold, max_results=top_k)
+
+    async def _aretrieve(
+        self,
+        query: str,
+        similarity_threshold: float,
+        top_k: Optional[int],
+        timings: Dict[str, float],
+        store: "VectorStore",
+        collection: str,
+    ) -> Tuple[Callable[[List[Dict[str, Any]], str], Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Retrieval half of the async pipeline (local search, ArXiv fallback, re-search,
+        re-ranking) against `store`, the loaded `collection`. Returns the response
+        builder for the branch taken and the results to summarize; stage times are
+        added to `timings`.
+        """
+        logger.info(f"🔍 Searching collection '{collection}' for query: '{query}'")
+        limit = self._retrieval_limit(top_k)
+        with timed(timings, "search"):
+            filtered_results = await self._asearch(store, query, similarity_threshold, limit)
+        filtered_results = await self._arerank(query, filtered_results, top_k, timings)
+
+        if filtered_results:
+            logger.info(f"✅ Found {len(filtered_results)} results locally.")
+            return self._local_response, filtered_results
+
+        logger.warning("⚠️ No local results found. Triggering fallback to Arxiv.")
+        fetcher = await self._acomponent("fetcher")
+        with timed(timings, "arxiv"):
+            fetched_papers = await self.stages["arxiv"].call(fetcher.afetch_papers, query, max_results=3)
+
+        if not fetched_papers:
+            logger.error("❌ No papers found on Arxiv.")
+            return lambda results, summary: self._no_papers_response(), []
+
+        await self._acomponent("ingestion")
+        if self._background_ingest():
+            await self._acomponent("jobs")
+            job = await asyncio.to_thread(self.submit_ingest_job, fetched_papers, collection)
+            with timed(timings, "search"):
+                fresh_results = await self.stages["search"].run(
+                    self._search_fresh, query, fetched_papers, similarity_threshold, limit
+                )
+            fresh_results = await self._arerank(query, fresh_results, top_k, timings)
+            logger.info(f"✅ Found {len(fresh_results)} results in fetched abstracts; indexing in job {job['id']}.")
+            return self._fresh_response(job), fresh_results
+
+        with timed(timings, "ingest"):
+            await self.stages["ingest"].run(self.ingestion_for(store).ingest, fetched_papers)
+        logger.info("🧠 Added new papers to local vector store.")
+
+        with timed(timings, "search"):
+            filtered_updated_results = await self._asearch(store, query, similarity_threshold, limit)
+        filtered_updated_results = await self._arerank(query, filtered_updated_results, top_k, timings)
+        if filtered_updated_results:
+            logger.info(
+                f"✅ Found {len(filtered_updated_results)} new relevant results after adding Arxiv papers."
+            )
+        return self._arxiv_response, filtered_updated_results
+
+    async def aquery_knowledge(
+        self,
+        query: str,
+        similarity_threshold: float = 0.4,
+        top_k: Optional[int] = 3,
+        collection: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Async twin of `query_knowledge` for the API. Query embedding + FAISS search and
+        ingestion run on their stages' bounded thread pools; the ArXiv and Gemini calls
+        use async clients. Each stage admits at most its configured number of requests.
+        """
+        collection = collection or DEFAULT_COLLECTION
+        params = (similarity_threshold, top_k, collection)
+        timings: Dict[str, float] = {}
+        with timed(timings, "cache"):
+            query_vector, cached = await self._acache_lookup(query, params)
+        if cached is not None:
+            return {**cached, "timings": timings}
+
+        async with self._acollection(collection) as store:
+            respond, results = await self._aretrieve(query, similarity_threshold, top_k, timings, store, collection)
+        prompt: Dict[str, Any] = {}
+        with timed(timings, "llm"):
+            summary = await self._asummarize_results(query, results, prompt) if results else ""
+        response = respond(results, summary)
+        response["collection"] = collection
+        response["timings"] = timings
+        if prompt:
+            response["prompt"] = prompt
+        self._cache_store(query, query_vector, params, response)
+        return response
+
+    async def _acache_lookup(self, query: str, params: Tuple) -> Tuple[Optional[Any], Optional[Dict[str, Any]]]:
+        if bypass_requested():
+            return None, None
+        # Resolved off the loop: the first call loads the model and index.
+        await self._acomponent("vector_store")
+        return await self.stages["search"].run(self._cache_lookup, query, params)
+
+    async def astream_query(
+        self,
+        query: str,
+        similarity_threshold: float = 0.4,
+        top_k: Optional[int] = 3,
+        collection: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of `aquery_knowledge`. Yields events as dicts:
+        `results` (the response without its summary) as soon as retrieval finishes,
+        then one `token` per summary delta, then `done` with the full summary.
+        Stage timings are logged rather than added to the events.
+        """
+        collection = collection or DEFAULT_COLLECTION
+        params = (similarity_threshold, top_k, collection)
+        timings: Dict[str, float] = {}
+        with timed(timings, "cache"):
+            query_vector, cached = await self._acache_lookup(query, params)
+        if cached is not None:
+            summary = cached.pop("summary")
+            yield {"event": "results", "data": cached}
+            yield {"event": "token", "data": {"text": summary}}
+            yield {"event": "done", "data": {"summary": summary}}
+            return
+
+        async with self._acollection(collection) as store:
+            respond, results = await self._aretrieve(query, similarity_threshold, top_k, timings, store, collection)
+        response = respond(results, "")
+        final_summary = response.pop("summary")
+        yield {"event": "results", "data": response}
+
+        context_chunks = self._context_chunks(results)
+        if context_chunks:
+            summarizer = await self._acomponent("summarizer")
+            parts = []
+            with timed(timings, "llm"):
+                async with self.stages["llm"].slot():
+                    async for token in summarizer.astream(query, context_chunks):
+                        parts.append(token)
+                        yield {"event": "token", "data": {"text": token}}
+            final_summary = "".join(parts).strip()
+        elif results:
+            final_summary = "No textual content found in retrieved results."
 
+        self._cache_store(query, query_vector, params, {**response, "summary": final_summary})
+        logger.info(f"⏱️ Stage timings (ms): {timings}")
+        yield {"event": "done", "data": {"summary": final_summary}}
 
 if __name__ == "__main__":
     rag = RAGService()
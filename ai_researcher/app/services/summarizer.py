@@ -1,18 +1,47 @@
 # app/services/summarizer.py
-from typing import List
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from app.core.config_loader import get_section
 from app.core.llm import GeminiLLM
+from app.utils.context_packer import (
+    CONTEXT_SEPARATOR,
+    DEFAULT_CONTEXT_BUDGET_TOKENS,
+    DEFAULT_DUPLICATE_OVERLAP,
+    DEFAULT_SAFETY_MARGIN,
+    estimate_tokens,
+    pack_context,
+)
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 class Summarizer:
-    def __init__(self, model_name: str = "gemini-2.5-flash"):
+    def __init__(
+        self,
+        model_name: str = "gemini-2.5-flash",
+        llm: Optional[GeminiLLM] = None,
+        context_budget_tokens: Optional[int] = None,
+        duplicate_overlap: Optional[float] = None,
+        count_tokens: Optional[Callable[[str], int]] = None,
+    ):
         """
         Wrapper service that prepares a prompt from retrieved context chunks
         and asks the Gemini LLM to produce a concise, research-oriented summary.
+        `llm` swaps in any object with the GeminiLLM interface (e.g. a fake in tests).
+        The context packing limits default to config.yaml `summarizer`.
+        `count_tokens` counts with the model's tokenizer; without it the budget
+        uses the character estimate minus `safety_margin`.
         """
+        config = get_section("summarizer")
+        if context_budget_tokens is None:
+            context_budget_tokens = config.get("context_budget_tokens", DEFAULT_CONTEXT_BUDGET_TOKENS)
+        if duplicate_overlap is None:
+            duplicate_overlap = config.get("duplicate_overlap", DEFAULT_DUPLICATE_OVERLAP)
+        self.context_budget_tokens = context_budget_tokens
+        self.duplicate_overlap = duplicate_overlap
+        self.count_tokens = count_tokens
+        self.safety_margin = config.get("safety_margin", DEFAULT_SAFETY_MARGIN)
         try:
-            self.llm = GeminiLLM(model_name=model_name)
+            self.llm = llm or GeminiLLM(model_name=model_name)
             logger.info("Summarizer initialized with GeminiLLM.")
         except Exception as e:
             logger.error(f"Failed to initialize GeminiLLM: {e}")
@@ -21,11 +50,22 @@ class Summarizer:
     def build_prompt(self, query: str, context_chunks: List[str]) -> str:
         """
         Build a clear, focused prompt for summarization.
-        We include only a bounded number of chunks to avoid exceeding context length.
         """
-        # Limit context length — adjust number_of_chunks if needed
-        number_of_chunks = min(len(context_chunks), 6)
-        context = "\n\n---\n\n".join(context_chunks[:number_of_chunks])
+        return self.prepare_prompt(query, context_chunks)[0]
+
+    def prepare_prompt(self, query: str, context_chunks: List[str]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Builds the prompt from the context that fits the token budget (see `pack_context`)
+        and returns it with its size: packed chunk counts plus `prompt_tokens`.
+        """
+        packed, info = pack_context(
+            context_chunks,
+            self.context_budget_tokens,
+            self.duplicate_overlap,
+            count_tokens=self.count_tokens,
+            safety_margin=self.safety_margin,
+        )
+        context = CONTEXT_SEPARATOR.join(packed)
 
         prompt = f"""
 You are an expert research assistant. Given the user's research question and the retrieved
@@ -44,18 +84,28 @@ Deliverable:
 
 Be factual. Do not hallucinate. If the context doesn't contain an answer, say: "No conclusive information found in retrieved sources."
 """
-        return prompt
+        info["prompt_tokens"] = (self.count_tokens or estimate_tokens)(prompt)
+        logger.info(
+            f"Prompt: ~{info['prompt_tokens']} tokens, {info['chunks']}/{len(context_chunks)} chunks "
+            f"({info['duplicates']} duplicate, {info['over_budget']} over budget)."
+        )
+        return prompt, info
 
-    def summarize(self, query: str, context_chunks: List[str]) -> str:
+    def summarize(
+        self, query: str, context_chunks: List[str], report: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
         Synchronously generate a summary via Gemini.
-        Returns the LLM text (trimmed).
+        Returns the LLM text (trimmed). The prompt size from `prepare_prompt`
+        is added to `report` when given.
         """
         if not context_chunks:
             logger.warning("No context provided to summarizer.")
             return "No relevant information found to summarize."
 
-        prompt = self.build_prompt(query, context_chunks)
+        prompt, info = self.prepare_prompt(query, context_chunks)
+        if report is not None:
+            report.update(info)
         logger.info("Sending summarization prompt to Gemini.")
         try:
             summary = self.llm.generate_text(prompt)
@@ -64,3 +114,48 @@ Be factual. Do not hallucinate. If the context doesn't contain an answer, say: "
         except Exception as e:
             logger.error(f"Error from GeminiLLM.generate_text: {e}")
             return "An error occurred while generating the summary."
+
+    async def asummarize(
+        self, query: str, context_chunks: List[str], report: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Async variant of `summarize` for the async query pipeline.
+        """
+        if not context_chunks:
+            logger.warning("No context provided to summarizer.")
+            return "No relevant information found to summarize."
+
+        prompt, info = self.prepare_prompt(query, context_chunks)
+        if report is not None:
+            report.update(info)
+        logger.info("Sending summarization prompt to Gemini (async).")
+        try:
+            summary = await self.llm.agenerate_text(prompt)
+            logger.info("Summary generated successfully.")
+            return summary.strip()
+        except Exception as e:
+            logger.error(f"Error from GeminiLLM.agenerate_text: {e}")
+            return "An error occurred while generating the summary."
+
+    async def astream(
+        self, query: str, context_chunks: List[str], report: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Streams the summary as text deltas as the LLM produces them.
+        """
+        if not context_chunks:
+            logger.warning("No context provided to summarizer.")
+            yield "No relevant information found to summarize."
+            return
+
+        prompt, info = self.prepare_prompt(query, context_chunks)
+        if report is not None:
+            report.update(info)
+        logger.info("Streaming summarization prompt to Gemini.")
+        try:
+            async for token in self.llm.astream_text(prompt):
+                yield token
+            logger.info("Summary stream completed.")
+        except Exception as e:
+            logger.error(f"Error from GeminiLLM.astream_text: {e}")
+            yield "An error occurred while generating the summary."
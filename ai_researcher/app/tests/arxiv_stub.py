@@ -0,0 +1,154 @@
+"""
+Local stand-in for the arXiv query API, for offline tests and throughput runs.
+
+Replays Atom entries (from a recorded feed file, or generated ones) as
+paginated feeds honouring `start` / `max_results`, with optional per-request
+latency and injected failures to exercise retries and backoff.
+
+    python -m app.tests.arxiv_stub --port 8765 --total 1000 --latency 0.2
+"""
+
+import argparse
+import copy
+import threading
+import time
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+ATOM = "http://www.w3.org/2005/Atom"
+OPENSEARCH = "http://a9.com/-/spec/opensearch/1.1/"
+ET.register_namespace("", ATOM)
+ET.register_namespace("opensearch", OPENSEARCH)
+
+
+def generated_entries(total: int) -> List[ET.Element]:
+    entries = []
+    for i in range(total):
+        entry = ET.Element(f"{{{ATOM}}}entry")
+        ET.SubElement(entry, f"{{{ATOM}}}id").text = f"http://arxiv.org/abs/stub.{i:05d}v1"
+        ET.SubElement(entry, f"{{{ATOM}}}published").text = "2024-01-01T00:00:00Z"
+        ET.SubElement(entry, f"{{{ATOM}}}title").text = f"Stub paper {i}"
+        ET.SubElement(entry, f"{{{ATOM}}}summary").text = f"Abstract of stub paper {i} about retrieval and attention."
+        author = ET.SubElement(entry, f"{{{ATOM}}}author")
+        ET.SubElement(author, f"{{{ATOM}}}name").text = f"Author {i}"
+        entries.append(entry)
+    return entries
+
+
+def recorded_entries(feed_path: str) -> List[ET.Element]:
+    return ET.parse(feed_path).getroot().findall(f"{{{ATOM}}}entry")
+
+
+class ArxivStubServer:
+    """
+    Threaded HTTP server serving `/api/query`. `fail_first` requests answer
+    `fail_status` (with `Retry-After` if given) before it starts serving feeds.
+    Every request is recorded in `requests` as (monotonic time, query params).
+    `total_results=False` leaves opensearch:totalResults out of the feed.
+    """
+
+    def __init__(
+        self,
+        total: int = 250,
+        feed_path: Optional[str] = None,
+        latency: float = 0.0,
+        fail_first: int = 0,
+        fail_status: int = 503,
+        retry_after: Optional[float] = None,
+        port: int = 0,
+        total_results: bool = True,
+    ):
+        self.entries = recorded_entries(feed_path) if feed_path else generated_entries(total)
+        self.latency = latency
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.total_results = total_results
+        self.requests: List[tuple] = []
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="arxiv-stub", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/api/query"
+
+    def feed(self, start: int, max_results: int) -> bytes:
+        root = ET.Element(f"{{{ATOM}}}feed")
+        if self.total_results:
+            ET.SubElement(root, f"{{{OPENSEARCH}}}totalResults").text = str(len(self.entries))
+        ET.SubElement(root, f"{{{OPENSEARCH}}}startIndex").text = str(start)
+        ET.SubElement(root, f"{{{OPENSEARCH}}}itemsPerPage").text = str(max_results)
+        for entry in self.entries[start:start + max_results]:
+            root.append(copy.deepcopy(entry))
+        return ET.tostring(root, encoding="utf-8", xml_declaration=True)
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        params = {k: v[0] for k, v in parse_qs(urlparse(handler.path).query).items()}
+        with self._lock:
+            self.requests.append((time.monotonic(), params))
+            failing = len(self.requests) <= self.fail_first
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if failing:
+            handler.send_response(self.fail_status)
+            if self.retry_after is not None:
+                handler.send_header("Retry-After", str(self.retry_after))
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+
+        body = self.feed(int(params.get("start", 0)), int(params.get("max_results", 10)))
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/atom+xml; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self) -> "ArxivStubServer":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "ArxivStubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--total", type=int, default=1000)
+    parser.add_argument("--feed", default=None, help="Replay entries from a recorded Atom feed instead")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-first", type=int, default=0)
+    args = parser.parse_args()
+
+    stub = ArxivStubServer(
+        total=args.total, feed_path=args.feed, latency=args.latency, fail_first=args.fail_first, port=args.port
+    )
+    print(f"arXiv stub serving {len(stub.entries)} entries at {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.server.server_close()
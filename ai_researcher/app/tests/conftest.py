@@ -0,0 +1,85 @@
+import zlib
+
+import numpy as np
+import pytest
+
+from app.core.config_loader import load_config
+
+
+class RandomEmbeddingService:
+    """
+    Random unit-free vectors seeded by a CRC of the text: stable across processes
+    and PYTHONHASHSEED, and carrying no meaning, so only exact texts match.
+    """
+
+    def __init__(self, dim=16):
+        self.dim = dim
+
+    def get_embeddings(self, texts):
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack(
+            [np.random.default_rng(zlib.crc32(t.encode("utf-8"))).standard_normal(self.dim) for t in texts]
+        ).astype(np.float32)
+
+    def embed_query(self, query):
+        return self.get_embeddings([query])
+
+    def close(self):
+        pass
+
+
+class LetterEmbeddingService(RandomEmbeddingService):
+    """
+    Bag-of-letters embeddings: deterministic and similar for texts sharing words.
+    """
+
+    def __init__(self):
+        super().__init__(dim=26)
+
+    def get_embeddings(self, texts):
+        vectors = np.zeros((len(texts), 26), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for ch in text.lower():
+                if "a" <= ch <= "z":
+                    vectors[row, ord(ch) - ord("a")] += 1
+        return vectors
+
+
+def metadatas_for(texts, start=0):
+    return [
+        {"title": f"Paper {start + i}", "url": f"http://example.org/{start + i}", "chunk_id": 0, "chunk": {"text": t}}
+        for i, t in enumerate(texts)
+    ]
+
+
+def make_store(embedding_service=None, **config):
+    from app.core.vector_store import VectorStore
+    return VectorStore(
+        embedding_dem=16, embedding_service=embedding_service or RandomEmbeddingService(), config=config
+    )
+
+
+def crash(store):
+    # Files closed without the checkpoint `close` would write: the index exists only in the WAL.
+    store.wal.close()
+    store.metadata_store.close()
+    if store.sparse_index is not None:
+        store.sparse_index.close()
+
+
+@pytest.fixture
+def set_config(monkeypatch):
+    # Overrides keys of a loaded config section for one test; monkeypatch restores them afterwards.
+    def set_values(section, **values):
+        for key, value in values.items():
+            monkeypatch.setitem(load_config()[section], key, value)
+    return set_values
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # Config is read relative to the working directory; load it before moving into tmp_path.
+    load_config()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,228 @@
+import asyncio
+import os
+import time
+from contextlib import aclosing
+
+import pytest
+
+from app.services.paper_fetcher import FeedParser, PaperFetcher
+from app.tests.arxiv_stub import ArxivStubServer
+
+FEED_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "arxiv_feed.xml")
+
+
+def make_fetcher(stub, **overrides):
+    config = {
+        "page_size": 100,
+        "max_concurrent_pages": 2,
+        "min_request_interval": 0.0,
+        "max_retries": 3,
+        "backoff_seconds": 0.01,
+        "timeout_seconds": 5,
+        **overrides,
+    }
+    return PaperFetcher(base_url=stub.url, **config)
+
+
+def fetch(fetcher, query="attention", max_results=3):
+    async def run():
+        try:
+            return await fetcher.afetch_papers(query, max_results=max_results)
+        finally:
+            await fetcher.aclose()
+
+    return asyncio.run(run())
+
+
+def test_replays_recorded_feed():
+    with ArxivStubServer(feed_path=FEED_PATH) as stub:
+        papers = fetch(make_fetcher(stub), max_results=10)
+
+    assert [p["title"] for p in papers][:2] == [
+        "Attention Is All You Need",
+        "Neural Machine Translation by Jointly Learning to Align and Translate",
+    ]
+    assert papers[0]["authors"] == ["Ashish Vaswani", "Noam Shazeer"]
+    assert papers[0]["link"] == "http://arxiv.org/abs/1706.03762v7"
+    # Only one request: the first page already holds every result.
+    assert len(stub.requests) == 1
+
+
+def test_paginates_in_order_without_duplicates():
+    with ArxivStubServer(total=1000) as stub:
+        papers = fetch(make_fetcher(stub), max_results=250)
+
+    assert len(papers) == 250
+    assert [p["title"] for p in papers] == [f"Stub paper {i}" for i in range(250)]
+    starts = sorted(int(params["start"]) for _, params in stub.requests)
+    assert starts == [0, 100, 200]
+    assert [int(params["max_results"]) for _, params in sorted(stub.requests, key=lambda r: int(r[1]["start"]))] == [100, 100, 50]
+
+
+def test_stops_at_total_results():
+    with ArxivStubServer(total=120) as stub:
+        papers = fetch(make_fetcher(stub), max_results=500)
+
+    assert len(papers) == 120
+    assert len(stub.requests) == 2
+
+
+def test_retries_transient_failures():
+    with ArxivStubServer(total=5, fail_first=2) as stub:
+        papers = fetch(make_fetcher(stub), max_results=5)
+
+    assert len(papers) == 5
+    assert len(stub.requests) == 3
+
+
+def test_honours_retry_after():
+    with ArxivStubServer(total=5, fail_first=1, fail_status=429, retry_after=0.3) as stub:
+        fetch(make_fetcher(stub), max_results=5)
+
+    (first, _), (second, _) = stub.requests
+    assert second - first >= 0.3
+
+
+def test_gives_up_after_max_retries():
+    with ArxivStubServer(total=5, fail_first=100) as stub:
+        papers = fetch(make_fetcher(stub, max_retries=2), max_results=5)
+
+    assert papers == []
+    assert len(stub.requests) == 3
+
+
+def test_rate_limit_spaces_requests():
+    interval = 0.1
+    with ArxivStubServer(total=400) as stub:
+        fetch(make_fetcher(stub, min_request_interval=interval, max_concurrent_pages=4), max_results=400)
+
+    times = sorted(t for t, _ in stub.requests)
+    assert len(times) == 4
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    # The first gap also absorbs connection setup on the client, so it can look shorter server-side.
+    assert min(gaps[1:]) >= interval * 0.9
+    assert times[-1] - times[0] >= 2 * interval
+
+
+def test_concurrent_pages_overlap_latency():
+    latency = 0.2
+    with ArxivStubServer(total=500, latency=latency) as stub:
+        fetcher = make_fetcher(stub, max_concurrent_pages=4)
+        start = time.perf_counter()
+        papers = fetch(fetcher, max_results=500)
+        elapsed = time.perf_counter() - start
+
+    assert len(papers) == 500
+    # First page alone, then the other four together: ~2 round trips instead of 5.
+    assert elapsed < latency * 4
+
+
+def test_sync_fetch_paginates_and_retries():
+    with ArxivStubServer(total=150, fail_first=1) as stub:
+        papers = make_fetcher(stub).fetch_papers("attention", max_results=150)
+
+    assert [p["title"] for p in papers] == [f"Stub paper {i}" for i in range(150)]
+
+
+@pytest.mark.parametrize("max_results", [1, 3])
+def test_small_requests_use_one_page(max_results):
+    with ArxivStubServer(total=50) as stub:
+        papers = fetch(make_fetcher(stub), max_results=max_results)
+
+    assert len(papers) == max_results
+    assert stub.requests[0][1]["max_results"] == str(max_results)
+
+
+def test_feed_parser_yields_entries_before_the_feed_ends():
+    with open(FEED_PATH, "rb") as f:
+        body = f.read()
+    parser = FeedParser()
+    first_entry_end = body.index(b"</entry>") + len(b"</entry>")
+
+    early = parser.feed(body[:first_entry_end + 1])
+    assert [p["title"] for p in early] == ["Attention Is All You Need"]
+    assert parser.total == 3
+
+    rest = []
+    for i in range(first_entry_end + 1, len(body), 64):
+        rest.extend(parser.feed(body[i:i + 64]))
+    rest.extend(parser.close())
+    assert len(rest) == 2
+    assert rest[1]["title"].startswith("BERT")
+
+
+def test_parse_page_matches_streaming_parser():
+    with open(FEED_PATH, encoding="utf-8") as f:
+        papers, total = PaperFetcher.parse_page(f.read())
+
+    assert total == 3
+    assert [p["link"] for p in papers] == [
+        "http://arxiv.org/abs/1706.03762v7",
+        "http://arxiv.org/abs/1409.0473v7",
+        "http://arxiv.org/abs/1810.04805v2",
+    ]
+
+
+def test_repeated_queries_are_served_from_cache():
+    with ArxivStubServer(total=250) as stub:
+        fetcher = make_fetcher(stub)
+
+        async def run():
+            try:
+                first = await fetcher.afetch_papers("Attention", max_results=250)
+                second = await fetcher.afetch_papers("attention ", max_results=250)
+                return first, second
+            finally:
+                await fetcher.aclose()
+
+        first, second = asyncio.run(run())
+        sync = fetcher.fetch_papers("attention", max_results=250)
+
+    assert first == second == sync
+    assert len(stub.requests) == 3
+    assert fetcher.cache_stats()["hits"] == 6
+
+
+def test_cached_pages_without_total_results_keep_paginating():
+    with ArxivStubServer(total=250, total_results=False) as stub:
+        fetcher = make_fetcher(stub)
+        first = fetch(fetcher, max_results=250)
+        second = fetch(fetcher, max_results=250)
+        sync = fetcher.fetch_papers("attention", max_results=250)
+
+    assert len(first) == 250
+    assert first == second == sync
+    assert len(stub.requests) == 3
+
+
+def test_cache_can_be_disabled():
+    with ArxivStubServer(total=5) as stub:
+        fetcher = make_fetcher(stub, cache={"enabled": False})
+        fetcher.fetch_papers("attention", max_results=5)
+        fetcher.fetch_papers("attention", max_results=5)
+
+    assert len(stub.requests) == 2
+
+
+def test_stopping_early_cancels_remaining_pages():
+    with ArxivStubServer(total=1000, latency=0.05) as stub:
+        fetcher = make_fetcher(stub, max_concurrent_pages=1)
+
+        async def first_papers(n):
+            papers = []
+            try:
+                async with aclosing(fetcher.aiter_papers("attention", max_results=1000)) as stream:
+                    async for paper in stream:
+                        papers.append(paper)
+                        if len(papers) == n:
+                            break
+            finally:
+                await fetcher.aclose()
+            return papers
+
+        papers = asyncio.run(first_papers(150))
+        time.sleep(0.2)
+
+    assert len(papers) == 150
+    # Page one, page two, and at most the page that was already in flight.
+    assert len(stub.requests) <= 3
@@ -0,0 +1,65 @@
+import types
+
+import pytest
+
+from app.core.embedding_service import EmbeddingService
+from app.utils.text_cleaner import chunk_text, iter_chunks
+
+TEXT = (
+    "Transformers replace recurrence with attention. Every token attends to every other token! "
+    "Does this scale to long papers? Sparse variants keep the cost linear in sequence length."
+)
+
+
+def test_sentence_chunks_end_on_sentence_boundaries_within_the_size():
+    chunks = list(iter_chunks(TEXT, chunk_size=100, overlap=0))
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert all(chunk[-1] in ".!?" for chunk in chunks)
+    assert " ".join(chunks) == TEXT
+
+
+def test_overlap_repeats_whole_tokens_from_the_previous_chunk():
+    chunks = list(iter_chunks(TEXT, chunk_size=100, overlap=20, boundary="token"))
+
+    for previous, current in zip(chunks, chunks[1:]):
+        carried = next(current[:k] for k in range(len(current), 0, -1) if previous.endswith(current[:k]))
+        assert len(carried) <= 20
+        assert previous[-len(carried) - 1] == " " and current[len(carried)] == " "
+    assert all(chunk == chunk.strip() for chunk in chunks)
+
+
+def test_overlong_sentences_and_tokens_are_still_split():
+    sentence = " ".join(["word"] * 60) + "."
+    token = "x" * 250
+    chunks = list(iter_chunks(f"{sentence} {token}", chunk_size=100, overlap=10))
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    # Cut pieces of the long token are not repeated as overlap.
+    assert sum(chunk.count("x") for chunk in chunks) == 250
+
+
+def test_chunk_text_yields_lazily_with_ids():
+    chunks = chunk_text(TEXT, chunk_size=100, overlap=0, source="paper")
+
+    assert isinstance(chunks, types.GeneratorType)
+    expected = list(iter_chunks(TEXT, 100, 0))
+    assert next(chunks) == {"chunk_id": 0, "text": expected[0], "source": "paper"}
+    assert [c["chunk_id"] for c in chunks] == list(range(1, len(expected)))
+
+
+def test_chunk_document_uses_the_shared_chunker_on_token_boundaries():
+    # chunk_document needs no model; skip __init__.
+    service = EmbeddingService.__new__(EmbeddingService)
+    chunks = service.chunk_document(TEXT, chunk_size=50, overlap=10)
+
+    assert chunks == list(iter_chunks(TEXT, 50, 10, boundary="token"))
+    assert all(len(chunk) <= 50 and not chunk.startswith(" ") for chunk in chunks)
+    assert all(token in TEXT.split() for chunk in chunks for token in chunk.split())
+
+
+def test_invalid_arguments_are_rejected():
+    with pytest.raises(ValueError):
+        list(iter_chunks(TEXT, chunk_size=10, overlap=10))
+    with pytest.raises(ValueError):
+        list(iter_chunks(TEXT, boundary="paragraph"))
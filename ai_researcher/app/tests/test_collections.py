@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+from app.core.vector_collections import CollectionManager, CollectionNotFound
+from app.dependencies import get_rag_service
+from app.main import app
+from app.services.rag_service import RAGService
+from app.services.summarizer import Summarizer
+from app.tests.conftest import LetterEmbeddingService
+
+
+class FakeLLM:
+    async def agenerate_text(self, prompt, system_prompt=None):
+        return "A summary."
+
+
+def make_manager(root, **kwargs):
+    from app.core.vector_store import VectorStore
+
+    def factory(name, directory, overrides):
+        return VectorStore(
+            embedding_dem=26, embedding_service=LetterEmbeddingService(), directory=directory, config=overrides
+        )
+    return CollectionManager(factory, root=str(root), **kwargs)
+
+
+def add_text(store, title, text):
+    metadata = {"title": title, "url": f"http://example.org/{title}", "chunk_id": 0, "chunk": {"text": text}}
+    store.add_chunks([metadata], store.embedding_service.get_embeddings([text]))
+
+
+def titles(results):
+    return [r["metadata"]["title"] for r in results]
+
+
+def test_collections_keep_separate_indexes_and_files(workdir):
+    manager = make_manager(workdir / "collections")
+    with manager.lease("physics", create=True) as physics, manager.lease("biology", create=True) as biology:
+        add_text(physics, "Quarks", "quarks and gluons bind inside protons")
+        add_text(biology, "Enzymes", "enzymes catalyse reactions inside cells")
+        assert titles(physics.search_by_threshold("quarks gluons protons", 0.5)) == ["Quarks"]
+        assert titles(biology.search_by_threshold("quarks gluons protons", 0.0)) == ["Enzymes"]
+        assert physics.index_path == str(workdir / "collections" / "physics" / "index.faiss")
+
+    assert manager.names() == ["biology", "physics"]
+    with pytest.raises(CollectionNotFound):
+        manager.acquire("chemistry")
+    with pytest.raises(ValueError):
+        manager.acquire("../escape", create=True)
+    manager.close()
+
+
+def test_idle_collections_are_evicted_and_reload_from_disk(workdir):
+    manager = make_manager(workdir / "collections", idle_seconds=0)
+    with manager.lease("physics", create=True) as physics:
+        add_text(physics, "Quarks", "quarks and gluons bind inside protons")
+        # In use: never evicted.
+        assert manager.evict_idle() == []
+
+    assert manager.evict_idle() == ["physics"]
+    assert manager.stats()["loaded"] == {}
+
+    with manager.lease("physics") as reloaded:
+        assert reloaded is not physics
+        assert titles(reloaded.search_by_threshold("quarks gluons protons", 0.5)) == ["Quarks"]
+    assert manager.stats()["loads"] == 2
+    manager.close()
+
+
+def test_least_recently_used_collection_is_closed_over_capacity(workdir):
+    manager = make_manager(workdir / "collections", max_loaded=1)
+    with manager.lease("physics", create=True):
+        pass
+    with manager.lease("biology", create=True):
+        pass
+
+    assert list(manager.stats()["loaded"]) == ["biology"]
+    assert manager.evictions == 1
+    manager.close()
+
+
+def test_per_collection_overrides_apply_to_that_store_only(workdir):
+    manager = make_manager(workdir / "collections", overrides={"plain": {"hybrid": {"enabled": False}}})
+    with manager.lease("plain") as plain, manager.lease("mixed", create=True) as mixed:
+        assert plain.sparse_index is None
+        assert mixed.sparse_index is not None
+    manager.close()
+
+
+def test_query_searches_only_the_selected_collection(workdir, set_config):
+    set_config("semantic_cache", enabled=False)
+    embedding_service = LetterEmbeddingService()
+    service = RAGService()
+    manager = make_manager(workdir / "collections")
+    service._components.update(
+        embedding_service=embedding_service,
+        collections=manager,
+        summarizer=Summarizer(llm=FakeLLM()),
+    )
+    with manager.lease("physics", create=True) as physics:
+        add_text(physics, "Quarks", "quarks and gluons bind inside protons")
+
+    app.dependency_overrides[get_rag_service] = lambda: service
+    try:
+        response = asyncio.run(
+            service.aquery_knowledge("quarks gluons protons", similarity_threshold=0.5, collection="physics")
+        )
+        missing = TestClient(app).post("/api/query", json={"query": "quarks", "collection": "chemistry"})
+        invalid = TestClient(app).post("/api/query", json={"query": "quarks", "collection": "Not Valid"})
+        listed = TestClient(app).get("/api/collections").json()
+    finally:
+        app.dependency_overrides.clear()
+        service.close()
+
+    assert response["collection"] == "physics"
+    assert titles(response["results"]) == ["Quarks"]
+    assert missing.status_code == 404
+    assert invalid.status_code == 422
+    assert listed["collections"] == ["default", "physics"]
+
+
+def test_delete_and_dedupe_endpoints_target_the_selected_collection(workdir, set_config):
+    set_config("ingestion", jobs={"path": str(workdir / "jobs.db")})
+    service = RAGService()
+    manager = make_manager(workdir / "collections")
+    service._components.update(embedding_service=LetterEmbeddingService(), collections=manager)
+    with manager.lease("physics", create=True) as physics:
+        add_text(physics, "Quarks", "quarks and gluons bind inside protons")
+        add_text(physics, "Quarks again", "quarks and gluons bind inside protons")
+        add_text(physics, "Leptons", "electrons and muons are leptons")
+
+    app.dependency_overrides[get_rag_service] = lambda: service
+    try:
+        client = TestClient(app)
+        deleted = client.delete("/api/papers", params={"title": "Leptons", "collection": "physics"})
+        missing = client.delete("/api/papers", params={"title": "Leptons", "collection": "chemistry"})
+        job = client.post("/api/maintenance/dedupe", params={"collection": "physics"}).json()
+        finished = service.jobs.wait(job["id"], timeout=5)
+        no_dedupe = client.post("/api/maintenance/dedupe", params={"collection": "chemistry"})
+        with manager.lease("physics") as physics:
+            remaining = titles(physics.search_by_threshold("quarks gluons protons electrons", 0.0))
+        # The default store was never loaded.
+        assert service.loaded("vector_store") is None
+    finally:
+        app.dependency_overrides.clear()
+        service.close()
+
+    assert deleted.status_code == 200
+    assert deleted.json()["deleted"] == 1
+    assert missing.status_code == 404
+    assert finished["status"] == "done"
+    assert finished["result"]["duplicates"] == 1
+    assert no_dedupe.status_code == 404
+    assert remaining == ["Quarks"]
@@ -0,0 +1,97 @@
+import asyncio
+
+from app.services.summarizer import Summarizer
+from app.utils.context_packer import estimate_tokens, pack_context
+
+ATTENTION = (
+    "The Transformer relies entirely on self attention to relate every pair of tokens in a sequence, "
+    "which removes recurrence and lets training parallelise across positions."
+)
+FOLDING = "Proteins fold into three dimensional structures that determine their biological function in the cell."
+GRAPHS = "Graph neural networks pass messages between neighbouring nodes to learn representations of molecules."
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def agenerate_text(self, prompt, system_prompt=None):
+        self.prompts.append(prompt)
+        return "A summary."
+
+
+def test_near_duplicates_are_dropped_keeping_the_first():
+    reworded = ATTENTION.replace("The Transformer", "A Transformer")
+    packed, info = pack_context([ATTENTION, reworded, FOLDING], budget_tokens=1000)
+
+    assert packed == [ATTENTION, FOLDING]
+    assert info["duplicates"] == 1
+
+
+def test_overlap_repeated_from_the_previous_chunk_is_trimmed():
+    # What the chunkers produce: the next chunk starts with the tail of the previous one.
+    overlap = ATTENTION[-60:]
+    following = overlap + " " + FOLDING
+    packed, info = pack_context([ATTENTION, following], budget_tokens=1000)
+
+    assert packed == [ATTENTION, FOLDING]
+    assert info["trimmed"] == 1
+
+
+def test_chunks_fill_the_budget_in_relevance_order():
+    budget = estimate_tokens(ATTENTION) + estimate_tokens(GRAPHS) + 5
+    long_chunk = " ".join(f"word{i}" for i in range(200))
+    packed, info = pack_context([ATTENTION, long_chunk, GRAPHS], budget_tokens=budget, safety_margin=0)
+
+    # The long chunk does not fit, but the smaller one after it still does.
+    assert packed == [ATTENTION, GRAPHS]
+    assert info["over_budget"] == 1
+    assert info["context_tokens"] <= budget
+
+
+def test_a_first_chunk_larger_than_the_budget_is_truncated():
+    long_chunk = " ".join(f"word{i}" for i in range(500))
+    packed, info = pack_context([long_chunk, ATTENTION], budget_tokens=50)
+
+    assert len(packed) == 1 and long_chunk.startswith(packed[0])
+    assert estimate_tokens(packed[0]) <= 50
+
+
+def test_the_estimate_keeps_a_safety_margin_free():
+    chunks = [" ".join(f"word{i}_{j}" for i in range(30)) for j in range(20)]
+    packed, info = pack_context(chunks, budget_tokens=1000, safety_margin=0.2)
+
+    assert info["budget_tokens"] == 800
+    assert 800 - estimate_tokens(chunks[0]) < info["context_tokens"] <= 800
+
+
+def test_a_tokenizer_replaces_the_estimate_and_its_margin():
+    def count_words(text):
+        return len(text.split())
+
+    long_chunk = " ".join(f"w{i}" for i in range(500))
+    packed, info = pack_context([long_chunk, ATTENTION], budget_tokens=100, count_tokens=count_words)
+
+    # Short words are ~1.5 characters per token, so the character cut alone would overshoot.
+    assert info["budget_tokens"] == 100
+    assert long_chunk.startswith(packed[0])
+    assert 90 <= count_words(packed[0]) <= 100
+    assert info["context_tokens"] == count_words(packed[0])
+
+    llm = FakeLLM()
+    report = {}
+    asyncio.run(Summarizer(llm=llm, count_tokens=count_words).asummarize("what is attention?", [ATTENTION], report=report))
+    assert report["prompt_tokens"] == count_words(llm.prompts[0])
+
+
+def test_summarizer_reports_prompt_size():
+    llm = FakeLLM()
+    summarizer = Summarizer(llm=llm, context_budget_tokens=60)
+    report = {}
+    summary = asyncio.run(summarizer.asummarize("what is attention?", [ATTENTION, ATTENTION, FOLDING], report=report))
+
+    assert summary == "A summary."
+    assert ATTENTION in llm.prompts[0] and FOLDING not in llm.prompts[0]
+    assert report["chunks"] == 1
+    assert report["duplicates"] == 1 and report["over_budget"] == 1
+    assert report["prompt_tokens"] == estimate_tokens(llm.prompts[0])
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from app.services.ingestion import IngestionPipeline
+
+LONG_TEXT = " ".join(f"Sentence number {i} talks about attention heads and transformer layers." for i in range(120))
+
+PAPERS = [
+    {"title": "Attention Is All You Need", "content": LONG_TEXT, "link": "http://arxiv.org/abs/1706.03762v7"},
+    {"title": "Protein Folding", "summary": "Proteins fold into three dimensional structures.", "link": "http://arxiv.org/abs/2000.00001v1"},
+]
+
+
+class CountingEmbeddingService:
+    def __init__(self, dim=16):
+        self.dim = dim
+        self.embedded = 0
+
+    def get_embeddings(self, texts):
+        self.embedded += len(texts)
+        rng = [np.random.default_rng(abs(hash(text)) % (2 ** 32)) for text in texts]
+        return np.vstack([r.standard_normal(self.dim) for r in rng]).astype(np.float32) if texts else np.zeros((0, self.dim), np.float32)
+
+    def embed_query(self, query):
+        return self.get_embeddings([query])
+
+
+@pytest.fixture
+def store(workdir):
+    from app.core.vector_store import VectorStore
+
+    vector_store = VectorStore(embedding_dem=16, embedding_service=CountingEmbeddingService())
+    yield vector_store
+    vector_store.close()
+
+
+def test_reingesting_the_same_papers_embeds_nothing(store):
+    pipeline = IngestionPipeline(store, store.embedding_service, batch_size=2)
+    first = pipeline.ingest(PAPERS)
+    embedded = store.embedding_service.embedded
+
+    second = pipeline.ingest(PAPERS)
+
+    # The long paper spans several batches; later batches of a new paper are still kept.
+    assert first["chunks"] > 2
+    assert first["duplicates"] == 0
+    assert second["chunks"] == 0
+    assert second["duplicates"] == first["chunks"]
+    assert store.embedding_service.embedded == embedded
+    assert store.index.ntotal == first["chunks"]
+
+
+def test_repeated_chunks_are_skipped_across_papers(store):
+    pipeline = IngestionPipeline(store, store.embedding_service)
+    copy = {"title": "Mirror", "summary": PAPERS[1]["summary"] + "  ", "link": "http://example.org/mirror"}
+
+    stats = pipeline.ingest([PAPERS[1], copy])
+
+    assert stats["chunks"] == 1
+    assert stats["duplicates"] == 1
+
+
+def test_deleted_papers_can_be_ingested_again(store):
+    pipeline = IngestionPipeline(store, store.embedding_service)
+    pipeline.ingest(PAPERS[1:])
+    store.delete_papers(url=PAPERS[1]["link"])
+
+    assert pipeline.ingest(PAPERS[1:])["chunks"] == 1
+
+
+def test_deduplicate_cleans_an_existing_store(store):
+    texts, metadatas = IngestionPipeline(store, store.embedding_service).prepare(PAPERS)
+    # Written without the pre-embedding check, as older versions did on every fallback.
+    for _ in range(3):
+        store.add_chunks(metadatas, store.embedding_service.get_embeddings(texts))
+    # Rows from before content hashing have no hash yet.
+    with store.metadata_store.conn:
+        store.metadata_store.conn.execute("UPDATE chunks SET content_hash = NULL")
+
+    stats = store.deduplicate()
+
+    assert stats == {"hashed": 3 * len(texts), "duplicates": 2 * len(texts)}
+    results = store.search_by_threshold("attention heads", similarity_threshold=-1.0, max_results=100)
+    assert sorted(r["metadata"]["chunk_id"] for r in results if r["metadata"]["title"] == "Protein Folding") == [0]
+    assert len(results) == len(texts)
+    assert store.deduplicate()["duplicates"] == 0
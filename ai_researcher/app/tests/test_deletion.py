@@ -0,0 +1,61 @@
+from app.tests.conftest import crash, make_store as make_base_store, metadatas_for
+
+TEXTS = [f"paper {i} studies topic {i} in depth" for i in range(6)]
+
+
+def make_store():
+    store = make_base_store(hybrid={"enabled": False})
+    # Compaction only when a test asks for it.
+    store.compaction_tombstone_ratio = 1.0
+    return store
+
+
+def urls(results):
+    return {r["metadata"]["url"] for r in results}
+
+
+def test_deleted_papers_are_hidden_at_once_and_stay_deleted(workdir):
+    store = make_store()
+    store.add_chunks(metadatas_for(TEXTS), store.embedding_service.get_embeddings(TEXTS))
+
+    assert store.delete_papers(url="http://example.org/1") == 1
+    assert store.delete_papers(title="Paper 1") == 0
+    assert "http://example.org/1" not in urls(store.search(TEXTS[1], top_k=6))
+    assert store.index.ntotal == 6
+    store.close()
+
+    store = make_store()
+    try:
+        assert store.tombstones == {1}
+        assert urls(store.search(TEXTS[1], top_k=6)) == {f"http://example.org/{i}" for i in range(6) if i != 1}
+    finally:
+        store.close()
+
+
+def test_compaction_removes_vectors_and_metadata(workdir):
+    store = make_store()
+    store.add_chunks(metadatas_for(TEXTS), store.embedding_service.get_embeddings(TEXTS))
+    store.delete_papers(url="http://example.org/0")
+    store.delete_papers(url="http://example.org/4")
+
+    assert store.compact() == 2
+    assert store.index.ntotal == 4
+    assert store.tombstones == set()
+    assert store.metadata_store.count() == 4
+    assert store.compact() == 0
+    store.close()
+
+
+def test_replay_keeps_live_chunks_of_a_batch_whose_last_chunk_was_deleted(workdir):
+    store = make_store()
+    store.add_chunks(metadatas_for(TEXTS), store.embedding_service.get_embeddings(TEXTS))
+    store.delete_papers(url="http://example.org/5")
+    crash(store)
+
+    store = make_store()
+    try:
+        assert store.index.ntotal == 5
+        assert store.tombstones == {5}
+        assert urls(store.search(TEXTS[2], top_k=6)) == {f"http://example.org/{i}" for i in range(5)}
+    finally:
+        store.close()
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("tokenizers")
+SentenceTransformer = pytest.importorskip("sentence_transformers").SentenceTransformer
+
+from app.core.onnx_embedder import ONNX_MODEL_DIR, ONNX_MODEL_FILE, OnnxEmbedder, export_quantized
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+SENTENCES = [
+    "Transformers use self-attention to model long-range dependencies.",
+    "Quantum error correction protects logical qubits from decoherence.",
+    "Graph neural networks aggregate information from neighbouring nodes.",
+    "We propose a retrieval-augmented generation pipeline for scientific papers.",
+    "Nuclear fission releases energy by splitting heavy atomic nuclei.",
+    "short",
+    "A much longer passage " * 60,
+]
+
+
+@pytest.fixture(scope="module")
+def onnx_model_dir(tmp_path_factory):
+    if os.path.exists(os.path.join(ONNX_MODEL_DIR, ONNX_MODEL_FILE)):
+        return ONNX_MODEL_DIR
+    out_dir = str(tmp_path_factory.mktemp("onnx-int8"))
+    try:
+        export_quantized(MODEL_NAME, out_dir)
+    except OSError as e:  # model weights not downloadable (offline CI)
+        pytest.skip(f"Cannot export {MODEL_NAME}: {e}")
+    return out_dir
+
+
+def test_onnx_int8_matches_torch_embeddings(onnx_model_dir):
+    torch_vectors = SentenceTransformer(MODEL_NAME).encode(SENTENCES, convert_to_numpy=True)
+    onnx_vectors = OnnxEmbedder(onnx_model_dir).encode(SENTENCES)
+
+    assert onnx_vectors.shape == torch_vectors.shape
+    # Both pipelines L2-normalise, so the row-wise dot product is the cosine similarity.
+    cosine = (onnx_vectors * torch_vectors).sum(axis=1)
+    assert cosine.min() > 0.97
+    assert cosine.mean() > 0.99
+
+
+def test_onnx_int8_preserves_neighbour_ranking(onnx_model_dir):
+    torch_vectors = SentenceTransformer(MODEL_NAME).encode(SENTENCES, convert_to_numpy=True)
+    onnx_vectors = OnnxEmbedder(onnx_model_dir).encode(SENTENCES)
+
+    torch_ranking = np.argsort(-(torch_vectors @ torch_vectors.T), axis=1)[:, 1]
+    onnx_ranking = np.argsort(-(onnx_vectors @ onnx_vectors.T), axis=1)[:, 1]
+    assert (torch_ranking == onnx_ranking).mean() >= 0.85
@@ -0,0 +1,64 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.core.embedding_batcher import EmbeddingBatcher
+
+
+class RecordingEncoder:
+    """
+    Encodes each text as [len(text), call number] and records every batch it gets.
+    """
+
+    def __init__(self, fail_first=0):
+        self.batches = []
+        self.fail_first = fail_first
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+            if len(self.batches) <= self.fail_first:
+                raise RuntimeError("model unavailable")
+            return np.array([[len(t), len(self.batches)] for t in texts], dtype=np.float32)
+
+
+def test_concurrent_queries_share_one_model_call():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_wait_ms=200, max_batch_size=8)
+    texts = ["a", "bb", "ccc", "dddd"]
+
+    futures = [batcher.submit(t) for t in texts]
+    rows = [f.result(timeout=5) for f in futures]
+
+    assert encoder.batches == [texts]
+    assert [row.tolist() for row in rows] == [[1, 1], [2, 1], [3, 1], [4, 1]]
+    stats = batcher.stats()
+    assert stats["batch_size"]["count"] == 1
+    assert stats["batch_size"]["sum"] == 4
+    assert stats["queue_delay_ms"]["count"] == 4
+
+
+def test_batches_are_capped_at_max_batch_size():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_wait_ms=100, max_batch_size=2)
+
+    futures = [batcher.submit(str(i)) for i in range(5)]
+    for future in futures:
+        future.result(timeout=5)
+
+    assert [len(batch) for batch in encoder.batches] == [2, 2, 1]
+    assert [t for batch in encoder.batches for t in batch] == ["0", "1", "2", "3", "4"]
+
+
+def test_a_failed_batch_fails_its_callers_and_the_worker_keeps_going():
+    encoder = RecordingEncoder(fail_first=1)
+    batcher = EmbeddingBatcher(encoder, max_wait_ms=50)
+
+    failed = [batcher.submit("a"), batcher.submit("b")]
+    for future in failed:
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            future.result(timeout=5)
+
+    assert batcher.embed("ccc").tolist() == [3, 2]
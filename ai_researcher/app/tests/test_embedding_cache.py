@@ -0,0 +1,105 @@
+import numpy as np
+
+from app.core import embedding_service
+from app.core.embedding_cache import EmbeddingCache
+
+DIM = 8
+
+
+def vectors_for(texts):
+    return np.vstack(
+        [np.random.default_rng(abs(hash(t)) % (2 ** 32)).standard_normal(DIM) for t in texts]
+    ).astype(np.float32)
+
+
+class CountingModel:
+    def __init__(self):
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self):
+        return DIM
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.encoded.append(list(texts))
+        return vectors_for(texts)
+
+
+def make_cache(tmp_path, **kwargs):
+    return EmbeddingCache("test-model", DIM, cache_dir=str(tmp_path), **kwargs)
+
+
+def test_hits_come_from_memory_then_disk_after_a_restart(tmp_path):
+    cache = make_cache(tmp_path)
+    texts = ["quarks", "gluons"]
+    assert cache.get_many(texts) == [None, None]
+    cache.put_many(texts, vectors_for(texts))
+    np.testing.assert_array_equal(np.vstack(cache.get_many(texts)), vectors_for(texts))
+    assert cache.stats()["hits_memory"] == 2
+    cache.close()
+
+    reopened = make_cache(tmp_path)
+    found = reopened.get_many(["gluons", "quarks", "leptons"])
+    np.testing.assert_array_equal(np.vstack(found[:2]), vectors_for(["gluons", "quarks"]))
+    assert found[2] is None
+    stats = reopened.stats()
+    assert (stats["entries"], stats["hits_disk"], stats["misses"]) == (2, 2, 1)
+    reopened.close()
+
+
+def test_full_cache_reuses_the_least_recently_used_slot(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2, memory_entries=0)
+    cache.put_many(["a"], vectors_for(["a"]))
+    cache.put_many(["b"], vectors_for(["b"]))
+    cache.get_many(["a"])  # "b" is now the least recently used
+    cache.put_many(["c"], vectors_for(["c"]))
+
+    a, b, c = cache.get_many(["a", "b", "c"])
+    assert b is None
+    np.testing.assert_array_equal(a, vectors_for(["a"])[0])
+    np.testing.assert_array_equal(c, vectors_for(["c"])[0])
+    assert cache.stats()["entries"] == 2
+    assert (tmp_path / "test-model" / "vectors.f32").stat().st_size == 2 * DIM * 4
+    cache.close()
+
+
+def test_batch_larger_than_the_cache_keeps_its_last_rows(tmp_path):
+    cache = make_cache(tmp_path, max_entries=3, memory_entries=0)
+    cache.put_many(["old"], vectors_for(["old"]))
+    texts = [f"text {i}" for i in range(5)]
+    cache.put_many(texts, vectors_for(texts))
+
+    found = cache.get_many(["old", *texts])
+    assert [v is not None for v in found] == [False, False, False, True, True, True]
+    np.testing.assert_array_equal(np.vstack(found[3:]), vectors_for(texts[2:]))
+    assert cache.stats()["entries"] == 3
+    cache.close()
+
+    reopened = make_cache(tmp_path, max_entries=3, memory_entries=0)
+    np.testing.assert_array_equal(np.vstack(reopened.get_many(texts[2:])), vectors_for(texts[2:]))
+    reopened.close()
+
+
+def test_keys_are_scoped_to_the_model(tmp_path):
+    cache = make_cache(tmp_path)
+    other = EmbeddingCache("other-model", DIM, cache_dir=str(tmp_path))
+    cache.put_many(["quarks"], vectors_for(["quarks"]))
+
+    assert other.get_many(["quarks"]) == [None]
+    cache.close()
+    other.close()
+
+
+def test_service_encodes_only_distinct_misses(tmp_path, monkeypatch):
+    model = CountingModel()
+    monkeypatch.setattr(embedding_service, "load_embedding_model", lambda *args: model)
+    service = embedding_service.EmbeddingService(cache=make_cache(tmp_path), backend="torch")
+    try:
+        first = service.get_embeddings(["quarks", "gluons", "quarks"])
+        second = service.get_embeddings(["gluons", "leptons"])
+    finally:
+        service.close()
+        service.cache.close()
+
+    assert model.encoded == [["quarks", "gluons"], ["leptons"]]
+    np.testing.assert_array_equal(first, vectors_for(["quarks", "gluons", "quarks"]))
+    np.testing.assert_array_equal(second, vectors_for(["gluons", "leptons"]))
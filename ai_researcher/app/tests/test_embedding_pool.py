@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+
+from app.core import embedding_pool
+from app.core.embedding_pool import EmbeddingPool
+from app.tests.conftest import RandomEmbeddingService, make_store, metadatas_for
+
+
+class FakeModel:
+    """
+    Encodes "text <n>" as [n, worker pid, worker threads], so rows show their order and origin.
+    """
+
+    def __init__(self, threads):
+        self.threads = threads
+
+    def encode(self, texts, convert_to_numpy=True):
+        return np.array([[int(t.split()[-1]), os.getpid(), self.threads] for t in texts], dtype=np.float32)
+
+
+def fake_init_worker(model_name, backend, config, threads):
+    # Runs in the spawned worker instead of loading a real model.
+    embedding_pool._worker_model = FakeModel(threads)
+
+
+def test_pool_returns_rows_in_input_order_and_shuts_down(monkeypatch):
+    monkeypatch.setattr(embedding_pool, "_init_worker", fake_init_worker)
+    pool = EmbeddingPool("fake", "torch", workers=2, shard_size=3)
+    texts = [f"text {i}" for i in range(20)]
+    try:
+        vectors = pool.encode(texts)
+        processes = list(pool._executor._processes.values())  #type: ignore
+    finally:
+        pool.close()
+
+    assert vectors[:, 0].tolist() == list(range(20))
+    assert len(processes) == 2
+    # Each worker gets an equal share of the cores.
+    assert set(vectors[:, 2].tolist()) == {max(1, (os.cpu_count() or 1) // 2)}
+    assert pool._executor is None
+    for process in processes:
+        process.join(timeout=5)
+        assert not process.is_alive()
+
+
+class RetrainedEmbeddingService(RandomEmbeddingService):
+    """
+    A different "model": unrelated vectors for the same texts. `during` runs on the first batch.
+    """
+
+    def __init__(self, during=None):
+        super().__init__()
+        self.during = during
+
+    def get_embeddings(self, texts):
+        if self.during is not None:
+            during, self.during = self.during, None
+            during()
+        return super().get_embeddings([f"retrained {t}" for t in texts])
+
+
+def test_reembed_rebuilds_the_index_keeping_ids_and_tombstones(workdir):
+    texts = [f"chunk {i}" for i in range(10)]
+    store = make_store(hybrid={"enabled": False})
+    try:
+        store.add_chunks(metadatas_for(texts), store.embedding_service.get_embeddings(texts))
+        store.delete_papers(title="Paper 3")
+        old_service = store.embedding_service
+
+        def add_late_chunk():
+            # Added mid-run with the old vectors; the rebuilt index must still hold it as-is.
+            store.add_chunks(metadatas_for(["late chunk"], start=10), old_service.get_embeddings(["late chunk"]))
+
+        store.embedding_service = RetrainedEmbeddingService(during=add_late_chunk)
+        assert store.reembed(batch_size=4) == 9
+
+        assert sorted(store._index_ids().tolist()) == [0, 1, 2, 4, 5, 6, 7, 8, 9, 10]
+        assert store.tombstones == {3}
+        for i in (0, 4, 9):
+            [hit] = store.search(texts[i], top_k=1)
+            assert hit["metadata"]["title"] == f"Paper {i}"
+            assert hit["similarity"] > 0.99
+        np.testing.assert_allclose(
+            store.index.reconstruct(10), store._prepare_vectors(old_service.get_embeddings(["late chunk"]))[0], rtol=1e-5
+        )
+    finally:
+        store.close()
+
+    reopened = make_store(embedding_service=RetrainedEmbeddingService(), hybrid={"enabled": False})
+    try:
+        assert reopened.search(texts[4], top_k=1)[0]["similarity"] > 0.99
+        assert reopened.tombstones == {3}
+    finally:
+        reopened.close()
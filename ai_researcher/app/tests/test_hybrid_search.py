@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+
+from app.core.sparse_index import SparseIndex, decode_varints, encode_varints, tokenize
+from app.tests.conftest import make_store, metadatas_for
+
+TEXTS = [
+    "Low-rank adaptation (LoRA) fine-tunes large language models with few trainable parameters.",
+    "Convolutional networks learn spatial hierarchies of image features.",
+    "Reinforcement learning agents maximise expected cumulative reward.",
+    "Graph neural networks pass messages along edges between nodes.",
+]
+
+
+def test_varints_round_trip_and_stay_small():
+    values = np.array([0, 1, 127, 128, 16383, 16384, 2 ** 31, 2 ** 34 + 5])
+    assert decode_varints(encode_varints(values)).tolist() == values.tolist()
+    assert len(encode_varints(np.ones(1000))) == 1000
+
+
+def test_tokenizer_keeps_model_names_whole():
+    assert tokenize("What is GPT-4 vs. T5 and BERT-base?") == ["gpt-4", "vs", "t5", "bert-base"]
+
+
+def test_sparse_index_ranks_rare_terms_and_persists(tmp_path):
+    path = str(tmp_path / "sparse.db")
+    index = SparseIndex(path)
+    # Built incrementally, one small batch at a time.
+    for i, text in enumerate(TEXTS):
+        index.add([i], [text])
+    index.close()
+
+    index = SparseIndex(path)
+    ids, scores, matched = index.search("LoRA language models", limit=3)
+    assert ids[0] == 0
+    assert matched[0] == 1.0
+    assert list(scores) == sorted(scores, reverse=True)
+
+    index.remove([0])
+    assert 0 not in index.search("LoRA", limit=3)[0]
+    index.optimize()
+    assert index.stats()["documents"] == len(TEXTS) - 1
+    assert len(index.search("LoRA", limit=3)[0]) == 0
+    index.close()
+
+
+@pytest.mark.parametrize("with_texts", [True, False])
+def test_optimize_drops_removed_documents_from_the_corpus_statistics(tmp_path, with_texts):
+    index = SparseIndex(str(tmp_path / "sparse.db"))
+    index.add(range(4), TEXTS)
+    # Only stopwords: counted as a document, but without postings.
+    index.add([4], ["the and of"])
+    removed_texts = [TEXTS[1], "the and of"]
+    index.remove([1, 4], removed_texts if with_texts else None)
+    optimized = index.optimize()
+    index.close()
+
+    # Texts restrict the rewrite to the removed document's terms; without them every term is scanned.
+    assert optimized == len(set(tokenize(TEXTS[1])))
+    index = SparseIndex(str(tmp_path / "sparse.db"))
+    fresh = SparseIndex(str(tmp_path / "fresh.db"))
+    fresh.add([0, 2, 3], [TEXTS[0], TEXTS[2], TEXTS[3]])
+    assert (index.n_docs, index.total_length) == (fresh.n_docs, fresh.total_length) == (
+        3, sum(len(tokenize(TEXTS[i])) for i in (0, 2, 3))
+    )
+    for query in ("networks learning", "language models reward"):
+        ids, scores, _ = index.search(query, limit=5)
+        fresh_ids, fresh_scores, _ = fresh.search(query, limit=5)
+        assert ids.tolist() == fresh_ids.tolist()
+        np.testing.assert_allclose(scores, fresh_scores)
+    index.close()
+    fresh.close()
+
+
+def test_hybrid_threshold_search_finds_exact_terms(workdir):
+    store = make_store()
+    store.add_chunks(metadatas_for(TEXTS), store.embedding_service.get_embeddings(TEXTS))
+
+    hybrid = store.search_by_threshold("LoRA", similarity_threshold=0.99)
+    store.hybrid = False
+    vector_only = store.search_by_threshold("LoRA", similarity_threshold=0.99)
+    store.close()
+
+    assert vector_only == []
+    assert [r["metadata"]["title"] for r in hybrid] == ["Paper 0"]
+    assert hybrid[0]["similarity"] is not None
+
+
+def test_search_fuses_both_lists(workdir):
+    store = make_store()
+    store.add_chunks(metadatas_for(TEXTS), store.embedding_service.get_embeddings(TEXTS))
+
+    # Only chunk 3 has these terms, so its keyword rank lifts it above any vector-only hit.
+    results = store.search("graph messages edges nodes", top_k=2)
+    tombstoned = store.delete_papers(url="http://example.org/3")
+    after_delete = store.search("graph messages edges nodes", top_k=4)
+    store.close()
+
+    assert results[0]["metadata"]["title"] == "Paper 3"
+    assert results[0]["score"] > results[1]["score"]
+    assert tombstoned == 1
+    assert "Paper 3" not in [r["metadata"]["title"] for r in after_delete]
+
+
+def test_existing_store_is_indexed_when_hybrid_is_enabled(workdir):
+    store = make_store(hybrid={"enabled": False})
+    store.add_chunks(metadatas_for(TEXTS), store.embedding_service.get_embeddings(TEXTS))
+    store.close()
+
+    store = make_store(hybrid={"enabled": True})
+    try:
+        assert store.sparse_index.stats()["documents"] == len(TEXTS)
+        assert store.search_by_threshold("LoRA", similarity_threshold=0.99)[0]["metadata"]["title"] == "Paper 0"
+    finally:
+        store.close()
+
+
+def test_ids_of_purged_chunks_are_not_reused_after_a_restart(workdir):
+    store = make_store()
+    store.add_chunks(metadatas_for(TEXTS), store.embedding_service.get_embeddings(TEXTS))
+    # The newest papers are deleted and purged, so no chunk row or vector keeps their ids.
+    store.compaction_tombstone_ratio = 1.0
+    store.delete_papers(url="http://example.org/2")
+    store.delete_papers(url="http://example.org/3")
+    assert store.compact() == 2
+    store.close()
+
+    store = make_store()
+    try:
+        extra = ["Mixture-of-experts layers route tokens to sparse expert networks."]
+        store.add_chunks(metadatas_for(extra, start=4), store.embedding_service.get_embeddings(extra))
+        assert store.search_by_threshold("mixture-of-experts", similarity_threshold=0.99)[0]["metadata"]["title"] == "Paper 4"
+        assert store.metadata_store.count() == store.index.ntotal == 3
+    finally:
+        store.close()
@@ -0,0 +1,148 @@
+import faiss  #type: ignore
+import numpy as np
+import pytest
+
+from app.core import index_factory
+from app.core.index_factory import (
+    build_index,
+    configure_search,
+    default_nlist,
+    index_type_of,
+    make_search_parameters,
+    min_training_vectors,
+    reconstruct_all,
+    resolve_index_type,
+    train_index,
+    unwrap_index,
+)
+from app.tests.conftest import make_store, metadatas_for
+
+DIM = 16
+PARAMS = {"nlist": 4, "pq_m": 4, "pq_nbits": 4, "hnsw_m": 8, "nprobe": 4, "ef_search": 32}
+
+
+def vectors(n, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "ivf_pq", "hnsw"])
+def test_each_index_type_builds_trains_and_finds_its_vectors(index_type):
+    data = vectors(400)
+    ids = np.arange(1000, 1400, dtype=np.int64)
+    index = faiss.IndexIDMap2(build_index(index_type, DIM, len(data), PARAMS))
+    train_index(index, data)
+    index.add_with_ids(data, ids)
+    configure_search(index, PARAMS)
+
+    assert index_type_of(index) == index_type
+    _, found = index.search(data[:10], 5)
+    if index_type == "ivf_pq":
+        # PQ codes are lossy: the vector itself only needs to be among the nearest few.
+        assert np.mean([ids[i] in found[i] for i in range(10)]) >= 0.8
+    else:
+        assert found[:, 0].tolist() == ids[:10].tolist()
+
+    restored = reconstruct_all(index)
+    assert restored.shape == data.shape
+    if index_type != "ivf_pq":
+        np.testing.assert_allclose(restored, data, rtol=1e-5)
+    # The IVF direct map built for reconstruction must not block removals afterwards.
+    if index_type != "hnsw":
+        assert index.remove_ids(faiss.IDSelectorBatch(ids[:5])) == 5
+
+
+def test_auto_picks_by_corpus_size():
+    assert resolve_index_type("auto", 0) == "flat"
+    assert resolve_index_type("auto", index_factory.AUTO_HNSW_MIN_VECTORS - 1) == "flat"
+    assert resolve_index_type("auto", index_factory.AUTO_HNSW_MIN_VECTORS) == "hnsw"
+    assert resolve_index_type("auto", index_factory.AUTO_IVF_PQ_MIN_VECTORS - 1) == "hnsw"
+    assert resolve_index_type("auto", index_factory.AUTO_IVF_PQ_MIN_VECTORS) == "ivf_pq"
+    assert resolve_index_type("ivf_flat", 10) == "ivf_flat"
+    with pytest.raises(ValueError):
+        resolve_index_type("annoy", 10)
+
+
+def test_nlist_and_training_sizes_leave_every_centroid_enough_points():
+    assert default_nlist(10_000) == 256
+    assert default_nlist(100) == 2
+    assert default_nlist(0) == 1
+    assert min_training_vectors("ivf_flat", 4) == 4 * index_factory.MIN_POINTS_PER_CENTROID
+    assert min_training_vectors("ivf_pq", 1) == index_factory.PQ_TRAINING_POINTS
+    assert min_training_vectors("hnsw", 4) == 0
+    with pytest.raises(ValueError):
+        build_index("ivf_pq", DIM, 400, {"pq_m": 5})
+
+
+def test_search_knobs_are_applied():
+    ivf = faiss.IndexIDMap2(build_index("ivf_flat", DIM, 400, {"nlist": 4}))
+    configure_search(ivf, {"nprobe": 16})
+    # nprobe is capped at the number of lists.
+    assert unwrap_index(ivf).nprobe == 4
+    params = make_search_parameters(ivf, params={"nprobe": 2})
+    assert isinstance(params, faiss.SearchParametersIVF) and params.nprobe == 2
+
+    hnsw = faiss.IndexIDMap2(build_index("hnsw", DIM, 400, {"hnsw_m": 8, "ef_construction": 40}))
+    configure_search(hnsw, {"ef_search": 48})
+    assert unwrap_index(hnsw).hnsw.efSearch == 48
+    assert unwrap_index(hnsw).hnsw.efConstruction == 40
+    params = make_search_parameters(hnsw, params={"ef_search": 96})
+    assert isinstance(params, faiss.SearchParametersHNSW) and params.efSearch == 96
+
+
+@pytest.mark.parametrize("index_type", ["hnsw", "ivf_flat"])
+def test_store_migrates_past_the_threshold_keeping_ids_and_results(workdir, index_type):
+    texts = [f"chunk {i}" for i in range(200)]
+    store = make_store(
+        index_type=index_type, migrate_threshold=100, index_params=PARAMS, hybrid={"enabled": False}
+    )
+    try:
+        store.add_chunks(metadatas_for(texts[:90]), store.embedding_service.get_embeddings(texts[:90]))
+        store.delete_papers(url="http://example.org/5")
+        before = [store.search(texts[i], top_k=1) for i in (0, 42, 89)]
+        assert index_type_of(store.index) == "flat"
+
+        store.add_chunks(metadatas_for(texts[90:], start=90), store.embedding_service.get_embeddings(texts[90:]))
+        assert index_type_of(store.index) == index_type
+        assert sorted(store._index_ids().tolist()) == list(range(200))
+        assert [store.search(texts[i], top_k=1) for i in (0, 42, 89)] == before
+        assert store.search(texts[150], top_k=1)[0]["metadata"]["title"] == "Paper 150"
+        # The tombstone is carried over into the new index.
+        assert "Paper 5" not in [r["metadata"]["title"] for r in store.search(texts[5], top_k=3)]
+    finally:
+        store.close()
+
+    reopened = make_store(index_type=index_type, migrate_threshold=100, index_params=PARAMS, hybrid={"enabled": False})
+    try:
+        assert index_type_of(reopened.index) == index_type
+        assert reopened.index.ntotal == 200
+    finally:
+        reopened.close()
+
+
+def test_auto_store_stays_flat_until_an_ann_index_can_be_trained(workdir, monkeypatch):
+    monkeypatch.setattr(index_factory, "AUTO_HNSW_MIN_VECTORS", 100)
+    texts = [f"chunk {i}" for i in range(120)]
+    store = make_store(index_type="auto", migrate_threshold=100, index_params=PARAMS, hybrid={"enabled": False})
+    try:
+        store.add_chunks(metadatas_for(texts[:99]), store.embedding_service.get_embeddings(texts[:99]))
+        assert index_type_of(store.index) == "flat"
+        store.add_chunks(metadatas_for(texts[99:], start=99), store.embedding_service.get_embeddings(texts[99:]))
+        assert index_type_of(store.index) == "hnsw"
+        configured = unwrap_index(store.index)
+        assert configured.hnsw.efSearch == PARAMS["ef_search"]
+    finally:
+        store.close()
+
+
+def test_ivf_waits_for_enough_training_vectors(workdir):
+    # nlist 4 needs 4 * 39 = 156 vectors before IVF-Flat can be trained.
+    texts = [f"chunk {i}" for i in range(160)]
+    store = make_store(index_type="ivf_flat", migrate_threshold=100, index_params=PARAMS, hybrid={"enabled": False})
+    try:
+        store.add_chunks(metadatas_for(texts[:150]), store.embedding_service.get_embeddings(texts[:150]))
+        assert index_type_of(store.index) == "flat"
+        store.add_chunks(metadatas_for(texts[150:], start=150), store.embedding_service.get_embeddings(texts[150:]))
+        assert index_type_of(store.index) == "ivf_flat"
+        assert unwrap_index(store.index).nprobe == PARAMS["nprobe"]
+    finally:
+        store.close()
@@ -0,0 +1,307 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+from app.dependencies import get_rag_service
+from app.main import app
+from app.services.ingestion import IngestionPipeline
+from app.services.job_queue import JobQueue
+from app.services.rag_service import RAGService
+from app.services.summarizer import Summarizer
+from app.tests.conftest import LetterEmbeddingService, make_store
+
+PAPERS = [
+    {"title": "Attention Is All You Need", "summary": "Transformers use self attention for translation.", "link": "http://arxiv.org/abs/1706.03762v7"},
+    {"title": "Protein Folding", "summary": "Proteins fold into three dimensional structures.", "link": "http://arxiv.org/abs/2000.00001v1"},
+]
+
+
+class FakeVectorStore:
+    embedding_dim = 26
+
+    def __init__(self):
+        self.added = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def add_listener(self, event, callback):
+        pass
+
+    def search_by_threshold(self, query, similarity_threshold, max_results=None):
+        return []
+
+    def filter_new(self, texts, metadatas, seen=None, by_url=True):
+        return texts, metadatas, 0
+
+    def add_chunks(self, metadatas, embeddings):
+        self.release.wait(5)
+        self.added.extend(metadatas)
+
+    def save_index(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeFetcher:
+    def __init__(self, papers=PAPERS):
+        self.papers = papers
+
+    def fetch_papers(self, query, max_results=3):
+        return [dict(p) for p in self.papers]
+
+    async def afetch_papers(self, query, max_results=3):
+        return [dict(p) for p in self.papers]
+
+
+class FakeLLM:
+    def generate_text(self, prompt, system_prompt=None):
+        return "A summary."
+
+    async def agenerate_text(self, prompt, system_prompt=None):
+        return "A summary."
+
+
+@pytest.fixture(autouse=True)
+def job_config(tmp_path, set_config):
+    set_config("ingestion", jobs={"path": str(tmp_path / "jobs.db")})
+    set_config("semantic_cache", enabled=False)
+
+
+def make_service(tmp_path):
+    embedding_service, vector_store = LetterEmbeddingService(), FakeVectorStore()
+    service = RAGService()
+    service._components.update(
+        embedding_service=embedding_service,
+        vector_store=vector_store,
+        fetcher=FakeFetcher(),
+        ingestion=IngestionPipeline(vector_store, embedding_service, batch_size=1),
+        summarizer=Summarizer(llm=FakeLLM()),
+    )
+    return service
+
+
+def test_job_runs_in_background_and_reports_progress(tmp_path):
+    updates = []
+
+    def handler(payload, progress):
+        for i in range(payload["steps"]):
+            progress({"step": i + 1})
+            updates.append(i + 1)
+        return {"steps": payload["steps"]}
+
+    queue = JobQueue({"ingest": handler}, path=str(tmp_path / "jobs.db")).start()
+    try:
+        job = queue.submit("ingest", {"steps": 3})
+        assert job["status"] in ("queued", "running", "done")
+        finished = queue.wait(job["id"], timeout=5)
+    finally:
+        queue.close()
+
+    assert finished["status"] == "done"
+    assert finished["progress"] == {"step": 3}
+    assert finished["result"] == {"steps": 3}
+    assert updates == [1, 2, 3]
+
+
+def test_duplicate_submissions_share_one_job(tmp_path):
+    queue = JobQueue({"ingest": lambda payload, progress: {}}, path=str(tmp_path / "jobs.db"))
+    first = queue.submit("ingest", {"n": 1}, dedupe_key="same")
+    second = queue.submit("ingest", {"n": 2}, dedupe_key="same")
+    other = queue.submit("ingest", {"n": 3}, dedupe_key="other")
+
+    assert first["id"] == second["id"]
+    assert other["id"] != first["id"]
+    assert queue.stats()["queued"] == 2
+    assert queue.stats()["deduplicated"] == 1
+    queue.close()
+
+
+def test_queued_jobs_survive_a_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    queue = JobQueue({"ingest": lambda payload, progress: {}}, path=path)
+    job = queue.submit("ingest", {"n": 1})
+    queue.close()
+
+    ran = []
+    restarted = JobQueue({"ingest": lambda payload, progress: ran.append(payload) or {"ok": True}}, path=path).start()
+    try:
+        finished = restarted.wait(job["id"], timeout=5)
+    finally:
+        restarted.close()
+
+    assert finished["status"] == "done"
+    assert ran == [{"n": 1}]
+
+
+def test_failed_job_records_the_error(tmp_path):
+    def handler(payload, progress):
+        raise ValueError("embedding model unavailable")
+
+    queue = JobQueue({"ingest": handler}, path=str(tmp_path / "jobs.db")).start()
+    try:
+        finished = queue.wait(queue.submit("ingest", {})["id"], timeout=5)
+    finally:
+        queue.close()
+
+    assert finished["status"] == "failed"
+    assert finished["error"] == "embedding model unavailable"
+
+
+def test_close_requeues_a_job_at_its_next_progress_report(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    started = threading.Event()
+    reports = []
+
+    def endless(payload, progress):
+        while True:
+            progress({"batch": len(reports)})
+            reports.append(len(reports))
+            started.set()
+            time.sleep(0.01)
+
+    queue = JobQueue({"ingest": endless}, path=path).start()
+    job = queue.submit("ingest", {"n": 1})
+    assert started.wait(5)
+    began = time.monotonic()
+    queue.close()
+    # Stopped at the next report, not cut off by a timeout with the job still writing.
+    assert time.monotonic() - began < 1
+    stopped_at = len(reports)
+    time.sleep(0.05)
+    assert len(reports) == stopped_at
+
+    restarted = JobQueue({"ingest": lambda payload, progress: {"resumed": payload.get("resumed", False)}}, path=path)
+    assert restarted.get(job["id"])["status"] == "queued"
+    restarted.start()
+    try:
+        finished = restarted.wait(job["id"], timeout=5)
+    finally:
+        restarted.close()
+    assert finished["status"] == "done"
+    # It had reported progress before the shutdown, so the handler is told it is resuming.
+    assert finished["result"] == {"resumed": True}
+
+
+def test_close_waits_for_a_job_that_does_not_report_progress(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    started = threading.Event()
+
+    def slow(payload, progress):
+        started.set()
+        time.sleep(0.3)
+        return {"ok": True}
+
+    queue = JobQueue({"ingest": slow}, path=path).start()
+    job = queue.submit("ingest", {})
+    assert started.wait(5)
+    queue.close()
+
+    reopened = JobQueue({"ingest": slow}, path=path)
+    try:
+        finished = reopened.get(job["id"])
+    finally:
+        reopened.close()
+    assert finished["status"] == "done"
+    assert finished["result"] == {"ok": True}
+
+
+def test_interrupted_ingest_resumes_the_rest_of_a_paper(workdir):
+    text = " ".join(f"Finding {i} shows that sparse attention keeps long contexts cheap." for i in range(100))
+    paper = {"title": "Long Paper", "content": text, "link": "http://arxiv.org/abs/2100.00001v1"}
+    store = make_store(hybrid={"enabled": False})
+    components = dict(embedding_service=store.embedding_service, vector_store=store, ingestion=IngestionPipeline(store, batch_size=2))
+    chunks = len(components["ingestion"].prepare([paper])[0])
+    assert chunks > 4
+
+    service = RAGService()
+    service._components.update(components)
+    add_chunks, interrupted = store.add_chunks, threading.Event()
+    stopper = threading.Thread(target=lambda: service.jobs.stop())
+
+    def add_then_shut_down(metadatas, embeddings):
+        added = add_chunks(metadatas, embeddings)
+        if not interrupted.is_set():
+            # Shutdown starts after the paper's first batch; the job stops at the progress report that follows.
+            interrupted.set()
+            stopper.start()
+            while not service.jobs._stopping:
+                time.sleep(0.01)
+        return added
+
+    store.add_chunks = add_then_shut_down
+    job = service.submit_ingest_job([paper])
+    assert interrupted.wait(5)
+    stopper.join(5)
+    assert service.jobs.get(job["id"])["status"] == "queued"
+    assert store.metadata_store.count() == 2
+    service._components.pop("vector_store")
+    service.close()
+
+    restarted = RAGService()
+    restarted._components.update(components)
+    try:
+        finished = restarted.jobs.wait(job["id"], timeout=10)
+        stored = sorted(m["chunk_id"] for m in store.metadata_store.get_many(range(chunks + 1)).values())
+    finally:
+        restarted.close()
+
+    assert finished["status"] == "done"
+    # The url was already indexed, but the paper's unwritten chunks were still added.
+    assert finished["result"]["chunks"] == chunks - 2
+    assert stored == list(range(chunks))
+
+
+def test_fallback_answers_from_fetched_abstracts_before_indexing(tmp_path):
+    service = make_service(tmp_path)
+    vector_store = service.vector_store
+    vector_store.release.clear()
+    try:
+        response = asyncio.run(service.aquery_knowledge("self attention transformers", similarity_threshold=0.5))
+
+        # Answered while the background job is still blocked on indexing.
+        assert not vector_store.added
+        assert response["source"] == "arxiv (indexing in background)"
+        assert response["results"][0]["metadata"]["title"] == "Attention Is All You Need"
+        assert response["summary"] == "A summary."
+
+        job_id = response["job_id"]
+        vector_store.release.set()
+        job = service.jobs.wait(job_id, timeout=5)
+        assert job["status"] == "done"
+        assert job["progress"]["papers_total"] == 2
+        assert job["result"]["chunks"] == len(vector_store.added)
+        assert {m["title"] for m in vector_store.added} == {p["title"] for p in PAPERS}
+
+        # The same papers fetched again reuse the finished job instead of re-indexing them.
+        again = service.query_knowledge("self attention transformers", similarity_threshold=0.5)
+        assert again["job_id"] == job_id
+    finally:
+        vector_store.release.set()
+        service.close()
+
+
+def test_job_status_endpoint(tmp_path):
+    service = make_service(tmp_path)
+    app.dependency_overrides[get_rag_service] = lambda: service
+    try:
+        job = service.submit_ingest_job(PAPERS)
+        service.jobs.wait(job["id"], timeout=5)
+        client = TestClient(app)
+        response = client.get(f"/api/jobs/{job['id']}")
+        missing = client.get("/api/jobs/does-not-exist")
+    finally:
+        app.dependency_overrides.clear()
+        service.close()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "done"
+    assert body["papers"] == 2
+    assert body["progress"]["chunks"] == body["result"]["chunks"]
+    assert missing.status_code == 404
@@ -0,0 +1,170 @@
+import asyncio
+import sys
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+from app.core.llm_cache import (
+    DiskBackend,
+    LLMCache,
+    MemoryBackend,
+    RedisBackend,
+    bypass_requested,
+    cache_bypassed,
+    cache_key,
+    llm_cache_from_config,
+)
+from app.dependencies import get_rag_service
+from app.main import app
+
+
+def disk_backend(tmp_path, max_entries=10):
+    return DiskBackend(str(tmp_path / "responses.db"), max_entries)
+
+
+def redis_backend(tmp_path, max_entries=10):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("redis")
+    backend = RedisBackend("redis://localhost:6379/0", max_entries)
+    backend.client = fakeredis.FakeRedis(decode_responses=True)
+    return backend
+
+
+BACKENDS = {"memory": lambda tmp_path, max_entries=10: MemoryBackend(max_entries), "disk": disk_backend, "redis": redis_backend}
+
+
+@pytest.mark.parametrize("name", sorted(BACKENDS))
+def test_backends_store_and_evict_the_least_recently_used(tmp_path, name):
+    backend = BACKENDS[name](tmp_path, max_entries=2)
+    backend.set("a", "answer a", ttl=60)
+    backend.set("b", "answer b", ttl=60)
+    assert backend.get("a") == "answer a"  # "b" is now the least recently used
+    backend.set("c", "answer c", ttl=60)
+
+    assert backend.get("b") is None
+    assert (backend.get("a"), backend.get("c")) == ("answer a", "answer c")
+    assert backend.size() == 2
+    assert backend.evictions == 1
+    backend.close()
+
+
+@pytest.mark.parametrize("name", ["memory", "disk"])
+def test_expired_entries_are_misses(tmp_path, name):
+    backend = BACKENDS[name](tmp_path)
+    backend.set("gone", "stale answer", ttl=0)
+    backend.set("kept", "fresh answer", ttl=60)
+
+    assert backend.get("gone") is None
+    assert backend.get("kept") == "fresh answer"
+    backend.close()
+
+
+def test_disk_entries_survive_a_restart(tmp_path):
+    backend = disk_backend(tmp_path)
+    backend.set("k", "answer", ttl=60)
+    backend.close()
+
+    reopened = disk_backend(tmp_path)
+    assert reopened.get("k") == "answer"
+    reopened.close()
+
+
+def test_key_covers_model_system_prompt_and_prompt():
+    base = cache_key("gemini-2.5-flash", "Be brief.", "Summarise LoRA.")
+    assert base == cache_key("gemini-2.5-flash", "Be brief.", "Summarise LoRA.")
+    assert len({
+        base,
+        cache_key("gemini-2.5-pro", "Be brief.", "Summarise LoRA."),
+        cache_key("gemini-2.5-flash", None, "Summarise LoRA."),
+        cache_key("gemini-2.5-flash", "Be brief.", "Summarise QLoRA."),
+        # Fields are encoded separately, so moving text between them changes the key.
+        cache_key("gemini-2.5-flash", "Be brief. Summarise", " LoRA."),
+    }) == 5
+
+
+def test_bypass_skips_reads_and_writes_for_the_current_context():
+    cache = LLMCache(MemoryBackend())
+    key = cache_key("m", None, "p")
+    with cache_bypassed():
+        assert bypass_requested()
+        cache.put(key, "not stored")
+        assert cache.get(key) is None
+    assert not bypass_requested()
+    assert cache.get(key) is None
+
+    cache.put(key, "stored")
+    with cache_bypassed(False):
+        assert cache.get(key) == "stored"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (1, 1, 1)
+
+
+def test_a_failing_backend_is_a_miss():
+    class BrokenBackend(MemoryBackend):
+        def get(self, key):
+            raise ConnectionError("cache down")
+
+        def set(self, key, value, ttl):
+            raise ConnectionError("cache down")
+
+    cache = LLMCache(BrokenBackend())
+    cache.put("k", "v")
+    assert cache.get("k") is None
+    assert cache.stats()["errors"] == 2
+
+
+def test_cache_from_config(tmp_path, monkeypatch):
+    assert llm_cache_from_config({"enabled": False}) is None
+    assert llm_cache_from_config({}).backend.name == "memory"
+    disk = llm_cache_from_config({"backend": "disk", "path": str(tmp_path / "llm.db"), "ttl_seconds": 5})
+    assert (disk.backend.name, disk.ttl_seconds) == ("disk", 5)
+    disk.close()
+    with pytest.raises(ValueError):
+        llm_cache_from_config({"backend": "memcached"})
+
+    monkeypatch.setitem(sys.modules, "redis", None)
+    with pytest.raises(ImportError, match="pip install redis"):
+        llm_cache_from_config({"backend": "redis"})
+
+
+def test_bypass_header_reaches_the_request_context():
+    seen = []
+
+    class RecordingService:
+        async def aquery_knowledge(self, **kwargs):
+            seen.append(bypass_requested())
+            return {"status": "success", "source": "local", "results": [], "summary": "A summary."}
+
+    app.dependency_overrides[get_rag_service] = lambda: RecordingService()
+    try:
+        client = TestClient(app)
+        client.post("/api/query", json={"query": "lora"}, headers={"X-Cache-Bypass": "true"})
+        client.post("/api/query", json={"query": "lora"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert seen == [True, False]
+
+
+def test_gemini_answers_repeated_prompts_from_the_cache(monkeypatch):
+    pytest.importorskip("langchain_google_genai")
+    from app.core.llm import GeminiLLM
+
+    class FakeChatModel:
+        calls = 0
+
+        async def ainvoke(self, messages):
+            FakeChatModel.calls += 1
+            return type("Response", (), {"content": f"answer {FakeChatModel.calls}"})()
+
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    llm = GeminiLLM(cache=LLMCache(MemoryBackend()))
+    llm.llm = FakeChatModel()
+
+    first = asyncio.run(llm.agenerate_text("Summarise LoRA.", system_prompt="Be brief."))
+    second = asyncio.run(llm.agenerate_text("Summarise LoRA.", system_prompt="Be brief."))
+    with cache_bypassed():
+        fresh = asyncio.run(llm.agenerate_text("Summarise LoRA.", system_prompt="Be brief."))
+
+    assert (first, second, fresh) == ("answer 1", "answer 1", "answer 2")
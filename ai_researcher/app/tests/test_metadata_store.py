@@ -0,0 +1,108 @@
+import json
+import os
+
+import faiss  #type: ignore
+import pytest
+
+from app.core.metadata_store import MAX_SQL_VARIABLES, MetadataStore, content_hash
+from app.tests.conftest import RandomEmbeddingService, make_store, metadatas_for
+
+
+@pytest.fixture
+def metadata_store(tmp_path):
+    store = MetadataStore(str(tmp_path / "metadata.db"))
+    yield store
+    store.close()
+
+
+def test_get_many_returns_only_the_ids_that_exist(metadata_store):
+    count = MAX_SQL_VARIABLES + 50
+    metadata_store.add_many(range(count), metadatas_for([f"chunk {i}" for i in range(count)]))
+
+    # More ids than one statement can bind, plus a few that were never written.
+    found = metadata_store.get_many(list(range(count)) + [count, count + 1])
+    assert sorted(found) == list(range(count))
+    assert found[MAX_SQL_VARIABLES + 10]["chunk"]["text"] == f"chunk {MAX_SQL_VARIABLES + 10}"
+    assert metadata_store.get_many([]) == {}
+
+
+def test_tombstones_hide_chunks_until_purged(metadata_store):
+    metadata_store.add_many(range(3), metadatas_for(["alpha", "beta", "gamma"]))
+    metadata_store.add_tombstones([1])
+
+    assert metadata_store.tombstones() == {1}
+    assert metadata_store.ids_for(url="http://example.org/1") == []
+    assert [row_id for batch in metadata_store.iter_batches() for row_id, _ in batch] == [0, 2]
+    assert metadata_store.indexed_hashes([content_hash("beta"), content_hash("gamma")]) == {content_hash("gamma")}
+    # Tombstoned rows are still readable until compaction purges them.
+    assert 1 in metadata_store.get_many([1])
+
+    metadata_store.purge([1])
+    assert metadata_store.tombstones() == set()
+    assert metadata_store.get_many([1]) == {}
+    assert metadata_store.count() == 2
+
+
+def test_high_water_survives_purge_and_reopen(tmp_path):
+    path = str(tmp_path / "metadata.db")
+    store = MetadataStore(path)
+    assert store.max_id() == -1
+    store.add_many([4, 9], metadatas_for(["a", "b"]))
+    store.add_tombstones([9])
+    store.purge([9])
+    assert store.max_id() == 9
+    store.close()
+
+    reopened = MetadataStore(path)
+    try:
+        # Purged ids must never be handed out again.
+        assert reopened.max_id() == 9
+        reopened.clear()
+        assert reopened.max_id() == -1
+    finally:
+        reopened.close()
+
+
+def test_import_json_keeps_positions_as_ids(tmp_path, metadata_store):
+    legacy = metadatas_for([f"chunk {i}" for i in range(7)])
+    path = tmp_path / "metadata.json"
+    path.write_text(json.dumps(legacy), encoding="utf-8")
+
+    assert metadata_store.import_json(str(path), batch_size=3) == 7
+    assert metadata_store.get_many(range(7)) == dict(enumerate(legacy))
+    assert metadata_store.max_id() == 6
+    assert metadata_store.ids_for(title="Paper 4") == [4]
+
+
+def test_legacy_store_migrates_to_sqlite_on_open(workdir):
+    texts = [f"legacy chunk {i}" for i in range(5)]
+    directory = workdir / "app" / "data" / "vector_store"
+    os.makedirs(directory)
+    # The pre-SQLite layout: a positional (non id-mapped) index next to a metadata.json list.
+    index = faiss.IndexFlatL2(16)
+    index.add(RandomEmbeddingService().get_embeddings(texts))
+    faiss.write_index(index, str(directory / "index.faiss"))
+    (directory / "metadata.json").write_text(json.dumps(metadatas_for(texts)), encoding="utf-8")
+
+    store = make_store(hybrid={"enabled": False})
+    try:
+        assert not (directory / "metadata.json").exists()
+        assert (directory / "metadata.json.migrated").exists()
+        assert sorted(store._index_ids().tolist()) == list(range(5))
+        for i, text in enumerate(texts):
+            [hit] = store.search(text, top_k=1)
+            assert hit["metadata"]["chunk"]["text"] == text
+            assert hit["metadata"]["title"] == f"Paper {i}"
+
+        # New chunks continue after the imported ids.
+        store.add_chunks(metadatas_for(["fresh chunk"], start=5), store.embedding_service.get_embeddings(["fresh chunk"]))
+        assert store.metadata_store.ids_for(title="Paper 5") == [5]
+    finally:
+        store.close()
+
+    reopened = make_store(hybrid={"enabled": False})
+    try:
+        assert reopened.metadata_store.count() == 6
+        assert reopened.search(texts[3], top_k=1)[0]["metadata"]["title"] == "Paper 3"
+    finally:
+        reopened.close()
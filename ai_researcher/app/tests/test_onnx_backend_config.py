@@ -0,0 +1,15 @@
+import sys
+
+import pytest
+
+from app.core.embedding_service import load_embedding_model
+
+
+@pytest.mark.parametrize("missing", ["onnxruntime", "tokenizers"])
+def test_onnx_backend_names_the_missing_extra(monkeypatch, tmp_path, missing):
+    if missing == "tokenizers":
+        pytest.importorskip("onnxruntime")
+    monkeypatch.setitem(sys.modules, missing, None)
+
+    with pytest.raises(ImportError, match=rf"`{missing}`.*ai-researcher\[onnx\]"):
+        load_embedding_model("all-MiniLM-L6-v2", "onnx", {"onnx_model_dir": str(tmp_path)})
@@ -0,0 +1,107 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import app.main
+from app.dependencies import get_rag_service
+from app.main import app as api
+from app.services.rag_service import COMPONENTS, RAGService
+
+
+class StubComponent:
+    def close(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+class GatedService(RAGService):
+    """
+    Every component is a stub that only finishes loading once `gate` is set,
+    so the test controls when warm-up completes.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def _component(self, name, factory):
+        def stub():
+            self.gate.wait(5)
+            return StubComponent()
+        return super()._component(name, stub)
+
+
+def serve(service, monkeypatch):
+    # The lifespan resolves the service directly, the routes through the dependency.
+    monkeypatch.setattr(app.main, "get_rag_service", lambda: service)
+    api.dependency_overrides[get_rag_service] = lambda: service
+    return TestClient(api)
+
+
+def wait_ready(client, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/api/ready")
+        if response.status_code == 200:
+            return response
+        time.sleep(0.02)
+    return response
+
+
+def test_ready_is_503_until_warm_up_finishes(monkeypatch):
+    service = GatedService()
+    try:
+        with serve(service, monkeypatch) as client:
+            loading = client.get("/api/ready")
+            service.gate.set()
+            ready = wait_ready(client)
+    finally:
+        api.dependency_overrides.clear()
+        service.gate.set()
+
+    assert loading.status_code == 503
+    assert loading.json()["ready"] is False
+    assert ready.status_code == 200
+    components = ready.json()["components"]
+    assert set(components) == set(COMPONENTS)
+    assert all(c["loaded"] and c["load_seconds"] is not None for c in components.values())
+
+
+def test_without_warm_up_components_wait_for_first_use(monkeypatch, set_config):
+    set_config("server", warm_up=False)
+    service = GatedService()
+    service.gate.set()
+    try:
+        with serve(service, monkeypatch) as client:
+            time.sleep(0.1)
+            idle = client.get("/api/ready")
+            service.warm_up()
+            ready = client.get("/api/ready")
+    finally:
+        api.dependency_overrides.clear()
+
+    assert idle.status_code == 503
+    assert not any(c["loaded"] for c in idle.json()["components"].values())
+    assert ready.status_code == 200
+
+
+def test_failed_component_keeps_the_service_unready(monkeypatch):
+    class BrokenFetcher(GatedService):
+        def _component(self, name, factory):
+            if name == "fetcher":
+                def broken():
+                    raise RuntimeError("no network")
+                return RAGService._component(self, name, broken)
+            return super()._component(name, factory)
+
+    service = BrokenFetcher()
+    service.gate.set()
+    status = service.warm_up()
+
+    assert status["ready"] is False
+    assert status["components"]["fetcher"]["error"] == "no network"
+    assert status["components"]["vector_store"]["loaded"]
+    service.close()
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+from app.core.reranker import CrossEncoderReranker
+from app.services.rag_service import RAGService
+from app.services.summarizer import Summarizer
+
+
+def result(title, text, score):
+    return {"score": score, "similarity": score, "metadata": {"title": title, "chunk": {"text": text}}}
+
+
+# Vector order puts the chunk that actually answers the question last.
+CANDIDATES = [
+    result("Protein Folding", "Proteins fold into three dimensional structures.", 0.71),
+    result("Graph Networks", "Message passing over graph nodes.", 0.69),
+    result("Attention", "Self attention lets transformers relate every token pair.", 0.64),
+]
+
+
+class FakeCrossEncoder:
+    """
+    Scores a (query, text) pair by shared words; records each predict call.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32):
+        self.calls.append((len(pairs), batch_size))
+        time.sleep(self.delay)
+        return [len(set(q.lower().split()) & set(t.lower().split())) for q, t in pairs]
+
+
+class FakeVectorStore:
+    embedding_dim = 8
+
+    def __init__(self, results=CANDIDATES):
+        self.results = results
+        self.limits = []
+
+    def add_listener(self, event, callback):
+        pass
+
+    def search_by_threshold(self, query, similarity_threshold, max_results=None):
+        self.limits.append(max_results)
+        return [dict(r) for r in self.results[:max_results]]
+
+    def close(self):
+        pass
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def agenerate_text(self, prompt, system_prompt=None):
+        self.prompts.append(prompt)
+        return "A summary."
+
+
+def test_rerank_scores_all_candidates_in_one_batch():
+    model = FakeCrossEncoder()
+    reranker = CrossEncoderReranker(model=model)
+
+    ranked, info = reranker.rerank("how does self attention work in transformers", CANDIDATES, top_n=2)
+
+    assert model.calls == [(3, 3)]
+    assert [r["metadata"]["title"] for r in ranked] == ["Attention", "Protein Folding"]
+    assert ranked[0]["rerank_score"] > ranked[1]["rerank_score"]
+    assert info["reranked"] and info["candidates"] == 3
+    assert reranker.stats()["reranked"] == 1
+    reranker.close()
+
+
+def test_budget_overrun_falls_back_to_vector_order():
+    reranker = CrossEncoderReranker(model=FakeCrossEncoder(delay=0.3), budget_ms=20)
+
+    start = time.perf_counter()
+    ranked, info = reranker.rerank("self attention transformers", CANDIDATES, top_n=2)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.2
+    assert not info["reranked"]
+    assert ranked == CANDIDATES[:2]
+    assert "rerank_score" not in ranked[0]
+    assert reranker.stats()["timed_out"] == 1
+
+    ranked, info = asyncio.run(reranker.arerank("self attention transformers", CANDIDATES, top_n=2))
+    assert not info["reranked"] and ranked == CANDIDATES[:2]
+    reranker.close()
+
+
+def test_rag_service_reranks_a_wider_pool_and_reports_timings(set_config):
+    set_config("semantic_cache", enabled=False)
+    set_config("reranker", enabled=True, candidates=3)
+    llm, vector_store = FakeLLM(), FakeVectorStore()
+    service = RAGService()
+    service._components.update(
+        vector_store=vector_store,
+        summarizer=Summarizer(llm=llm),
+        reranker=CrossEncoderReranker(model=FakeCrossEncoder()),
+    )
+    try:
+        response = asyncio.run(service.aquery_knowledge("self attention transformers", top_k=1))
+    finally:
+        service.close()
+
+    assert vector_store.limits == [3]
+    assert [r["metadata"]["title"] for r in response["results"]] == ["Attention"]
+    assert "Self attention" in llm.prompts[0] and "Proteins" not in llm.prompts[0]
+    assert set(response["timings"]) >= {"cache", "search", "rerank", "llm"}
@@ -0,0 +1,121 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from app.core import semantic_cache
+from app.core.semantic_cache import SemanticCache
+from app.tests.conftest import make_store, metadatas_for
+
+DIM = 8
+PARAMS = (0.5, 3, "default")
+ANSWER = {"status": "success", "summary": "Cached.", "results": [{"similarity": 0.9}]}
+
+
+def unit(*values):
+    vector = np.zeros((1, DIM), dtype=np.float32)
+    vector[0, : len(values)] = values
+    return vector
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # One tick per call, so last-used order and expiry never depend on timer resolution.
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: float(next(ticks)))
+
+
+def test_paraphrases_hit_and_unrelated_queries_miss(clock):
+    cache = SemanticCache(DIM, similarity=0.9)
+    cache.put("what is attention", unit(1, 0.1), PARAMS, ANSWER)
+
+    hit = cache.lookup(unit(1, 0.2), PARAMS)
+    assert hit == ANSWER
+    # Callers get a copy they can annotate freely.
+    hit["cached"] = True
+    assert "cached" not in cache.lookup(unit(1, 0.2), PARAMS)
+
+    assert cache.lookup(unit(0.2, 1), PARAMS) is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_only_the_same_search_parameters_match(clock):
+    cache = SemanticCache(DIM, similarity=0.9)
+    cache.put("what is attention", unit(1), PARAMS, ANSWER)
+
+    assert cache.lookup(unit(1), (0.5, 5, "default")) is None
+    assert cache.lookup(unit(1), (0.5, 3, "physics")) is None
+    assert cache.lookup(unit(1), PARAMS) == ANSWER
+
+
+def test_expired_entries_miss_and_are_dropped(clock):
+    cache = SemanticCache(DIM, ttl_seconds=1)
+    cache.put("what is attention", unit(1), PARAMS, ANSWER)
+
+    assert cache.lookup(unit(1), PARAMS) is None
+    assert cache.stats()["entries"] == 0
+    assert cache.index.ntotal == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = SemanticCache(DIM, max_entries=2)
+    cache.put("a", unit(1), PARAMS, {"summary": "a"})
+    cache.put("b", unit(0, 1), PARAMS, {"summary": "b"})
+    assert cache.lookup(unit(1), PARAMS) == {"summary": "a"}
+
+    cache.put("c", unit(0, 0, 1), PARAMS, {"summary": "c"})
+    assert cache.lookup(unit(0, 1), PARAMS) is None
+    assert cache.lookup(unit(1), PARAMS) == {"summary": "a"}
+    assert cache.lookup(unit(0, 0, 1), PARAMS) == {"summary": "c"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_new_chunks_invalidate_answers_they_reach_on_the_cosine_scale():
+    cache = SemanticCache(DIM)
+    cache.put("a", unit(1), PARAMS, ANSWER)
+    cache.put("b", unit(0, 1), (0.9, 3, "default"), ANSWER)
+
+    # cos = 0.6 to "a" (threshold 0.5), 0.8 to "b" (threshold 0.9).
+    assert cache.invalidate_similar(unit(0.6, 0.8)) == 1
+    assert [entry["query"] for entry in cache.entries.values()] == ["b"]
+
+
+def test_l2_stores_are_compared_on_their_own_similarity_scale():
+    cache = SemanticCache(DIM)
+    cache.put("far", unit(3), PARAMS, ANSWER)
+    cache.put("near", unit(0.1), PARAMS, ANSWER)
+
+    # Same direction as "far" (cosine 1) but 1 / (1 + 3²) = 0.1 below its threshold.
+    assert cache.invalidate_similar(unit(6), metric="l2") == 0
+    # Orthogonal to "near" (cosine 0) yet 1 / (1 + 0.02) ≈ 0.98 similar in L2 terms.
+    assert cache.invalidate_similar(unit(0, 0.1), metric="l2") == 1
+    assert [entry["query"] for entry in cache.entries.values()] == ["far"]
+
+
+def test_keyword_matches_invalidate_answers_on_hybrid_stores():
+    cache = SemanticCache(DIM)
+    cache.put("graph neural networks", unit(1), (0.9, 3, "default"), ANSWER)
+    unrelated_vector = unit(0, 1)
+
+    assert cache.invalidate_similar(unrelated_vector, ["graph neural networks for molecules"]) == 0
+    assert cache.invalidate_similar(unrelated_vector, ["a graph of protein folds"], min_term_match=0.5) == 0
+    assert cache.invalidate_similar(unrelated_vector, ["neural networks on a graph"], min_term_match=0.5) == 1
+
+
+@pytest.mark.parametrize("hybrid", [True, False])
+def test_watch_uses_the_store_settings(workdir, hybrid):
+    store = make_store(hybrid={"enabled": hybrid})
+    cache = SemanticCache(store.embedding_dim)
+    cache.watch(store)
+    query = "graph neural networks"
+    cache.put(query, store.embedding_service.embed_query(query), (0.9, 3, "default"), ANSWER)
+    try:
+        # A random embedding far from the query: only a keyword hit can reach the answer.
+        text = "message passing in graph neural networks"
+        store.add_chunks(metadatas_for([text]), store.embedding_service.get_embeddings([text]))
+        assert cache.stats()["entries"] == (0 if hybrid else 1)
+
+        store.delete_papers(title="Paper 0")
+        assert cache.stats()["entries"] == 0
+    finally:
+        store.close()
@@ -0,0 +1,87 @@
+from app.core.sharded_store import ShardedVectorStore, paper_id, shard_of
+from app.core.vector_store import VectorStore
+from app.tests.conftest import RandomEmbeddingService
+
+# Flat and vector-only, so sharded and single-index results must match exactly.
+CONFIG = {"index_type": "flat", "hybrid": {"enabled": False}}
+
+
+def papers(n):
+    texts = [f"paper {i} chunk {j}" for i in range(n) for j in range(2)]
+    metadatas = [
+        {"title": f"Paper {i}", "url": f"http://arxiv.org/abs/{i}", "chunk_id": j, "chunk": {"text": f"paper {i} chunk {j}"}}
+        for i in range(n)
+        for j in range(2)
+    ]
+    return texts, metadatas
+
+
+def test_placement_is_deterministic_by_paper_id():
+    # A fixed hash: the same shard in every process, whatever PYTHONHASHSEED is.
+    assert [shard_of(f"http://arxiv.org/abs/{i}", 4) for i in range(8)] == [3, 2, 0, 1, 0, 3, 3, 1]
+    assert paper_id({"title": "Untitled", "url": ""}) == "Untitled"
+
+
+def test_sharded_search_matches_a_single_index_and_survives_restart(workdir):
+    embedding_service = RandomEmbeddingService()
+    texts, metadatas = papers(30)
+    single = VectorStore(embedding_dem=16, embedding_service=embedding_service, directory=str(workdir / "single"), config=CONFIG)
+    single.add_chunks(metadatas, embedding_service.get_embeddings(texts))
+
+    sharded = ShardedVectorStore(3, embedding_dem=16, embedding_service=embedding_service, root=str(workdir / "shards"), config=CONFIG)
+    try:
+        kept_texts, kept_metadatas, skipped = sharded.filter_new(texts, metadatas)
+        assert skipped == 0
+        sharded.add_chunks(kept_metadatas, embedding_service.get_embeddings(kept_texts))
+
+        sizes = sharded.shard_sizes()
+        expected = [0, 0, 0]
+        for i in range(30):
+            expected[shard_of(f"http://arxiv.org/abs/{i}", 3)] += 2
+        assert sizes == expected and sum(sizes) == 60
+
+        for query in ("paper 3 chunk 1", "attention", "quantum error correction"):
+            assert sharded.search(query, top_k=5) == single.search(query, top_k=5)
+            assert sharded.search_by_threshold(query, 0.2, max_results=10) == single.search_by_threshold(query, 0.2, max_results=10)
+
+        # Already indexed papers are skipped on their own shard.
+        assert sharded.filter_new(texts[:4], metadatas[:4])[2] == 4
+        assert sharded.delete_papers(url="http://arxiv.org/abs/3") == 2
+    finally:
+        sharded.close()
+        single.close()
+
+    reopened = ShardedVectorStore(3, embedding_dem=16, embedding_service=embedding_service, root=str(workdir / "shards"), config=CONFIG)
+    try:
+        assert sum(reopened.shard_sizes()) == 58
+        assert reopened.search("paper 3 chunk 1", top_k=1)[0]["metadata"]["url"] != "http://arxiv.org/abs/3"
+    finally:
+        reopened.close()
+
+
+def test_hybrid_sharded_search_matches_a_single_index(workdir):
+    # The default config: BM25 fused with vector hits. Keyword scores use corpus-wide statistics.
+    words = "attention graph quantum protein lattice retrieval transformer diffusion spectrum qubit".split()
+    # Distinct lengths, so no two chunks tie on BM25 score and both stores rank them the same way.
+    texts = [f"{words[i % 10]} {words[(i * 3) % 10]} model-{i} {words[(i * 7) % 10]}" + " study" * i for i in range(40)]
+    metadatas = [
+        {"title": f"Paper {i}", "url": f"http://arxiv.org/abs/{i}", "chunk_id": 0, "chunk": {"text": text}}
+        for i, text in enumerate(texts)
+    ]
+    config = {"index_type": "flat", "hybrid": {"enabled": True, "candidates": 8}}
+    embedding_service = RandomEmbeddingService()
+    single = VectorStore(embedding_dem=16, embedding_service=embedding_service, directory=str(workdir / "single"), config=config)
+    single.add_chunks(metadatas, embedding_service.get_embeddings(texts))
+
+    sharded = ShardedVectorStore(3, embedding_dem=16, embedding_service=embedding_service, root=str(workdir / "shards"), config=config)
+    try:
+        sharded.add_chunks(metadatas, embedding_service.get_embeddings(texts))
+        for query in ("quantum protein", "model-7 attention", "lattice spectrum diffusion"):
+            expected = single.search(query, top_k=5)
+            assert sharded.search(query, top_k=5) == expected
+            assert sharded.search_by_threshold(query, 0.3, max_results=10) == single.search_by_threshold(query, 0.3, max_results=10)
+        # Only chunk 7 has the term, so it is fused in level with the best vector hit.
+        assert "Paper 7" in [r["metadata"]["title"] for r in sharded.search("model-7", top_k=2)]
+    finally:
+        sharded.close()
+        single.close()
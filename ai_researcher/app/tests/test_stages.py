@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.utils.concurrency import DEFAULT_STAGE_LIMITS, Stage, build_stages
+
+
+class Tracker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.running -= 1
+
+
+def test_blocking_work_never_exceeds_the_stage_limit():
+    stage = Stage("search", 2)
+    tracker = Tracker()
+    snapshots = []
+
+    def work(i):
+        with tracker:
+            time.sleep(0.1)
+        return i
+
+    async def main():
+        tasks = [asyncio.create_task(stage.run(work, i)) for i in range(6)]
+        await asyncio.sleep(0.02)
+        snapshots.append(stage.stats())
+        return await asyncio.gather(*tasks)
+
+    try:
+        assert asyncio.run(main()) == list(range(6))
+    finally:
+        stage.shutdown()
+
+    assert tracker.peak == 2
+    assert snapshots == [{"limit": 2, "in_flight": 2, "waiting": 4}]
+    assert stage.stats() == {"limit": 2, "in_flight": 0, "waiting": 0}
+
+
+def test_async_work_and_held_slots_share_the_limit():
+    stage = Stage("llm", 3, threaded=False)
+    tracker = Tracker()
+
+    async def work():
+        with tracker:
+            await asyncio.sleep(0.02)
+
+    async def hold():
+        async with stage.slot():
+            with tracker:
+                await asyncio.sleep(0.02)
+
+    async def main():
+        await asyncio.gather(*[stage.call(work) for _ in range(5)], *[hold() for _ in range(4)])
+
+    asyncio.run(main())
+    assert tracker.peak == 3
+    with pytest.raises(RuntimeError):
+        asyncio.run(stage.run(time.sleep, 0))
+
+
+def test_build_stages_merges_limits_and_rejects_bad_ones():
+    stages = build_stages({"search": 3})
+    try:
+        assert set(stages) == set(DEFAULT_STAGE_LIMITS)
+        assert stages["search"].limit == 3
+        assert stages["ingest"].limit == DEFAULT_STAGE_LIMITS["ingest"]
+        # ArXiv and LLM calls are async and get no thread pool.
+        assert stages["llm"]._executor is None and stages["search"]._executor is not None
+    finally:
+        for stage in stages.values():
+            stage.shutdown()
+
+    for bad in (0, -1, 2.5, "4"):
+        with pytest.raises(ValueError):
+            build_stages({"llm": bad})
@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import numpy as np
+
+from fastapi.testclient import TestClient
+
+from app.dependencies import get_rag_service
+from app.main import app
+from app.services.rag_service import RAGService
+from app.services.summarizer import Summarizer
+
+TOKENS = ["Transformers ", "rely on ", "self-attention."]
+
+RESULTS = [
+    {
+        "score": 0.82,
+        "similarity": 0.82,
+        "metadata": {"title": "Attention Is All You Need", "chunk": {"text": "The Transformer uses attention."}},
+    }
+]
+
+
+class FakeStreamingLLM:
+    """
+    Stands in for GeminiLLM: streams a fixed answer token by token and records the prompts it saw.
+    """
+
+    def __init__(self, tokens=TOKENS):
+        self.tokens = tokens
+        self.prompts = []
+
+    async def astream_text(self, prompt, system_prompt=None):
+        self.prompts.append(prompt)
+        for token in self.tokens:
+            await asyncio.sleep(0)
+            yield token
+
+
+class FakeEmbeddingService:
+    def embed_query(self, query):
+        return np.ones((1, 8), dtype=np.float32)
+
+
+class FakeVectorStore:
+    embedding_dim = 8
+    metric = "cosine"
+    hybrid = False
+
+    def __init__(self, results=RESULTS):
+        self.results = results
+
+    def add_listener(self, event, callback):
+        pass
+
+    def search_by_threshold(self, query, similarity_threshold, max_results=None):
+        return self.results
+
+
+def make_service(llm):
+    service = RAGService()
+    service._components.update(
+        embedding_service=FakeEmbeddingService(),
+        vector_store=FakeVectorStore(),
+        summarizer=Summarizer(llm=llm),
+    )
+    return service
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_summarizer_streams_llm_tokens_in_order():
+    llm = FakeStreamingLLM()
+    summarizer = Summarizer(llm=llm)
+
+    async def collect():
+        return [token async for token in summarizer.astream("what is attention?", ["chunk one"])]
+
+    assert asyncio.run(collect()) == TOKENS
+    assert "what is attention?" in llm.prompts[0]
+    assert "chunk one" in llm.prompts[0]
+
+
+def test_results_are_emitted_before_the_llm_is_called():
+    llm = FakeStreamingLLM()
+    service = make_service(llm)
+
+    async def first_event():
+        stream = service.astream_query("attention", similarity_threshold=0.4)
+        event = await stream.__anext__()
+        prompts_at_first_event = len(llm.prompts)
+        rest = [e async for e in stream]
+        return event, prompts_at_first_event, rest
+
+    event, prompts_at_first_event, rest = asyncio.run(first_event())
+    assert event["event"] == "results"
+    assert event["data"]["results"] == RESULTS
+    assert prompts_at_first_event == 0
+    assert [e["event"] for e in rest] == ["token"] * len(TOKENS) + ["done"]
+
+
+def test_sse_endpoint_streams_results_then_tokens_then_done():
+    service = make_service(FakeStreamingLLM())
+    app.dependency_overrides[get_rag_service] = lambda: service
+    try:
+        response = TestClient(app).post("/api/query/stream", json={"query": "attention"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_sse(response.text)
+    assert events[0] == ("results", {"status": "success", "source": "local knowledge base", "results": RESULTS})
+    assert [data["text"] for name, data in events[1:-1] if name == "token"] == TOKENS
+    assert events[-1] == ("done", {"summary": "".join(TOKENS)})
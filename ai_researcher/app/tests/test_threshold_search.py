@@ -0,0 +1,52 @@
+import pytest
+
+from app.tests.conftest import make_store as make_base_store
+
+
+def make_store(metric):
+    store = make_base_store(metric=metric, hybrid={"enabled": False})
+    texts = [f"chunk {i}" for i in range(8)]
+    metadatas = [{"title": f"Paper {i}", "url": "", "chunk_id": 0, "chunk": {"text": t}} for i, t in enumerate(texts)]
+    store.add_chunks(metadatas, store.embedding_service.get_embeddings(texts))
+    return store
+
+
+def test_l2_zero_threshold_returns_the_nearest_chunks_best_first(workdir):
+    # An L2 similarity 1 / (1 + d) is always above 0, so every chunk qualifies.
+    store = make_store("l2")
+    try:
+        results = store.search_by_threshold("chunk 3", similarity_threshold=0.0, max_results=5)
+    finally:
+        store.close()
+
+    assert len(results) == 5
+    assert results[0]["metadata"]["title"] == "Paper 3"
+    similarities = [r["similarity"] for r in results]
+    assert similarities == sorted(similarities, reverse=True)
+
+
+def test_l2_stores_keep_their_metric_until_converted_explicitly(workdir):
+    make_store("l2").close()
+
+    kept = make_base_store(metric="cosine", hybrid={"enabled": False})
+    try:
+        assert kept.metric == "l2"
+    finally:
+        kept.close()
+
+    converted = make_base_store(metric="cosine", convert_metric=True, hybrid={"enabled": False})
+    try:
+        assert converted.metric == "cosine"
+        assert converted.index.ntotal == 8
+        assert converted.search("chunk 3", top_k=1)[0]["metadata"]["title"] == "Paper 3"
+    finally:
+        converted.close()
+
+
+@pytest.mark.parametrize("metric", ["l2", "cosine"])
+def test_lowest_threshold_returns_every_chunk(workdir, metric):
+    store = make_store(metric)
+    try:
+        assert len(store.search_by_threshold("chunk 3", similarity_threshold=-1.0)) == 8
+    finally:
+        store.close()
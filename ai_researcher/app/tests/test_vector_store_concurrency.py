@@ -0,0 +1,72 @@
+import threading
+
+from app.tests.conftest import make_store, metadatas_for
+from app.utils.concurrency import ReadWriteLock
+
+TEXTS = [f"paper {i} studies topic {i} in depth" for i in range(6)]
+
+
+def test_searches_do_not_wait_for_an_ingest_batch_being_logged(workdir):
+    store = make_store(hybrid={"enabled": False})
+    store.add_chunks(metadatas_for(TEXTS[:3]), store.embedding_service.get_embeddings(TEXTS[:3]))
+
+    logging_batch, release = threading.Event(), threading.Event()
+    append = store.wal.append
+
+    def slow_append(*args):
+        logging_batch.set()
+        release.wait(5)
+        append(*args)
+
+    store.wal.append = slow_append
+    writer = threading.Thread(
+        target=store.add_chunks,
+        args=(metadatas_for(TEXTS[3:], start=3), store.embedding_service.get_embeddings(TEXTS[3:])),
+    )
+    writer.start()
+    try:
+        assert logging_batch.wait(5)
+        results = []
+        reader = threading.Thread(target=lambda: results.append(store.search(TEXTS[1], top_k=1)))
+        reader.start()
+        reader.join(2)
+        # Answered from the index as it was, while the batch is still being written to the log.
+        assert not reader.is_alive()
+        assert results[0][0]["metadata"]["title"] == "Paper 1"
+    finally:
+        release.set()
+        writer.join(5)
+    assert store.index.ntotal == 6
+    store.close()
+
+
+def test_read_write_lock_shares_reads_and_excludes_writes():
+    lock = ReadWriteLock()
+    both_reading = threading.Barrier(2, timeout=2)
+    events = []
+
+    def reader(name):
+        with lock.read():
+            both_reading.wait()
+            events.append(f"read {name}")
+
+    readers = [threading.Thread(target=reader, args=(i,)) for i in range(2)]
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join(5)
+    assert sorted(events) == ["read 0", "read 1"]
+
+    with lock.read():
+        in_write = threading.Event()
+
+        def write():
+            with lock.write():
+                in_write.set()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        # Held off while a reader is inside.
+        assert not in_write.wait(0.2)
+    assert in_write.wait(2)
+    writer.join(2)
@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.core.wal import HEADER, WriteAheadLog
+from app.tests.conftest import crash, make_store, metadatas_for
+
+TEXTS = [f"paper {i} studies topic {i} in depth" for i in range(6)]
+NO_HYBRID = {"hybrid": {"enabled": False}}
+
+
+def batch(start, rows=3, dim=4):
+    ids = list(range(start, start + rows))
+    vectors = np.arange(start * dim, (start + rows) * dim, dtype=np.float32).reshape(rows, dim)
+    return ids, vectors, [{"id": i} for i in ids]
+
+
+def test_replay_returns_records_in_order(tmp_path):
+    wal = WriteAheadLog(str(tmp_path / "index.wal"))
+    wal.append(*batch(0))
+    wal.append(*batch(3))
+    wal.close()
+
+    records = list(WriteAheadLog(str(tmp_path / "index.wal")).replay())
+
+    assert [ids.tolist() for ids, _, _ in records] == [[0, 1, 2], [3, 4, 5]]
+    np.testing.assert_array_equal(records[1][1], batch(3)[1])
+    assert records[1][2] == [{"id": 3}, {"id": 4}, {"id": 5}]
+
+
+@pytest.mark.parametrize("damage", ["torn", "corrupt"])
+def test_a_damaged_tail_is_cut_off_and_appends_continue(tmp_path, damage):
+    path = str(tmp_path / "index.wal")
+    wal = WriteAheadLog(path)
+    wal.append(*batch(0))
+    intact = wal.size()
+    wal.append(*batch(3))
+    wal.close()
+
+    with open(path, "r+b") as f:
+        if damage == "torn":
+            f.truncate(os.path.getsize(path) - 5)
+        else:
+            f.seek(intact + HEADER.size)
+            byte = f.read(1)
+            f.seek(intact + HEADER.size)
+            f.write(bytes([byte[0] ^ 0xFF]))
+
+    wal = WriteAheadLog(path)
+    assert [ids.tolist() for ids, _, _ in wal.replay()] == [[0, 1, 2]]
+    assert wal.size() == intact
+
+    wal.append(*batch(3))
+    assert [ids.tolist() for ids, _, _ in wal.replay()] == [[0, 1, 2], [3, 4, 5]]
+    wal.close()
+
+
+def test_store_recovers_uncheckpointed_batches_from_the_wal(workdir):
+    store = make_store(**NO_HYBRID)
+    store.add_chunks(metadatas_for(TEXTS[:3]), store.embedding_service.get_embeddings(TEXTS[:3]))
+    store.checkpoint()
+    assert store.wal.size() == 0
+    store.add_chunks(metadatas_for(TEXTS[3:], start=3), store.embedding_service.get_embeddings(TEXTS[3:]))
+    crash(store)
+
+    store = make_store(**NO_HYBRID)
+    try:
+        assert store.index.ntotal == 6
+        assert store.search(TEXTS[4], top_k=1)[0]["metadata"]["title"] == "Paper 4"
+        # Replayed batches are checkpointed on startup.
+        assert store.wal.size() == 0
+    finally:
+        store.close()
+
+
+def test_replay_after_a_checkpoint_that_kept_its_wal_adds_nothing_twice(workdir):
+    store = make_store(**NO_HYBRID)
+    store.add_chunks(metadatas_for(TEXTS), store.embedding_service.get_embeddings(TEXTS))
+    with open(store.wal_path, "rb") as f:
+        logged = f.read()
+    store.checkpoint()
+    crash(store)
+    # Crash between writing the checkpoint and truncating the log.
+    with open(store.wal_path, "wb") as f:
+        f.write(logged)
+
+    store = make_store(**NO_HYBRID)
+    try:
+        assert store.index.ntotal == 6
+        assert store.metadata_store.count() == 6
+    finally:
+        store.close()
@@ -0,0 +1,177 @@
+# app/utils/concurrency.py
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Per-stage limits used when config.yaml has no `concurrency` section.
+DEFAULT_STAGE_LIMITS = {
+    "search": 8,
+    "ingest": 1,
+    "arxiv": 4,
+    "llm": 8,
+}
+
+
+class Stage:
+    """
+    One step of the async query pipeline with its own concurrency limit.
+
+    At most `limit` calls run at once; the rest wait on a semaphore without
+    holding a thread. Blocking work (`run`) goes to the stage's own thread pool
+    of the same size, so a burst in one stage cannot starve the others or the
+    event loop. Async work (`call`) only takes the semaphore.
+    """
+
+    def __init__(self, name: str, limit: int, threaded: bool = True):
+        self.name = name
+        self.limit = limit
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor = (
+            ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"stage-{name}") if threaded else None
+        )
+        self.in_flight = 0
+        self.waiting = 0
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created on first use so it binds to the running event loop, not the importing one.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Runs a blocking callable on this stage's thread pool.
+        """
+        if self._executor is None:
+            raise RuntimeError(f"Stage '{self.name}' has no thread pool; use `call` for async work.")
+        loop = asyncio.get_running_loop()
+        return await self._limited(lambda: loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs)))
+
+    async def call(self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """
+        Awaits an async callable under this stage's limit.
+        """
+        return await self._limited(lambda: fn(*args, **kwargs))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Holds one of the stage's slots for the duration of the block (e.g. a streamed LLM response).
+        """
+        self.waiting += 1
+        async with self.semaphore:
+            self.waiting -= 1
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    async def _limited(self, start: Callable[[], Awaitable[T]]) -> T:
+        async with self.slot():
+            return await start()
+
+    def stats(self) -> Dict[str, int]:
+        return {"limit": self.limit, "in_flight": self.in_flight, "waiting": self.waiting}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+def build_stages(limits: Dict[str, int], async_stages=("arxiv", "llm")) -> Dict[str, Stage]:
+    """
+    Builds one Stage per entry of DEFAULT_STAGE_LIMITS, with limits overridden from config.
+    """
+    merged = {**DEFAULT_STAGE_LIMITS, **(limits or {})}
+    stages = {}
+    for name, limit in merged.items():
+        if not isinstance(limit, int) or limit < 1:
+            raise ValueError(f"Concurrency limit for stage '{name}' must be a positive integer, got {limit!r}.")
+        stages[name] = Stage(name, limit, threaded=name not in async_stages)
+    logger.info(f"Pipeline concurrency limits: {', '.join(f'{n}={s.limit}' for n, s in stages.items())}")
+    return stages
+
+
+class ReadWriteLock:
+    """
+    Many readers or one writer. A waiting writer blocks new readers, so a steady
+    stream of searches cannot starve an add. Not reentrant.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class RateLimiter:
+    """
+    Spaces calls at least `min_interval` seconds apart, across threads and event
+    loops alike: each caller reserves the next free slot under a lock, then sleeps
+    until it outside the lock.
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+            return slot - now
+
+    def wait_sync(self):
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
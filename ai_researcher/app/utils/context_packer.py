@@ -0,0 +1,130 @@
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+# Gemini averages about four characters per token on English text.
+CHARS_PER_TOKEN = 4
+DEFAULT_CONTEXT_BUDGET_TOKENS = 2000
+# Share of the budget held back when packing by the estimate, which undercounts
+# formulas, code, identifiers and non-English text. An exact tokenizer needs none.
+DEFAULT_SAFETY_MARGIN = 0.15
+# A chunk sharing this fraction of its word 3-grams with an already packed chunk is dropped.
+DEFAULT_DUPLICATE_OVERLAP = 0.8
+# Shortest repeated prefix worth trimming; the chunkers repeat 50–100 characters between neighbours.
+MIN_SHARED_PREFIX = 24
+MAX_SHARED_PREFIX = 400
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate LLM token count; no tokenizer round trip, good enough for budgeting.
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _shingles(text: str) -> Set[int]:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < 3:
+        return {hash(word) for word in words}
+    return {hash((a, b, c)) for a, b, c in zip(words, words[1:], words[2:])}
+
+
+def _overlap(a: Set[int], b: Set[int]) -> float:
+    # Share of the smaller chunk found in the other, so a chunk contained in a longer one counts as a duplicate.
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def _strip_shared_prefix(text: str, packed: Sequence[str]) -> str:
+    """
+    Drops the start of `text` when it repeats the end of a packed chunk
+    (the overlap the chunkers carry between neighbouring chunks).
+    """
+    for previous in packed:
+        for size in range(min(len(previous), len(text), MAX_SHARED_PREFIX), MIN_SHARED_PREFIX - 1, -1):
+            tail = previous[-size:].lstrip()
+            if len(tail) >= MIN_SHARED_PREFIX and text.startswith(tail):
+                return text[len(tail):].lstrip()
+    return text
+
+
+def _truncate(text: str, max_tokens: int, count_tokens: Callable[[str], int] = estimate_tokens) -> str:
+    cut = text[: max_tokens * CHARS_PER_TOKEN]
+    if len(cut) < len(text) and " " in cut:
+        cut = cut[: cut.rindex(" ")]
+    # A real tokenizer may count more tokens than the estimate: drop words until it fits.
+    while cut and count_tokens(cut) > max_tokens:
+        cut = cut[: int(len(cut) * 0.9)]
+        if " " in cut:
+            cut = cut[: cut.rindex(" ")]
+    return cut
+
+
+def pack_context(
+    chunks: Sequence[str],
+    budget_tokens: int = DEFAULT_CONTEXT_BUDGET_TOKENS,
+    duplicate_overlap: float = DEFAULT_DUPLICATE_OVERLAP,
+    count_tokens: Optional[Callable[[str], int]] = None,
+    safety_margin: float = DEFAULT_SAFETY_MARGIN,
+) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Picks the context for a prompt. `chunks` come best first (retrieval or
+    re-ranking order), so the most relevant claim the budget first; of two
+    near-duplicates the more relevant one stays. Text repeated from a
+    neighbouring chunk is trimmed, and later chunks are added while they fit
+    in `budget_tokens`. A first chunk larger than the whole budget is
+    truncated rather than dropped.
+
+    Tokens are counted with `count_tokens` (the model's tokenizer) when given.
+    Otherwise the ~4 characters per token estimate is used and `safety_margin`
+    of the budget is kept free for the text it undercounts.
+    Returns the packed chunks and counts of what was kept and dropped.
+    """
+    if count_tokens is None:
+        count_tokens = estimate_tokens
+        budget_tokens = int(budget_tokens * (1 - safety_margin))
+    separator_tokens = count_tokens(CONTEXT_SEPARATOR)
+    packed: List[str] = []
+    packed_shingles: List[Set[int]] = []
+    used = 0
+    info = {
+        "chunks": 0,
+        "context_tokens": 0,
+        "budget_tokens": budget_tokens,
+        "duplicates": 0,
+        "over_budget": 0,
+        "trimmed": 0,
+    }
+
+    for chunk in chunks:
+        text = chunk.strip()
+        if not text:
+            continue
+        shingles = _shingles(text)
+        if any(_overlap(shingles, seen) >= duplicate_overlap for seen in packed_shingles):
+            info["duplicates"] += 1
+            continue
+        trimmed = _strip_shared_prefix(text, packed)
+        if not trimmed:
+            info["duplicates"] += 1
+            continue
+        info["trimmed"] += trimmed != text
+
+        cost = count_tokens(trimmed) + (separator_tokens if packed else 0)
+        if used + cost > budget_tokens:
+            if packed:
+                info["over_budget"] += 1
+                continue
+            trimmed = _truncate(trimmed, budget_tokens, count_tokens)
+            cost = count_tokens(trimmed)
+        packed.append(trimmed)
+        packed_shingles.append(shingles)
+        used += cost
+
+    info["chunks"] = len(packed)
+    info["context_tokens"] = used
+    return packed, info
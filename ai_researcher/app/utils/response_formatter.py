@@ -0,0 +1,12 @@
+# app/utils/response_formatter.py
+
+import json
+from typing import Any
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Encodes one server-sent event. `data` is JSON-encoded on a single line, so
+    newlines inside summary tokens never break the SSE framing.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -1,6 +1,14 @@
 import re
-from typing import List, Dict
+from typing import Dict, Iterator
 
+WHITESPACE_RE = re.compile(r"\s+")
+NON_WHITESPACE_RE = re.compile(r"\S")
+# Matched from a chunk's start up to its size limit, these backtrack to the last
+# sentence end (., ! or ? followed by whitespace) or token end inside the window.
+LAST_SENTENCE_END_RE = re.compile(r".*[.!?](?=\s)", re.S)
+LAST_TOKEN_END_RE = re.compile(r".*\S(?=\s)", re.S)
+
+BOUNDARIES = ("sentence", "token")
 
 
 def clean_text(text: str) -> str:
@@ -9,47 +17,74 @@ def clean_text(text: str) -> str:
     - Removes excessive whitespace
     - Normalizes line breaks
     """
-    text = re.sub(r'\s+', ' ', text)
+    text = WHITESPACE_RE.sub(' ', text)
     text = text.strip()
     return text
 
+
+def iter_chunks(
+    text: str,
+    chunk_size: int = 1000,
+    overlap: int = 100,
+    boundary: str = "sentence",
+) -> Iterator[str]:
+    """
+    Lazily splits text into chunks of at most `chunk_size` characters.
+    `boundary="sentence"` ends chunks after the last full sentence that fits,
+    falling back to a token boundary inside an over-long sentence; `"token"`
+    ends them between whitespace-separated tokens. A token longer than a chunk
+    is cut. Each chunk starts with the whole tokens that end the previous one
+    within its last `overlap` characters. Chunks are slices of `text`.
+
+    Runs in linear time: each chunk costs one precompiled-regex scan of at most
+    `chunk_size` characters, and no chunk is built by concatenation.
+    """
+    if boundary not in BOUNDARIES:
+        raise ValueError(f"Unknown chunk boundary '{boundary}'. Expected one of {BOUNDARIES}.")
+    if not 0 <= overlap < chunk_size:
+        raise ValueError(f"overlap ({overlap}) must be at least 0 and smaller than chunk_size ({chunk_size}).")
+    cut_patterns = (LAST_SENTENCE_END_RE, LAST_TOKEN_END_RE) if boundary == "sentence" else (LAST_TOKEN_END_RE,)
+
+    first = NON_WHITESPACE_RE.search(text)
+    if first is None:
+        return
+    start, previous_end = first.start(), 0
+    while True:
+        limit = start + chunk_size
+        if limit >= len(text):
+            yield text[start:].rstrip()
+            return
+        end = limit
+        for pattern in cut_patterns:
+            # endpos is one past the limit so the lookahead can see the character after a cut at the limit.
+            match = pattern.match(text, start, limit + 1)
+            # A cut must add text past the previous chunk, or the same tail would repeat.
+            if match is not None and match.end() > previous_end:
+                end = match.end()
+                break
+        yield text[start:end]
+        previous_end = end
+
+        following = NON_WHITESPACE_RE.search(text, end)
+        if following is None:
+            return
+        gap = WHITESPACE_RE.search(text, max(end - overlap, start + 1), end)
+        start = gap.end() if gap is not None and gap.end() < end else following.start()
+
+
 def chunk_text(
     text: str,
     chunk_size: int = 1000,
     overlap: int = 100,
     source: str = ""
-) -> List[Dict]:
+) -> Iterator[Dict]:
     """
-    Splits cleaned text into overlapping chunks for embedding.
-    Returns a list of chunks, each with text, chunk_id, and source.
+    Splits cleaned text into overlapping chunks for embedding, on sentence boundaries.
+    Yields chunks lazily, each with text, chunk_id, and source.
     """
-    sentences = re.split(r'(?<=[.!?]) +', text)
-    sentences = [s.strip() for s in sentences if s.strip()]
-
-    chunks = []
-    current_chunk = ""
-    chunk_id = 0
-
-    for sentence in sentences:
-        if len(current_chunk) + len(sentence) <= chunk_size:
-            current_chunk += " " + sentence
-        else:
-            chunks.append({
-                "chunk_id": chunk_id,
-                "text": current_chunk.strip(),
-                "source": source
-            })
-            chunk_id += 1
-            # Keep small overlap for context continuity
-            overlap_part = current_chunk[-overlap:]
-            current_chunk = overlap_part + " " + sentence
-
-    # Add the final chunk
-    if current_chunk.strip():
-        chunks.append({
+    for chunk_id, chunk in enumerate(iter_chunks(text, chunk_size, overlap, boundary="sentence")):
+        yield {
             "chunk_id": chunk_id,
-            "text": current_chunk.strip(),
+            "text": chunk,
             "source": source
-        })
-
-    return chunks
\ No newline at end of file
+        }
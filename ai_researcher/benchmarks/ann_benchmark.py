@@ -0,0 +1,81 @@
+#type: ignore
+"""
+Recall@k versus latency for every index type in app.core.index_factory,
+measured against exact IndexFlat search on the same data.
+
+    python -m benchmarks.ann_benchmark --nb 100000 --nq 1000 --k 10
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.core.index_factory import INDEX_TYPES, build_index, configure_search, train_index
+
+
+def make_dataset(nb: int, nq: int, d: int, n_clusters: int = 256, seed: int = 0):
+    """
+    Clustered Gaussian vectors — closer to real sentence embeddings than the
+    uniform noise of a plain np.random.random benchmark.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, d)).astype("float32")
+    xb = centers[rng.integers(0, n_clusters, nb)] + 0.3 * rng.standard_normal((nb, d)).astype("float32")
+    xq = centers[rng.integers(0, n_clusters, nq)] + 0.3 * rng.standard_normal((nq, d)).astype("float32")
+    return xb.astype("float32"), xq.astype("float32")
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def run(nb: int, nq: int, d: int, k: int, sweep: dict):
+    xb, xq = make_dataset(nb, nq, d)
+
+    print(f"Dataset: nb={nb} nq={nq} d={d} k={k}")
+    print(f"{'index':<10} {'param':<14} {'build s':>9} {'ms/query':>9} {'recall@k':>9}")
+
+    truth = None
+    for index_type in INDEX_TYPES:
+        start = time.perf_counter()
+        index = build_index(index_type, d, nb)
+        train_index(index, xb)
+        index.add(xb)
+        build_seconds = time.perf_counter() - start
+
+        for params in sweep.get(index_type, [{}]):
+            configure_search(index, params)
+            start = time.perf_counter()
+            _, found = index.search(xq, k)
+            ms_per_query = (time.perf_counter() - start) * 1000 / nq
+
+            if truth is None:
+                truth = found  # flat runs first and is the exact baseline
+            label = ",".join(f"{key}={value}" for key, value in params.items()) or "-"
+            print(
+                f"{index_type:<10} {label:<14} {build_seconds:>9.2f} "
+                f"{ms_per_query:>9.4f} {recall_at_k(found, truth):>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nb", type=int, default=100_000, help="database size")
+    parser.add_argument("--nq", type=int, default=1_000, help="number of queries")
+    parser.add_argument("--d", type=int, default=384, help="vector dimension (MiniLM = 384)")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    run(
+        args.nb,
+        args.nq,
+        args.d,
+        args.k,
+        sweep={
+            "ivf_flat": [{"nprobe": n} for n in (1, 8, 32)],
+            "ivf_pq": [{"nprobe": n} for n in (1, 8, 32)],
+            "hnsw": [{"ef_search": ef} for ef in (16, 64, 256)],
+        },
+    )
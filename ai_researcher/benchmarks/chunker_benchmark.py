@@ -0,0 +1,110 @@
+#type: ignore
+"""
+Time and peak memory of the shared streaming chunker (app.utils.text_cleaner.iter_chunks)
+against the two implementations it replaced, on synthetic full-length papers.
+
+    legacy sentence   re.split + string concatenation (old text_cleaner.chunk_text)
+    legacy window     fixed character window (old EmbeddingService.chunk_document)
+    stream sentence   iter_chunks(boundary="sentence"), consumed lazily
+    stream token      iter_chunks(boundary="token"), consumed lazily
+
+Peak memory is traced with tracemalloc while the chunks are consumed one by one
+(as ingestion does), so the legacy lists show up and the generators do not.
+
+    python -m benchmarks.chunker_benchmark --chars 200000 2000000 10000000
+"""
+
+import argparse
+import random
+import re
+import time
+import tracemalloc
+
+from app.utils.text_cleaner import iter_chunks
+
+WORDS = (
+    "neural network transformer attention quantum qubit graph retrieval summary "
+    "paper model training dataset benchmark optimisation gradient embedding "
+    "protein fission lattice spectrum inference latency layer token decoder"
+).split()
+
+
+def make_paper(n_chars: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    sentences, size = [], 0
+    while size < n_chars:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 40))).capitalize() + rng.choice(".!?")
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def legacy_chunk_text(text, chunk_size=1000, overlap=100):
+    sentences = re.split(r'(?<=[.!?]) +', text)
+    sentences = [s.strip() for s in sentences if s.strip()]
+    chunks, current_chunk = [], ""
+    for sentence in sentences:
+        if len(current_chunk) + len(sentence) <= chunk_size:
+            current_chunk += " " + sentence
+        else:
+            chunks.append(current_chunk.strip())
+            current_chunk = current_chunk[-overlap:] + " " + sentence
+    if current_chunk.strip():
+        chunks.append(current_chunk.strip())
+    return chunks
+
+
+def legacy_chunk_document(document, chunk_size=500, overlap=50):
+    chunks, start = [], 0
+    while start < len(document):
+        chunks.append(document[start:min(start + chunk_size, len(document))])
+        start += chunk_size - overlap
+    return chunks
+
+
+IMPLEMENTATIONS = {
+    "legacy sentence": lambda text: legacy_chunk_text(text, 1000, 100),
+    "legacy window": lambda text: legacy_chunk_document(text, 500, 50),
+    "stream sentence": lambda text: iter_chunks(text, 1000, 100, boundary="sentence"),
+    "stream token": lambda text: iter_chunks(text, 500, 50, boundary="token"),
+}
+
+
+def measure(chunker, text):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = chars = 0
+    for chunk in chunker(text):
+        count += 1
+        chars += len(chunk)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, count, chars
+
+
+def run(sizes, repeats):
+    print(f"{'chars':>10} {'chunker':<16} {'ms':>9} {'MB/s':>7} {'peak KB':>9} {'chunks':>7}")
+    for n_chars in sizes:
+        text = make_paper(n_chars)
+        for name, chunker in IMPLEMENTATIONS.items():
+            # tracemalloc slows allocation-heavy code; time without it, trace memory on a separate run.
+            seconds = min(timed(chunker, text) for _ in range(repeats))
+            _, peak, count, _ = measure(chunker, text)
+            print(f"{len(text):>10} {name:<16} {seconds * 1000:>9.1f} {len(text) / seconds / 1e6:>7.1f} "
+                  f"{peak / 1024:>9.0f} {count:>7}")
+
+
+def timed(chunker, text):
+    start = time.perf_counter()
+    for _ in chunker(text):
+        pass
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chars", type=int, nargs="+", default=[200_000, 2_000_000, 10_000_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    run(args.chars, args.repeats)
@@ -0,0 +1,81 @@
+#type: ignore
+"""
+Throughput and memory of the torch (SentenceTransformer) and int8 ONNX Runtime
+embedding backends on the same synthetic abstracts.
+
+Each backend runs in its own subprocess so the reported peak RSS is not
+polluted by the other backend's libraries.
+
+    python -m benchmarks.embedding_backends --texts 2000 --batch-size 64
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+WORDS = (
+    "neural network transformer attention quantum qubit graph retrieval summary "
+    "paper model training dataset benchmark optimisation gradient embedding "
+    "protein fission lattice spectrum inference latency"
+).split()
+
+
+def make_texts(n: int, words_per_text: int = 120):
+    return [
+        " ".join(WORDS[(i * 7 + j * 3) % len(WORDS)] for j in range(words_per_text)) + f" #{i}"
+        for i in range(n)
+    ]
+
+
+def run_backend(backend: str, n_texts: int, batch_size: int) -> dict:
+    start = time.perf_counter()
+    if backend == "onnx":
+        from app.core.onnx_embedder import OnnxEmbedder
+        model = OnnxEmbedder()
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
+    load_seconds = time.perf_counter() - start
+
+    texts = make_texts(n_texts)
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+
+    start = time.perf_counter()
+    model.encode(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "texts_per_second": round(n_texts / elapsed, 1),
+        "ms_per_text": round(elapsed * 1000 / n_texts, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--backend", choices=["torch", "onnx", "both"], default="both")
+    args = parser.parse_args()
+
+    if args.backend != "both":
+        print(json.dumps(run_backend(args.backend, args.texts, args.batch_size)))
+        sys.exit(0)
+
+    print(f"{'backend':<8} {'load s':>7} {'texts/s':>9} {'ms/text':>8} {'peak RSS MB':>12}")
+    for backend in ("torch", "onnx"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.embedding_backends", "--backend", backend,
+             "--texts", str(args.texts), "--batch-size", str(args.batch_size)],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        r = json.loads(output)
+        print(
+            f"{r['backend']:<8} {r['load_seconds']:>7} {r['texts_per_second']:>9} "
+            f"{r['ms_per_text']:>8} {r['peak_rss_mb']:>12}"
+        )
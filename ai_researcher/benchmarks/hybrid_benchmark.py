@@ -0,0 +1,115 @@
+#type: ignore
+"""
+Latency and exact-term hit rate of vector-only versus hybrid (BM25 + vector,
+reciprocal-rank fusion) retrieval through VectorStore.search.
+
+Each synthetic chunk mentions one made-up model name ("xlm-4821"); queries
+ask for a name, and a hit means the chunk containing it comes back in the
+top k. The store is built in a temporary directory.
+
+    python -m benchmarks.hybrid_benchmark --chunks 20000 --queries 200 --k 5
+    python -m benchmarks.hybrid_benchmark --real-embeddings   # MiniLM instead of random vectors
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.config_loader import load_config
+
+WORDS = (
+    "neural network transformer attention quantum qubit graph retrieval summary "
+    "paper model training dataset benchmark optimisation gradient embedding "
+    "protein fission lattice spectrum inference latency layer token decoder"
+).split()
+
+
+class RandomEmbeddingService:
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def get_embeddings(self, texts):
+        rng = np.random.default_rng(abs(hash(tuple(texts))) % (2 ** 32))
+        return rng.standard_normal((len(texts), self.dim)).astype("float32")
+
+    def embed_query(self, query):
+        return self.get_embeddings([query])
+
+
+def make_corpus(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    names = [f"xlm-{i:04d}" for i in range(n)]
+    texts = [
+        " ".join(rng.choice(WORDS) for _ in range(60)) + f" We evaluate {name} on this benchmark."
+        for name in names
+    ]
+    return names, texts
+
+
+def timed_search(store, queries, k, hybrid):
+    start = time.perf_counter()
+    results = [store.search(query, top_k=k, hybrid=hybrid) for query in queries]
+    ms_per_query = (time.perf_counter() - start) * 1000 / len(queries)
+    return results, ms_per_query
+
+
+def run(n_chunks: int, n_queries: int, k: int, real_embeddings: bool, batch_size: int):
+    load_config()
+    workdir = tempfile.mkdtemp(prefix="hybrid-bench-")
+    os.chdir(workdir)
+    from app.core.index_factory import index_type_of
+    from app.core.vector_store import VectorStore
+
+    if real_embeddings:
+        from app.core.embedding_service import EmbeddingService
+        embedding_service, dim = EmbeddingService(model_name="all-MiniLM-L6-v2"), 384
+    else:
+        embedding_service, dim = RandomEmbeddingService(384), 384
+    store = VectorStore(embedding_dem=dim, embedding_service=embedding_service)
+
+    names, texts = make_corpus(n_chunks)
+    start = time.perf_counter()
+    for offset in range(0, n_chunks, batch_size):
+        batch = texts[offset:offset + batch_size]
+        metadatas = [
+            {"title": names[offset + i], "url": "", "chunk_id": 0, "chunk": {"text": text}}
+            for i, text in enumerate(batch)
+        ]
+        store.add_chunks(metadatas, embedding_service.get_embeddings(batch))
+    build_seconds = time.perf_counter() - start
+
+    rng = random.Random(1)
+    targets = rng.sample(range(n_chunks), n_queries)
+    # Common words too, so the benchmark pays for decoding long posting lists.
+    queries = [f"how does {names[i]} use transformer attention" for i in targets]
+    # Warm up both paths (SQLite page cache, FAISS threads).
+    timed_search(store, queries[:5], k, hybrid=False)
+    timed_search(store, queries[:5], k, hybrid=True)
+
+    print(f"Corpus: {n_chunks} chunks, {n_queries} queries, k={k}, build {build_seconds:.2f}s "
+          f"({'MiniLM' if real_embeddings else 'random'} embeddings, index={index_type_of(store.index)})")
+    print(f"Keyword index: {store.sparse_index.stats()}")
+    print(f"{'retrieval':<12} {'ms/query':>9} {'hit@k':>7}")
+    for label, hybrid in (("vector", False), ("hybrid", True)):
+        results, ms_per_query = timed_search(store, queries, k, hybrid)
+        hits = sum(
+            any(r["metadata"]["title"] == names[target] for r in found)
+            for found, target in zip(results, targets)
+        )
+        print(f"{label:<12} {ms_per_query:>9.3f} {hits / n_queries:>7.3f}")
+    store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--real-embeddings", action="store_true")
+    args = parser.parse_args()
+    run(args.chunks, args.queries, args.k, args.real_embeddings, args.batch_size)
@@ -0,0 +1,52 @@
+#type: ignore
+"""
+Import-time report for the API: runs `python -X importtime -c "import app.main"`
+in a fresh interpreter and lists the slowest modules by cumulative time.
+
+Importing app.main should not pull in torch, sentence_transformers, faiss or
+langchain; those load in the lifespan warm-up or on first use. Any that show up
+here are flagged.
+
+    python -m benchmarks.import_time --top 25
+"""
+
+import argparse
+import subprocess
+import sys
+
+HEAVY_MODULES = ("torch", "sentence_transformers", "faiss", "langchain", "langchain_google_genai", "onnxruntime")
+
+
+def import_times(module: str):
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:   self [us] | cumulative | imported package" (nesting shown by indentation)
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = import_times(args.module)
+    total_us = next(cumulative for name, _, cumulative in rows if name == args.module)
+    print(f"import {args.module}: {total_us / 1000:.1f} ms total\n")
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    heavy = sorted({name.split(".")[0] for name, _, _ in rows if name.split(".")[0] in HEAVY_MODULES})
+    if heavy:
+        print(f"\n⚠️ heavy modules imported eagerly: {', '.join(heavy)}")
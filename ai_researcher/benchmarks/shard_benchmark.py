@@ -0,0 +1,110 @@
+#type: ignore
+"""
+Query latency of one in-process VectorStore versus ShardedVectorStore with
+1..N local worker processes, on the same random corpus, plus overlap of the
+sharded top k with the single index's (1.0 for exact flat shards).
+
+Everything runs on this machine: the shards are spawned worker processes and
+the stores are built in a temporary directory.
+
+    python -m benchmarks.shard_benchmark --chunks 200000 --queries 200 --k 10 --shards 2 4
+    python -m benchmarks.shard_benchmark --index-type hnsw
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.config_loader import load_config
+
+
+class RandomEmbeddingService:
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def get_embeddings(self, texts):
+        rng = np.random.default_rng(abs(hash(tuple(texts))) % (2 ** 32))
+        return rng.standard_normal((len(texts), self.dim)).astype("float32")
+
+    def embed_query(self, query):
+        return self.get_embeddings([query])
+
+    def close(self):
+        pass
+
+
+def corpus_batches(n_chunks: int, batch_size: int, chunks_per_paper: int = 4):
+    for offset in range(0, n_chunks, batch_size):
+        rows = range(offset, min(offset + batch_size, n_chunks))
+        texts = [f"chunk {i}" for i in rows]
+        metadatas = [
+            {"title": f"Paper {i // chunks_per_paper}", "url": f"http://arxiv.org/abs/{i // chunks_per_paper}",
+             "chunk_id": i % chunks_per_paper, "chunk": {"text": text}}
+            for i, text in zip(rows, texts)
+        ]
+        yield texts, metadatas
+
+
+def build(store, embedding_service, n_chunks: int, batch_size: int) -> float:
+    start = time.perf_counter()
+    for texts, metadatas in corpus_batches(n_chunks, batch_size):
+        store.add_chunks(metadatas, embedding_service.get_embeddings(texts))
+    return time.perf_counter() - start
+
+
+def timed_search(store, queries, k):
+    store.search(queries[0], top_k=k)  # warm up
+    start = time.perf_counter()
+    results = [store.search(query, top_k=k) for query in queries]
+    return results, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def overlap(found, truth) -> float:
+    keys = lambda results: {(r["metadata"]["url"], r["metadata"]["chunk_id"]) for r in results}
+    return sum(len(keys(f) & keys(t)) for f, t in zip(found, truth)) / sum(len(t) for t in truth)
+
+
+def run(n_chunks: int, n_queries: int, k: int, shard_counts, dim: int, index_type: str, batch_size: int):
+    load_config()
+    workdir = tempfile.mkdtemp(prefix="shard-bench-")
+    os.chdir(workdir)
+    from app.core.sharded_store import ShardedVectorStore
+    from app.core.vector_store import VectorStore
+
+    config = {"index_type": index_type, "hybrid": {"enabled": False}}
+    embedding_service = RandomEmbeddingService(dim)
+    queries = [f"query {i}" for i in range(n_queries)]
+
+    single = VectorStore(embedding_dem=dim, embedding_service=embedding_service, directory="single", config=config)
+    build_seconds = build(single, embedding_service, n_chunks, batch_size)
+    truth, single_ms = timed_search(single, queries, k)
+    single.close()
+
+    print(f"Corpus: {n_chunks} chunks, d={dim}, index={index_type}, {n_queries} queries, k={k}, {os.cpu_count()} CPUs")
+    print(f"{'store':<12} {'build s':>9} {'ms/query':>9} {'overlap@k':>10} {'vectors per shard'}")
+    print(f"{'single':<12} {build_seconds:>9.2f} {single_ms:>9.3f} {1.0:>10.3f}")
+    for shards in shard_counts:
+        store = ShardedVectorStore(
+            shards, embedding_dem=dim, embedding_service=embedding_service, root=f"shards-{shards}", config=config
+        )
+        build_seconds = build(store, embedding_service, n_chunks, batch_size)
+        found, sharded_ms = timed_search(store, queries, k)
+        sizes = store.shard_sizes()
+        store.close()
+        print(f"{f'{shards} shards':<12} {build_seconds:>9.2f} {sharded_ms:>9.3f} {overlap(found, truth):>10.3f} {sizes}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--shards", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--batch-size", type=int, default=4096)
+    args = parser.parse_args()
+    run(args.chunks, args.queries, args.k, args.shards, args.dim, args.index_type, args.batch_size)